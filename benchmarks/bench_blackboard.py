@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark suite for `Blackboard` operations (set, get, update, drop, save and load).
+
+Every operation is measured for each backend over two sweeps:
+value sizes (with a few keys) and key counts (with small values).
+Timing runs and tracemalloc runs are separated, so peaks do not skew latencies.
+
+    python benchmarks/bench_blackboard.py                          # quick run
+    python benchmarks/bench_blackboard.py --full                   # values up to 100 MB, up to 1M keys
+    python benchmarks/bench_blackboard.py --redis localhost:6379   # also a local redis-server
+    python benchmarks/bench_blackboard.py --compare benchmarks/results/0.2.2.json
+
+Results are written as JSON into `benchmarks/results/` (see `--output`).
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import gblackboard  # noqa: E402
+from gblackboard import Blackboard, SupportedMemoryType  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+QUICK_VALUE_SIZES = [16, 1024, 64 * 1024, 1024 * 1024]
+FULL_VALUE_SIZES = QUICK_VALUE_SIZES + [10 * 1024 * 1024, 100 * 1024 * 1024]
+QUICK_KEY_COUNTS = [10, 1000, 10000]
+FULL_KEY_COUNTS = QUICK_KEY_COUNTS + [100000, 1000000]
+SMALL_VALUE_SIZE = 64
+FEW_KEYS = 10
+
+OPERATIONS = ('set', 'get', 'update', 'save', 'load', 'drop')
+
+
+def dictionary_factory():
+    return Blackboard(SupportedMemoryType.DICTIONARY)
+
+
+def fakeredis_factory():
+    import fakeredis
+    with patch('redis.Redis', fakeredis.FakeRedis):
+        return Blackboard(SupportedMemoryType.REDIS, flush=True)
+
+
+def redis_factory(address):
+    host, _, port = address.partition(':')
+
+    def factory():
+        return Blackboard(SupportedMemoryType.REDIS, host=host, port=int(port or 6379), flush=True, timeout=10.0)
+    return factory
+
+
+def run_operations(factory, n_keys, value, dir_path, trace):
+    """
+    :return: {operation: (seconds, traced peak bytes or None)}
+    """
+    keys = ['key{}'.format(i) for i in range(n_keys)]
+    results = {}
+
+    def measure(operation, func):
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        peak = None
+        if trace:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results[operation] = (elapsed, peak)
+
+    blackboard = factory()
+    try:
+        measure('set', lambda: [blackboard.set(key, value) for key in keys])
+        measure('get', lambda: [blackboard.get(key) for key in keys])
+        measure('update', lambda: [blackboard.update(key, value) for key in keys])
+        measure('save', lambda: blackboard.save(dir_path))
+    finally:
+        blackboard.close()
+    blackboard = factory()
+    try:
+        measure('load', lambda: blackboard.load(dir_path))
+        measure('drop', lambda: [blackboard.drop(key) for key in keys])
+    finally:
+        blackboard.close()
+    return results
+
+
+def run_case(backend, factory, n_keys, value_size, repeat, trace):
+    value = b'\x00' * value_size
+    dir_path = tempfile.mkdtemp(prefix='gblackboard-bench-')
+    try:
+        best = {}
+        for _ in range(repeat):
+            for operation, (elapsed, _) in run_operations(factory, n_keys, value, dir_path, False).items():
+                best[operation] = min(elapsed, best.get(operation, elapsed))
+        peaks = {}
+        if trace:
+            peaks = {operation: peak
+                     for operation, (_, peak) in run_operations(factory, n_keys, value, dir_path, True).items()}
+    finally:
+        shutil.rmtree(dir_path, ignore_errors=True)
+    rows = []
+    for operation in OPERATIONS:
+        # save & load handle every key at once
+        count = 1 if operation in ('save', 'load') else n_keys
+        rows.append({
+            'backend': backend,
+            'keys': n_keys,
+            'value_bytes': value_size,
+            'operation': operation,
+            'seconds': best[operation],
+            'seconds_per_op': best[operation] / count,
+            'peak_bytes': peaks.get(operation),
+        })
+    return rows
+
+
+def case_name(row):
+    return '{backend}/{keys}keys/{value_bytes}B/{operation}'.format(**row)
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as infile:
+        baseline = {case_name(row): row for row in json.load(infile)['results']}
+    regressions = 0
+    for row in results:
+        old = baseline.get(case_name(row))
+        if old is None or not old['seconds']:
+            continue
+        ratio = row['seconds'] / old['seconds']
+        mark = ''
+        if ratio > threshold:
+            regressions += 1
+            mark = '  <-- regression'
+        print('{:<50} {:>8.2f}x{}'.format(case_name(row), ratio, mark))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--full', action='store_true', help='sweep values up to 100 MB and up to 1M keys')
+    parser.add_argument('--backend', action='append', choices=['dictionary', 'fakeredis', 'redis'],
+                        help='backends to benchmark (default: dictionary and fakeredis, plus redis with --redis)')
+    parser.add_argument('--redis', metavar='HOST:PORT', help='address of a local redis-server to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs per case; the best one is kept')
+    parser.add_argument('--no-memory', action='store_true', help='skip tracemalloc peak measurement')
+    parser.add_argument('--output', help='result file (default: benchmarks/results/<version>-<timestamp>.json)')
+    parser.add_argument('--compare', metavar='JSON', help='compare results with a previous result file')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='slowdown ratio reported as a regression with --compare')
+    args = parser.parse_args(argv)
+
+    factories = {'dictionary': dictionary_factory, 'fakeredis': fakeredis_factory}
+    if args.redis:
+        factories['redis'] = redis_factory(args.redis)
+    backends = args.backend or sorted(factories)
+    value_sizes = FULL_VALUE_SIZES if args.full else QUICK_VALUE_SIZES
+    key_counts = FULL_KEY_COUNTS if args.full else QUICK_KEY_COUNTS
+    cases = [(FEW_KEYS, size) for size in value_sizes] + [(count, SMALL_VALUE_SIZE) for count in key_counts]
+
+    results = []
+    for backend in backends:
+        if backend not in factories:
+            parser.error('--redis HOST:PORT is required for the redis backend')
+        for n_keys, value_size in cases:
+            rows = run_case(backend, factories[backend], n_keys, value_size, args.repeat, not args.no_memory)
+            for row in rows:
+                print('{:<50} {:>14.3f} us/op'.format(case_name(row), row['seconds_per_op'] * 1e6))
+            results.extend(rows)
+
+    timestamp = dt.datetime.now().strftime('%Y%m%d-%H%M%S')
+    output = args.output or os.path.join(RESULTS_DIR, '{}-{}.json'.format(gblackboard.__version__, timestamp))
+    if not os.path.exists(os.path.dirname(os.path.abspath(output))):
+        os.makedirs(os.path.dirname(os.path.abspath(output)), 0o755)
+    with open(output, 'w') as outfile:
+        json.dump({
+            'version': gblackboard.__version__,
+            'timestamp': timestamp,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+        }, outfile, indent=2)
+    print('Results are written to {}'.format(output))
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
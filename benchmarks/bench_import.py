@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Import-time benchmark for `import gblackboard`, based on `python -X importtime`.
+
+    python benchmarks/bench_import.py                  # report the median of 10 fresh interpreters
+    python benchmarks/bench_import.py --max-us 30000   # fail if importing takes longer than 30 ms
+
+It also fails if optional heavy dependencies (redis, click, numpy) are imported eagerly.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+LAZY_MODULES = ('redis', 'click', 'numpy')
+
+
+def import_times():
+    """
+    :return: {module: cumulative microseconds} of a fresh `import gblackboard`
+    """
+    code = 'import sys; sys.path.insert(0, {!r}); import gblackboard'.format(ROOT_DIR)
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='number of fresh interpreters')
+    parser.add_argument('--max-us', type=int, help='fail if the median import time exceeds this (microseconds)')
+    parser.add_argument('--output', help='write the result as JSON')
+    args = parser.parse_args(argv)
+
+    runs = [import_times() for _ in range(args.runs)]
+    median = statistics.median(run['gblackboard'] for run in runs)
+    eager = sorted({module.split('.')[0] for run in runs for module in run} & set(LAZY_MODULES))
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)[:10]
+
+    print('import gblackboard: {:.0f} us (median of {} runs)'.format(median, args.runs))
+    for module, cumulative in slowest:
+        print('    {:>10} us  {}'.format(cumulative, module))
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            json.dump({'median_us': median, 'eager_modules': eager, 'slowest': slowest}, outfile, indent=2)
+
+    failed = False
+    if eager:
+        print('Imported eagerly: {}'.format(', '.join(eager)))
+        failed = True
+    if args.max_us is not None and median > args.max_us:
+        print('Import time exceeds {} us'.format(args.max_us))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
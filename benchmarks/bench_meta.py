@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Memory benchmark for the meta info which `Blackboard` keeps per key, based on tracemalloc.
+
+The columnar `MetaInfoTable` is compared with the per-key `MetaInfo` objects of gblackboard <= 0.2
+(an object with a `__dict__` and a callback list for every key).
+
+    python benchmarks/bench_meta.py                     # 100k keys
+    python benchmarks/bench_meta.py --keys 1000000      # 1M keys
+    python benchmarks/bench_meta.py --max-ratio 0.5     # fail unless the table takes at most half the memory
+"""
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from gblackboard.gblackboard import MetaInfoTable  # noqa: E402
+from gblackboard.index import KeyIndex  # noqa: E402
+
+
+class LegacyMetaInfo(object):
+
+    def __init__(self, read_only=False, structured=False, history=0, history_bytes=None, version=0):
+        self.read_only = read_only
+        self.structured = structured
+        self.history = history
+        self.history_bytes = history_bytes
+        self.version = version
+        self._callbacks = []
+
+
+def legacy_table(keys, observed):
+    table = {}
+    index = KeyIndex()
+    for position, key in enumerate(keys):
+        table[key] = LegacyMetaInfo(read_only=bool(position % 2))
+        index.add(key)
+        if position % observed == 0:
+            table[key]._callbacks.append(print)
+    return table, index
+
+
+def columnar_table(keys, observed):
+    table = MetaInfoTable()
+    for position, key in enumerate(keys):
+        meta_info = table.add(key, read_only=bool(position % 2))
+        if position % observed == 0:
+            meta_info.add_callback(print)
+    return table
+
+
+def measure(build, keys, observed):
+    """
+    :return: Bytes allocated by `build` which are still alive after it returns
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    table = build(keys, observed)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del table
+    return after - before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keys', type=int, default=100000, help='number of keys')
+    parser.add_argument('--observed', type=int, default=100, help='one key out of OBSERVED has a callback')
+    parser.add_argument('--max-ratio', type=float, help='fail if table / legacy bytes exceeds this')
+    parser.add_argument('--output', help='write the result as JSON')
+    args = parser.parse_args(argv)
+
+    # keys are allocated beforehand, so both layouts are measured without them
+    keys = ['robot/{}/pose'.format(index) for index in range(args.keys)]
+    legacy = measure(legacy_table, keys, args.observed)
+    table = measure(columnar_table, keys, args.observed)
+    ratio = table / legacy
+
+    print('{} keys, 1 out of {} observed'.format(args.keys, args.observed))
+    print('    legacy MetaInfo objects: {:>12,} bytes ({:.1f} per key)'.format(legacy, legacy / args.keys))
+    print('    MetaInfoTable:           {:>12,} bytes ({:.1f} per key)'.format(table, table / args.keys))
+    print('    ratio:                   {:>12.2f}'.format(ratio))
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            json.dump({'keys': args.keys, 'observed': args.observed, 'legacy_bytes': legacy,
+                       'table_bytes': table, 'ratio': ratio}, outfile, indent=2)
+
+    if args.max_ratio is not None and ratio > args.max_ratio:
+        print('Meta info takes more than {} of the legacy layout'.format(args.max_ratio))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,16 +12,30 @@ from .exception import (
     UnsupportedMemoryType,
     DataException,
     MemoryException,
+    UnsupportedEvictionPolicy,
+    ChangeLogDisabled,
+    ChangeLogTruncated,
     NotCallable,
+    InvalidCallbackOption,
     KeyNotString,
     UnsupportedDataType,
     ExistingKey,
     NotEditable,
     NonExistingKey,
+    NotStructured,
+    NotArray,
+    NotBlob,
+    NonExistingVersion,
+    IndexException,
+    ExistingIndex,
+    NonExistingIndex,
+    UnsupportedIndexKind,
     RedisException,
     RedisWrongConfig,
-    RedisNotConnected
+    RedisNotConnected,
+    RedisCircuitOpen
 )
 
-from .wrapper import SupportedMemoryType
+from .metrics import InMemorySink, PrometheusSink, StatsdSink
+from .wrapper import SupportedMemoryType, register_backend
 from .gblackboard import Blackboard
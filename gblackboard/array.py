@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+import importlib
+import itertools
+import operator
+
+from .exception import UnsupportedDataType
+
+# Target size of a chunk when its shape is not given.
+CHUNK_BYTES = 256 * 1024
+
+# `numpy` is imported when the first array is stored or read; see `import_numpy`.
+numpy = None
+
+
+def import_numpy():
+    global numpy
+    if numpy is None:
+        try:
+            numpy = importlib.import_module('numpy')
+        except ImportError:
+            raise UnsupportedDataType("Chunked arrays need numpy; install it with `pip install numpy`.")
+    return numpy
+
+
+def guess_chunks(shape, itemsize, target=CHUNK_BYTES):
+    """
+    :return: Chunk shape of about `target` bytes, made by halving the largest dimension of `shape`
+    :rtype: tuple
+    """
+    chunks = [max(size, 1) for size in shape]
+    while chunks and _product(chunks) * itemsize > target:
+        axis = max(range(len(chunks)), key=lambda i: chunks[i])
+        if chunks[axis] == 1:
+            break
+        chunks[axis] = (chunks[axis] + 1) // 2
+    return tuple(chunks)
+
+
+def _product(sizes):
+    product = 1
+    for size in sizes:
+        product *= size
+    return product
+
+
+def chunk_name(index):
+    return ','.join(str(i) for i in index)
+
+
+class ArrayLayout(object):
+
+    """
+    Layout of an array which is stored as chunks: the array is cut by a grid of `chunks`-shaped blocks (smaller at
+    the edges), and each block is stored as a part named after its grid index (e.g. '2,0') holding its C-ordered
+    bytes. It is the meta of the Composite header of the array, so the header is read without numpy.
+
+    :param descr: Dtype description of the array, as `numpy.lib.format.dtype_to_descr` gives
+    :param shape: Shape of the array
+    :type shape: tuple
+    :param chunks: Shape of a chunk
+    :type chunks: tuple
+    """
+
+    __slots__ = ('descr', 'shape', 'chunks')
+
+    def __init__(self, descr, shape, chunks):
+        self.descr = descr
+        self.shape = tuple(shape)
+        self.chunks = tuple(chunks)
+
+    def __getstate__(self):
+        return self.descr, self.shape, self.chunks
+
+    def __setstate__(self, state):
+        self.descr, self.shape, self.chunks = state
+
+    def __repr__(self):
+        return '<ArrayLayout(shape={!r}, chunks={!r})>'.format(self.shape, self.chunks)
+
+    @classmethod
+    def of(cls, array, chunks=None):
+        """
+        :param chunks: Chunk shape; None (or True) guesses one of about CHUNK_BYTES.
+        :return: Layout of `array` (numpy.ndarray)
+        """
+        np = import_numpy()
+        if array.dtype.hasobject:
+            raise UnsupportedDataType("Arrays of Python objects cannot be stored as chunks")
+        if chunks is None or chunks is True:
+            chunks = guess_chunks(array.shape, array.dtype.itemsize)
+        chunks = tuple(int(size) for size in chunks)
+        if len(chunks) != array.ndim or any(size < 1 for size in chunks):
+            raise UnsupportedDataType("Chunk shape {!r} does not fit an array of shape {!r}".format(
+                chunks, array.shape))
+        return cls(np.lib.format.dtype_to_descr(array.dtype), array.shape, chunks)
+
+    @property
+    def dtype(self):
+        return import_numpy().lib.format.descr_to_dtype(self.descr)
+
+    def region(self, slices):
+        """
+        Translate a basic numpy index (ints, slices and an Ellipsis) into the bounding box which it reads.
+
+        :return: (lo, hi, local) where [lo, hi) is the box and `box[local]` is the indexed part of it
+        :rtype: tuple
+        """
+        if not isinstance(slices, tuple):
+            slices = (slices,)
+        if any(item is Ellipsis for item in slices):
+            at = slices.index(Ellipsis)
+            fill = (slice(None),) * (len(self.shape) - len(slices) + 1)
+            slices = slices[:at] + fill + slices[at + 1:]
+        if len(slices) > len(self.shape):
+            raise IndexError("Too many indices for an array of shape {!r}".format(self.shape))
+        slices = slices + (slice(None),) * (len(self.shape) - len(slices))
+        lo, hi, local = [], [], []
+        for item, size in zip(slices, self.shape):
+            if isinstance(item, slice):
+                indices = range(*item.indices(size))
+                if indices:
+                    lo.append(min(indices[0], indices[-1]))
+                    hi.append(max(indices[0], indices[-1]) + 1)
+                else:
+                    lo.append(0)
+                    hi.append(0)
+                local.append(slice(None) if indices.step == 1 else slice(None, None, indices.step))
+            else:
+                index = operator.index(item)
+                if not -size <= index < size:
+                    raise IndexError("Index {} is out of bounds for size {}".format(index, size))
+                index %= size
+                lo.append(index)
+                hi.append(index + 1)
+                local.append(0)
+        return tuple(lo), tuple(hi), tuple(local)
+
+    def _blocks(self, lo, hi):
+        """
+        :return: (name, chunk lo, chunk hi) of the chunks which overlap the box [lo, hi)
+        """
+        if any(low >= high for low, high in zip(lo, hi)):
+            return []
+        grid = [range(low // size, (high - 1) // size + 1) for low, high, size in zip(lo, hi, self.chunks)]
+        blocks = []
+        for index in itertools.product(*grid):
+            chunk_lo = tuple(i * size for i, size in zip(index, self.chunks))
+            chunk_hi = tuple(min(low + size, end) for low, size, end in zip(chunk_lo, self.chunks, self.shape))
+            blocks.append((chunk_name(index), chunk_lo, chunk_hi))
+        return blocks
+
+    def names(self, lo=None, hi=None):
+        """
+        :return: Names of the chunks which overlap the box [lo, hi); every chunk by default
+        :rtype: list
+        """
+        if lo is None:
+            lo, hi = (0,) * len(self.shape), self.shape
+        return [name for name, _, _ in self._blocks(lo, hi)]
+
+    def partial(self, lo, hi):
+        """
+        :return: Names of the chunks which overlap the box [lo, hi) but are not covered by it
+        :rtype: list
+        """
+        return [name for name, chunk_lo, chunk_hi in self._blocks(lo, hi)
+                if any(c_lo < low or c_hi > high for c_lo, c_hi, low, high in zip(chunk_lo, chunk_hi, lo, hi))]
+
+    def split(self, array):
+        """
+        :return: Bytes of every chunk of `array` by name
+        :rtype: dict
+        """
+        return {name: array[_box(chunk_lo, chunk_hi)].tobytes()
+                for name, chunk_lo, chunk_hi in self._blocks((0,) * len(self.shape), self.shape)}
+
+    def read(self, lo, hi, parts):
+        """
+        Copy the box [lo, hi) out of the chunks in `parts` into a preallocated array.
+
+        :param parts: Bytes of (at least) the chunks which overlap the box by name
+        :rtype: numpy.ndarray
+        """
+        np = import_numpy()
+        dtype = self.dtype
+        box = np.empty(tuple(high - low for low, high in zip(lo, hi)), dtype)
+        for name, chunk_lo, chunk_hi in self._blocks(lo, hi):
+            chunk = np.frombuffer(parts[name], dtype).reshape(_shape(chunk_lo, chunk_hi))
+            inner_lo = tuple(max(a, b) for a, b in zip(lo, chunk_lo))
+            inner_hi = tuple(min(a, b) for a, b in zip(hi, chunk_hi))
+            box[_box(inner_lo, inner_hi, lo)] = chunk[_box(inner_lo, inner_hi, chunk_lo)]
+        return box
+
+    def write(self, lo, hi, box, parts):
+        """
+        Write `box` over [lo, hi) of the chunks which it overlaps.
+
+        :param box: Values of the box; broadcast to its shape
+        :param parts: Current bytes of the chunks which the box does not cover (see `partial`) by name
+        :return: New bytes of the overlapped chunks by name
+        :rtype: dict
+        """
+        np = import_numpy()
+        dtype = self.dtype
+        box = np.broadcast_to(np.asarray(box, dtype), _shape(lo, hi))
+        written = {}
+        for name, chunk_lo, chunk_hi in self._blocks(lo, hi):
+            inner_lo = tuple(max(a, b) for a, b in zip(lo, chunk_lo))
+            inner_hi = tuple(min(a, b) for a, b in zip(hi, chunk_hi))
+            if name in parts:
+                chunk = np.frombuffer(parts[name], dtype).reshape(_shape(chunk_lo, chunk_hi)).copy()
+                chunk[_box(inner_lo, inner_hi, chunk_lo)] = box[_box(inner_lo, inner_hi, lo)]
+            else:
+                chunk = box[_box(inner_lo, inner_hi, lo)]
+            written[name] = np.ascontiguousarray(chunk).tobytes()
+        return written
+
+
+def _shape(lo, hi):
+    return tuple(high - low for low, high in zip(lo, hi))
+
+
+def _box(lo, hi, origin=None):
+    if origin is None:
+        return tuple(slice(low, high) for low, high in zip(lo, hi))
+    return tuple(slice(low - o, high - o) for low, high, o in zip(lo, hi, origin))
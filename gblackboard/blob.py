@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+from .exception import NonExistingKey
+
+# Size of a chunk of a blob, and number of chunks which a reader fetches at once.
+BLOB_CHUNK_BYTES = 1024 * 1024
+BLOB_READAHEAD = 4
+
+
+class BlobWriter(io.RawIOBase):
+
+    """
+    File-like stream which stores a blob as ordered chunks of `chunk_size` bytes. At most one chunk is buffered;
+    the blob is published under its key when the writer is closed, and discarded if the `with` block fails or the
+    writer is garbage-collected without being closed.
+
+    :param wrapper: Memory wrapper of the blob
+    :type wrapper: gblackboard.wrapper.MemoryWrapper
+    :param on_close: Function which is called with no argument after the blob has been published
+    """
+
+    def __init__(self, wrapper, key, ttl=None, chunk_size=BLOB_CHUNK_BYTES, on_close=None):
+        super(BlobWriter, self).__init__()
+        self._wrapper = wrapper
+        self._key = key
+        self._ttl = ttl
+        self._chunk_size = chunk_size
+        self._on_close = on_close
+        self._buffer = bytearray()
+        self._count = 0
+        self._size = 0
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def size(self):
+        return self._size
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self._size
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("I/O operation on a closed blob writer")
+        view = memoryview(data).cast('B')
+        written = len(view)
+        if self._buffer:
+            take = self._chunk_size - len(self._buffer)
+            self._buffer += view[:take]
+            view = view[take:]
+            if len(self._buffer) == self._chunk_size:
+                self._write_chunk(bytes(self._buffer))
+                self._buffer.clear()
+        # whole chunks of `data` are written without being buffered
+        while len(view) >= self._chunk_size:
+            self._write_chunk(view[:self._chunk_size].tobytes())
+            view = view[self._chunk_size:]
+        self._buffer += view
+        self._size += written
+        return written
+
+    def _write_chunk(self, chunk):
+        self._wrapper._write_chunk(self._key, self._count, chunk)
+        self._count += 1
+
+    def close(self):
+        if self.closed:
+            return
+        if self._buffer:
+            self._write_chunk(bytes(self._buffer))
+            self._buffer.clear()
+        self._wrapper._publish_blob(self._key, (self._size, self._count, self._chunk_size), ttl=self._ttl)
+        super(BlobWriter, self).close()
+        if self._on_close is not None:
+            self._on_close()
+
+    def abort(self):
+        """
+        Discard the written chunks without publishing the blob.
+        """
+        if self.closed:
+            return
+        self._buffer.clear()
+        self._wrapper._drop_blob(self._key)
+        super(BlobWriter, self).close()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def __del__(self):
+        # io.IOBase.__del__ would close, i.e. publish, a writer which has been abandoned halfway
+        try:
+            self.abort()
+        except Exception:
+            pass
+
+
+class BlobReader(io.RawIOBase):
+
+    """
+    File-like stream which reads a blob chunk by chunk; at most `readahead` chunks are held at once.
+
+    :param meta: (size, count, chunk_size) of the blob, from its Composite header
+    :type meta: tuple
+    """
+
+    def __init__(self, wrapper, key, meta, readahead=BLOB_READAHEAD):
+        super(BlobReader, self).__init__()
+        self._wrapper = wrapper
+        self._key = key
+        self._size, self._count, self._chunk_size = meta
+        self._readahead = readahead
+        self._position = 0
+        # chunks [_window_begin, _window_begin + len(_window)) which have been fetched last
+        self._window_begin = 0
+        self._window = []
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def size(self):
+        return self._size
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError("Invalid whence: {}".format(whence))
+        if position < 0:
+            raise ValueError("Negative seek position {}".format(position))
+        self._position = position
+        return position
+
+    def readinto(self, buffer):
+        if self.closed:
+            raise ValueError("I/O operation on a closed blob reader")
+        view = memoryview(buffer).cast('B')
+        filled = 0
+        while filled < len(view) and self._position < self._size:
+            index, offset = divmod(self._position, self._chunk_size)
+            chunk = self._chunk(index)
+            length = min(len(view) - filled, len(chunk) - offset)
+            view[filled:filled + length] = chunk[offset:offset + length]
+            filled += length
+            self._position += length
+        return filled
+
+    def _chunk(self, index):
+        if not self._window_begin <= index < self._window_begin + len(self._window):
+            end = min(index + self._readahead, self._count)
+            self._window = self._wrapper._read_chunks(self._key, index, end)
+            self._window_begin = index
+            if not self._window:
+                raise NonExistingKey("Blob of given `key` has been dropped while it was read")
+        return self._window[index - self._window_begin]
+
+    def close(self):
+        self._window = []
+        super(BlobReader, self).close()
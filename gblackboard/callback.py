@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+from .exception import InvalidCallbackOption, NotCallable
+from .timer import shared_wheel
+
+
+class DeferredCallback(object):
+
+    """
+    Callback which is rate-limited on the shared timer wheel instead of being called on every update.
+    Deferred calls run on the timer thread with the latest value; intermediate values are dropped.
+
+    :param callback: Callable which receives the value
+    :type callback: callable
+    :param debounce: Seconds without updates after which the latest value is delivered. default: None
+    :type debounce: float
+    :param throttle: Minimum seconds between calls. The first update is delivered immediately, and the latest value
+                     of the updates within the interval is delivered at its end. default: None
+    :type throttle: float
+    :param coalesce: Option to deliver the latest value on the next tick of the timer wheel instead of immediately.
+                     default: False
+    :type coalesce: boolean
+    """
+
+    def __init__(self, callback, debounce=None, throttle=None, coalesce=False):
+        if not callable(callback):
+            raise NotCallable('Given `callback` function is not callable.')
+        if debounce is not None and throttle is not None:
+            raise InvalidCallbackOption('`debounce` and `throttle` cannot be used together.')
+        self.callback = callback
+        self._debounce = debounce
+        self._throttle = throttle
+        self._coalesce = coalesce
+        self._wheel = shared_wheel()
+        self._lock = threading.Lock()
+        self._handle = None
+        self._pending = False
+        self._value = None
+        self._last_call = float('-inf')
+
+    def __call__(self, value):
+        with self._lock:
+            self._value = value
+            self._pending = True
+            if self._debounce is not None:
+                if self._handle is not None:
+                    self._wheel.cancel(self._handle)
+                self._handle = self._wheel.schedule(self._debounce, self._fire)
+                return
+            if self._handle is not None:
+                # the latest value goes with the call which is already scheduled
+                return
+            delay = 0.0
+            if self._throttle is not None:
+                delay = self._last_call + self._throttle - time.monotonic()
+            if delay > 0.0 or self._coalesce:
+                self._handle = self._wheel.schedule(delay, self._fire)
+                return
+            self._pending = False
+            self._value = None
+            self._last_call = time.monotonic()
+        self.callback(value)
+
+    def _fire(self):
+        with self._lock:
+            self._handle = None
+            if not self._pending:
+                return
+            value, self._value = self._value, None
+            self._pending = False
+            self._last_call = time.monotonic()
+        self.callback(value)
+
+    def cancel(self):
+        """
+        Drop the pending call, if any.
+        """
+        with self._lock:
+            if self._handle is not None:
+                self._wheel.cancel(self._handle)
+            self._handle = None
+            self._pending = False
+            self._value = None
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import itertools
+import threading
+
+from .exception import ChangeLogTruncated
+
+
+class ChangeLog(object):
+
+    """
+    Ring log of the changes of a memory, which keeps the latest `maxlen` changes. Each change is
+    `(id, operation, key)`; ids are increasing integers.
+
+    :param maxlen: Number of kept changes
+    :type maxlen: int
+    """
+
+    def __init__(self, maxlen):
+        self._entries = collections.deque(maxlen=maxlen)
+        self._next_id = 1
+        # id of the last change delivered to each consumer group
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    @property
+    def maxlen(self):
+        return self._entries.maxlen
+
+    def append(self, operation, key=None):
+        """
+        :return: Id of the change
+        :rtype: int
+        """
+        with self._lock:
+            change_id = self._next_id
+            self._next_id += 1
+            self._entries.append((change_id, operation, key))
+        return change_id
+
+    def read(self, since=None, count=None):
+        """
+        :param since: Id of the last seen change; None reads from the oldest kept change.
+        :type since: int
+        :param count: Maximum number of changes. None reads all of them.
+        :type count: int
+        :return: Changes after `since`, oldest first
+        :rtype: list
+        :raises ChangeLogTruncated: if changes after `since` have already been dropped from the log
+        """
+        with self._lock:
+            return self._read(since, count)
+
+    def read_group(self, group, count=None):
+        """
+        :return: Changes which have not been delivered to `group` yet, oldest first
+        :rtype: list
+        """
+        with self._lock:
+            since = self._groups.get(group)
+            if since is not None and self._entries:
+                # a group which fell behind the log continues from the oldest kept change
+                since = max(since, self._entries[0][0] - 1)
+            changes = self._read(since, count)
+            if changes:
+                self._groups[group] = changes[-1][0]
+            return changes
+
+    def _read(self, since, count):
+        if not self._entries:
+            return []
+        if since is not None and int(since) + 1 < self._entries[0][0]:
+            raise ChangeLogTruncated("Changes after {} have been dropped; the oldest kept change is {}.".format(
+                since, self._entries[0][0]))
+        # ids are consecutive, so the position of `since` is known without a search
+        begin = 0 if since is None else max(int(since) + 1 - self._entries[0][0], 0)
+        end = len(self._entries) if count is None else min(begin + count, len(self._entries))
+        return list(itertools.islice(self._entries, begin, end))
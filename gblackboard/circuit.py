@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+from .timer import shared_wheel
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker(object):
+
+    """
+    Circuit breaker which opens after `threshold` consecutive failures. While it is open, callers fail immediately
+    and a background probe checks the backend every `probe_interval` seconds (half-open); the breaker closes again
+    as soon as a probe succeeds.
+
+    :param probe: Callable which returns True if the backend is healthy
+    :type probe: callable
+    :param threshold: Number of consecutive failures which opens the breaker. default: 5
+    :type threshold: int
+    :param probe_interval: Seconds between probes while the breaker is open. default: 1.0
+    :type probe_interval: float
+    """
+
+    def __init__(self, probe, threshold=5, probe_interval=1.0):
+        self._probe = probe
+        self._threshold = threshold
+        self._probe_interval = probe_interval
+        self._state = CLOSED
+        self._failures = 0
+        self._handle = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        return self._state
+
+    def allow(self):
+        """
+        :return: True if a call may go to the backend
+        :rtype: bool
+        """
+        return self._state == CLOSED
+
+    def success(self):
+        self._failures = 0
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == CLOSED and self._failures >= self._threshold:
+                self._state = OPEN
+                self._handle = shared_wheel().schedule(self._probe_interval, self._start_probe)
+
+    def reset(self):
+        with self._lock:
+            if self._handle is not None:
+                shared_wheel().cancel(self._handle)
+            self._handle = None
+            self._state = CLOSED
+            self._failures = 0
+
+    def _start_probe(self):
+        with self._lock:
+            if self._state != OPEN:
+                return
+            self._state = HALF_OPEN
+            self._handle = None
+        # A probe can block for the connection timeout, so it must not run on the timer thread.
+        threading.Thread(target=self._run_probe, name='gblackboard-probe', daemon=True).start()
+
+    def _run_probe(self):
+        try:
+            healthy = self._probe()
+        except Exception:
+            healthy = False
+        with self._lock:
+            if self._state != HALF_OPEN:
+                # reset meanwhile
+                return
+            if healthy:
+                self._state = CLOSED
+                self._failures = 0
+            else:
+                self._state = OPEN
+                self._handle = shared_wheel().schedule(self._probe_interval, self._start_probe)
@@ -4,6 +4,38 @@ import pickle
 
 from .exception import UnsupportedDataType
 
+# Kinds of composite values
+FIELDS = 'fields'
+ARRAY = 'array'
+BLOB = 'blob'
+
+
+class Composite(object):
+
+    """
+    Header which is stored under the key of a value whose parts (e.g. the fields of a structured value) are stored
+    separately, so that each part can be read and written on its own.
+
+    :param kind: Kind of the value, e.g. FIELDS
+    :type kind: string
+    :param meta: Extra description of the value which the kind needs. default: None
+    """
+
+    __slots__ = ('kind', 'meta')
+
+    def __init__(self, kind, meta=None):
+        self.kind = kind
+        self.meta = meta
+
+    def __getstate__(self):
+        return self.kind, self.meta
+
+    def __setstate__(self, state):
+        self.kind, self.meta = state
+
+    def __repr__(self):
+        return '<Composite(kind={!r})>'.format(self.kind)
+
 
 def reconstruct(value):
     try:
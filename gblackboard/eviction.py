@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import hashlib
+import os
+
+from .exception import UnsupportedEvictionPolicy
+
+
+class LRUPolicy(object):
+
+    """
+    Least-recently-used eviction order.
+    """
+
+    def __init__(self):
+        self._order = collections.OrderedDict()
+
+    def add(self, key):
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def touch(self, key):
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def remove(self, key):
+        self._order.pop(key, None)
+
+    def victims(self):
+        """
+        :return: Keys from the coldest to the hottest
+        :rtype: iterator
+        """
+        return iter(self._order)
+
+    def clear(self):
+        self._order.clear()
+
+
+class LFUPolicy(object):
+
+    """
+    Least-frequently-used eviction order. Keys of the same frequency are evicted in LRU order.
+    """
+
+    def __init__(self):
+        self._freq = {}
+        self._buckets = collections.defaultdict(collections.OrderedDict)
+
+    def add(self, key):
+        if key in self._freq:
+            self.touch(key)
+        else:
+            self._freq[key] = 1
+            self._buckets[1][key] = None
+
+    def touch(self, key):
+        freq = self._freq.get(key)
+        if freq is None:
+            return
+        self._unlink(key, freq)
+        self._freq[key] = freq + 1
+        self._buckets[freq + 1][key] = None
+
+    def remove(self, key):
+        freq = self._freq.pop(key, None)
+        if freq is not None:
+            self._unlink(key, freq)
+
+    def _unlink(self, key, freq):
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+
+    def victims(self):
+        """
+        :return: Keys from the coldest to the hottest
+        :rtype: iterator
+        """
+        for freq in sorted(self._buckets):
+            for key in self._buckets[freq]:
+                yield key
+
+    def clear(self):
+        self._freq.clear()
+        self._buckets.clear()
+
+
+EVICTION_POLICIES = {
+    'lru': LRUPolicy,
+    'lfu': LFUPolicy,
+}
+
+
+def make_policy(name):
+    if name not in EVICTION_POLICIES:
+        raise UnsupportedEvictionPolicy(
+            "Eviction policy should be one of {}: {}".format(sorted(EVICTION_POLICIES), name))
+    return EVICTION_POLICIES[name]()
+
+
+class SpillStore(object):
+
+    """
+    File tier which keeps evicted (serialized) values in a local directory until they are accessed again.
+
+    :param dir_path: Directory for spilled values. It is created if it does not exist.
+    :type dir_path: string
+    """
+
+    def __init__(self, dir_path):
+        self._sha1 = hashlib.sha1
+        if not os.path.exists(dir_path):
+            os.makedirs(dir_path, 0o755)
+        self._dir_path = dir_path
+        self._sizes = {}
+
+    def _file_path(self, key):
+        if type(key) is str:
+            key = key.encode('utf-8')
+        return os.path.join(self._dir_path, self._sha1(key).hexdigest() + '.spill')
+
+    def __contains__(self, key):
+        return key in self._sizes
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def keys(self):
+        return self._sizes.keys()
+
+    @property
+    def nbytes(self):
+        return sum(self._sizes.values())
+
+    def sizeof(self, key):
+        return self._sizes.get(key)
+
+    def put(self, key, data):
+        with open(self._file_path(key), 'wb') as outfile:
+            outfile.write(data)
+        self._sizes[key] = len(data)
+
+    def peek(self, key):
+        with open(self._file_path(key), 'rb') as infile:
+            return infile.read()
+
+    def take(self, key):
+        """
+        :return: Spilled data of `key` which is removed from the file tier, None if `key` is not spilled
+        :rtype: bytes
+        """
+        if key not in self._sizes:
+            return None
+        data = self.peek(key)
+        self.discard(key)
+        return data
+
+    def discard(self, key):
+        if self._sizes.pop(key, None) is not None:
+            os.remove(self._file_path(key))
+
+    def clear(self):
+        for key in list(self._sizes):
+            self.discard(key)
@@ -21,6 +21,10 @@ class NotCallable(BlackboardException):
     pass
 
 
+class InvalidCallbackOption(BlackboardException):
+    pass
+
+
 # about data
 
 class KeyNotString(DataException):
@@ -43,6 +47,52 @@ class NonExistingKey(DataException):
     pass
 
 
+class NotStructured(DataException):
+    pass
+
+
+class NotArray(DataException):
+    pass
+
+
+class NotBlob(DataException):
+    pass
+
+
+class NonExistingVersion(DataException):
+    pass
+
+
+class UnsupportedEvictionPolicy(MemoryException):
+    pass
+
+
+class ChangeLogDisabled(MemoryException):
+    pass
+
+
+class ChangeLogTruncated(MemoryException):
+    pass
+
+
+# about index
+
+class IndexException(BlackboardException):
+    pass
+
+
+class ExistingIndex(IndexException):
+    pass
+
+
+class NonExistingIndex(IndexException):
+    pass
+
+
+class UnsupportedIndexKind(IndexException):
+    pass
+
+
 # about Redis
 
 class RedisException(MemoryException):
@@ -57,6 +107,10 @@ class RedisNotConnected(RedisException):
     pass
 
 
+class RedisCircuitOpen(RedisNotConnected):
+    pass
+
+
 # about save & load file
 
 class FileIOException(BlackboardException):
@@ -1,43 +1,229 @@
 # -*- coding: utf-8 -*-
 
+import collections
+import collections.abc
 import json
 import os
+import sys
+import threading
+import time
 
-from .wrapper import SupportedMemoryType
-from .wrapper import DictionaryWrapper, RedisWrapper
+from .blob import BLOB_CHUNK_BYTES
+from .callback import DeferredCallback
+from .data import load, reconstruct
+from .index import KeyIndex, make_index
+from .metrics import instrumented
+from .wrapper import create_wrapper
 from .exception import (
+    ExistingIndex,
     ExistingKey,
     KeyNotString,
-    UnsupportedMemoryType,
     NotCallable,
     NotEditable,
+    NonExistingIndex,
     NonExistingKey,
+    NonExistingVersion,
     NonExistingDirectory,
-    UnsafeLoading
+    NotStructured,
+    NotArray,
+    NotBlob,
+    UnsafeLoading,
+    UnsupportedDataType,
+    UnsupportedIndexKind,
+    UnsupportedMemoryType
 )
 
 
+# flags of a key in MetaInfoTable
+READ_ONLY = 1
+STRUCTURED = 2
+ARRAY = 4
+BLOB = 8
+
+
 class MetaInfo(object):
 
-    def __init__(self, read_only=False):
-        self.read_only = read_only
-        self._callbacks = []
+    """
+    Meta info of a key: a view of its row in MetaInfoTable, which is created on access and holds no state itself.
+    """
+
+    __slots__ = ('_table', '_key')
+
+    def __init__(self, table, key):
+        self._table = table
+        self._key = key
+
+    @property
+    def read_only(self):
+        return bool(self._table._flags[self._key] & READ_ONLY)
+
+    @property
+    def structured(self):
+        return bool(self._table._flags[self._key] & STRUCTURED)
+
+    @property
+    def array(self):
+        return bool(self._table._flags[self._key] & ARRAY)
+
+    @property
+    def blob(self):
+        return bool(self._table._flags[self._key] & BLOB)
+
+    # number and bytes of the versions kept in the memory, and the latest version
+
+    @property
+    def history(self):
+        versions = self._table._versions.get(self._key)
+        return 0 if versions is None else versions[0]
+
+    @property
+    def history_bytes(self):
+        versions = self._table._versions.get(self._key)
+        return None if versions is None else versions[1]
+
+    @property
+    def version(self):
+        versions = self._table._versions.get(self._key)
+        return 0 if versions is None else versions[2]
+
+    @version.setter
+    def version(self, version):
+        self._table._versions[self._key][2] = version
 
     def add_callback(self, callback):
         if not callable(callback):
             raise NotCallable('Given `callback` function is not callable.')
-        self._callbacks.append(callback)
+        self._table._callbacks.setdefault(self._key, []).append(callback)
+
+    @property
+    def has_callbacks(self):
+        return self._key in self._table._callbacks
 
     def callback(self, value):
-        for cb in self._callbacks:
+        for cb in self._table._callbacks.get(self._key, ()):
             cb(value)
 
     def remove_callback(self, callback):
-        if callback in self._callbacks:
-            self._callbacks.remove(callback)
+        callbacks = self._table._callbacks.get(self._key, [])
+        for cb in callbacks:
+            if cb == callback or (isinstance(cb, DeferredCallback) and cb.callback == callback):
+                if isinstance(cb, DeferredCallback):
+                    cb.cancel()
+                callbacks.remove(cb)
+                break
+        if not callbacks:
+            self._table._callbacks.pop(self._key, None)
 
     def clear_callbacks(self):
-        del self._callbacks[:]
+        self._table._drop_callbacks(self._key)
+
+
+class MetaInfoTable(object):
+
+    """
+    Meta info of every key, stored by column so that a key costs no Python object of its own: the flags of
+    interned keys are small ints in a single dict, and versions and callbacks live in side tables which only have
+    rows for the keys which use them. Keys are also kept in a sorted KeyIndex for prefix queries.
+    """
+
+    def __init__(self):
+        self._flags = {}
+        # key -> [history, history_bytes, version] of the keys which keep versions
+        self._versions = {}
+        # key -> callbacks of the keys which have callbacks
+        self._callbacks = {}
+        self.index = KeyIndex()
+
+    def __len__(self):
+        return len(self._flags)
+
+    def __contains__(self, key):
+        return key in self._flags
+
+    def __iter__(self):
+        return iter(self._flags)
+
+    def __getitem__(self, key):
+        if key not in self._flags:
+            raise KeyError(key)
+        return MetaInfo(self, key)
+
+    def keys(self):
+        return self._flags.keys()
+
+    def items(self):
+        return [(key, MetaInfo(self, key)) for key in list(self._flags)]
+
+    def add(self, key, read_only=False, structured=False, history=0, history_bytes=None, version=0, array=False,
+            blob=False):
+        """
+        :return: Meta info of `key`
+        :rtype: MetaInfo
+        """
+        key = sys.intern(key)
+        self._flags[key] = (READ_ONLY if read_only else 0) | (STRUCTURED if structured else 0) | (
+            ARRAY if array else 0) | (BLOB if blob else 0)
+        if history:
+            self._versions[key] = [history, history_bytes, version]
+        else:
+            self._versions.pop(key, None)
+        self.index.add(key)
+        return MetaInfo(self, key)
+
+    def remove(self, key):
+        """
+        Remove the meta info of `key` and cancel its callbacks.
+
+        :return: True if `key` had meta info else False
+        :rtype: bool
+        """
+        if self._flags.pop(key, None) is None:
+            return False
+        self._versions.pop(key, None)
+        self._drop_callbacks(key)
+        self.index.remove(key)
+        return True
+
+    def clear(self):
+        for key in list(self._callbacks):
+            self._drop_callbacks(key)
+        self._flags.clear()
+        self._versions.clear()
+        self.index.clear()
+
+    def _drop_callbacks(self, key):
+        for cb in self._callbacks.pop(key, ()):
+            if isinstance(cb, DeferredCallback):
+                cb.cancel()
+
+
+class PendingLoad(object):
+
+    """
+    Outcome of a load by `get_or_load`, which the other threads asking for the same key wait for.
+    """
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._value = None
+        self._error = None
+
+    def set_result(self, value):
+        self._value = value
+        self._done.set()
+
+    def set_exception(self, error):
+        self._error = error
+        self._done.set()
+
+    def result(self):
+        """
+        :return: Loaded value; the error of the load is raised instead if it failed
+        """
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
 
 
 class Blackboard(object):
@@ -47,9 +233,25 @@ class Blackboard(object):
 
     operations: set, get, update, drop, clear values and manage callbacks.
 
-    :param memory_type: Choose memory type between supported memory types (Dictionary, Redis)
+    :param memory_type: Choose memory type between supported memory types (Dictionary, Redis, Sharded Redis)
     :type memory_type: gblackboard.wrapper.SupportedMemoryType
-    :param **kwargs: For Redis configuration. (host, port, db_num, flush, timeout and etc) \n
+    :param namespace: Namespace which isolates this blackboard from the other blackboards on the same memory.
+                      Dictionary memory keeps a dictionary and Redis memory keeps a hash per namespace.
+                      default: None (shared default namespace)
+    :param metrics: Metrics sink (InMemorySink, PrometheusSink, StatsdSink or any object with
+                    `observe(operation, phase, seconds)`) which receives operation latencies.
+                    None disables instrumentation. default: None
+    :param **kwargs: For Dictionary configuration. (max_bytes, eviction, spill_dir) \n
+                     max_bytes[integer] | Memory cap in serialized bytes. default: None (unbounded) \n
+                     eviction[string] | Eviction policy over the cap, 'lru' or 'lfu'. default: 'lru' \n
+                     spill_dir[string] | Directory where evicted values are spilled instead of being dropped, and
+                     where chunks of blobs are written. default: None \n
+                     change_log[integer] | Number of the latest changes kept for `changes()`; Redis memories keep
+                     them in a stream. 0 logs no changes. default: 0 (for every memory type) \n
+                     dedup[integer] | Minimum size in bytes of the serialized values which are stored once per
+                     distinct content, with the keys referring to it. 0 disables it. default: 0 (for every memory
+                     type) \n
+                     For Redis configuration. (host, port, db_num, flush, timeout and etc) \n
                      host[string (IP address)] | Redis db host address. default: 'localhost' \n
                      port[integer (0 ~ 65535)] | Redis db port number. default: 6379 \n
                      flush[boolean] | Option to determine whether flush redis db or not after closing this wrapper
@@ -58,102 +260,496 @@ class Blackboard(object):
                      timeout[float >= 0.0] | Timeout for db connection. It would be dangerous if you set timeout as
                      None because the connection attempt between redis client and server can block the whole
                      process. This timeout and socket_timeout option in Redis configuration are same. \n
+                     read_replicas[list] | Redis replicas which serve reads; dicts of host, port and db_num or
+                     'host:port/db_num' strings. default: None \n
+                     read_policy[string] | 'round_robin' or 'latency'. default: 'round_robin' \n
+                     read_your_writes[boolean or 'wait'] | Read own writes from the primary for replica_lag seconds
+                     (True), or WAIT for replicas on every write ('wait'). default: False \n
+                     circuit_breaker[integer] | Number of consecutive connection failures after which calls fail
+                     fast with RedisCircuitOpen until a background probe succeeds. 0 disables it. default: 0 \n
+                     stale_cache[integer] | Number of recent values served by get/has while Redis is unreachable.
+                     default: 0 \n
+                     write_behind[boolean] | Buffer writes locally and write them to Redis in batches from a
+                     background thread; `sync()` and `close()` wait for them. default: False \n
+                     snapshot[string] | Save file format; 'pickle' or 'dump' (DUMP/RESTORE of whole hashes).
+                     default: 'pickle' \n
+                     reap_interval[float] | Seconds between sweeps of expired keys, including the keys of processes
+                     which have exited, once the memory uses expiries. 0 disables them. default: 1.0 \n
                      etc | You can set extra redis parameters by kwargs.
                      (e.g. socket_keepalive, socket_keepalive_options, connection_pool, encoding, charset and etc.)
+                     For Sharded Redis configuration. (nodes, replicas, flush, timeout and etc) \n
+                     nodes[list] | Redis endpoints; dicts of host, port and db_num or 'host:port/db_num' strings \n
+                     replicas[integer] | Number of virtual nodes per Redis node. default: 128 \n
     """
 
-    def __init__(self, memory_type, **kwargs):
+    def __init__(self, memory_type, namespace=None, metrics=None, **kwargs):
 
-        if not SupportedMemoryType.has_value(memory_type):
-            raise UnsupportedMemoryType
-        self._memory_wrapper = None
+        self._metrics = metrics
         self._memory_type = memory_type
-        self._config = {}
-
-        if self._memory_type == SupportedMemoryType.DICTIONARY:
-            self._memory_wrapper = DictionaryWrapper()
-
-        elif self._memory_type == SupportedMemoryType.REDIS:
-            # redis host config
-            if 'host' in kwargs:
-                self._config['host'] = kwargs['host']
-                del kwargs['host']
-            else:
-                self._config['host'] = 'localhost'
-            # redis port config
-            if 'port' in kwargs:
-                self._config['port'] = kwargs['port']
-                del kwargs['port']
-            else:
-                self._config['port'] = 6379
-            # redis db_num config
-            if 'db_num' in kwargs:
-                self._config['db_num'] = kwargs['db_num']
-                del kwargs['db_num']
-            else:
-                self._config['db_num'] = 0
-            # redis flush (on close) config
-            if 'flush' in kwargs:
-                self._config['flush'] = kwargs['flush']
-                del kwargs['flush']
-            else:
-                self._config['flush'] = True
-            # redis timeout config
-            if 'timeout' in kwargs:
-                self._config['timeout'] = kwargs['timeout']
-                del kwargs['timeout']
-                if 'socket_timeout' in kwargs:
-                    del kwargs['socket_timeout']
-            else:
-                self._config['timeout'] = 1.0
-
-            self._memory_wrapper = RedisWrapper(
-                host=self._config['host'],
-                port=self._config['port'],
-                db_num=self._config['db_num'],
-                flush=self._config['flush'],
-                timeout=self._config['timeout'],
-                **kwargs
-            )
-        self._meta_info = {}
+        self._config = dict(kwargs)
+        # raises UnsupportedMemoryType if no backend is registered for `memory_type`
+        self._memory_wrapper = create_wrapper(memory_type, namespace=namespace, **kwargs)
+        self._meta = MetaInfoTable()
+        # keys which the memory has discarded by itself, e.g. from the thread of the expiry timer; they leave the meta
+        # info and the indexes at the next call on blackboard, so that only the threads of its callers change them
+        self._discarded = collections.deque()
+        # secondary indexes by name, and the names of those mirrored in the memory
+        self._indexes = {}
+        self._shared_indexes = set()
+        # PendingLoad of the keys which `get_or_load` is loading in this process
+        self._loading = {}
+        self._loading_lock = threading.Lock()
+        self._memory_wrapper.on_discard = self._on_discard
+        self._memory_wrapper.metrics = metrics
 
     def close(self):
-        del self._meta_info
+        self._memory_wrapper.on_discard = None
+        self._meta_info.clear()
+        del self._meta
         self._memory_wrapper.close()
 
-    def set(self, key, value, read_only=False):
+    @property
+    def _meta_info(self):
+        if self._discarded:
+            self._apply_discards()
+        return self._meta
+
+    @instrumented('set')
+    def set(self, key, value, read_only=False, ttl=None, structured=False, history=0, history_bytes=None,
+            chunks=None):
+        """
+        :param ttl: Seconds after which `key` is dropped from blackboard. None keeps `key` until it is dropped.
+        :type ttl: float
+        :param structured: Option to store a dict-like `value` field by field, so that `update_fields` and
+                           `get_fields` read and write single fields without transferring the whole value.
+        :type structured: bool
+        :param history: Number of the latest versions of `key` (including the current one) which are kept for
+                        `get(key, version=...)` and `history(key)`. 0 keeps no history. default: 0
+        :type history: int
+        :param history_bytes: Upper bound of the serialized bytes of the kept versions; the latest version is kept
+                              anyway. None bounds the history by `history` only. default: None
+        :type history_bytes: int
+        :param chunks: Option to store a numpy array `value` as chunks of this shape, so that `get_slice` and
+                       `update_slice` transfer only the chunks of a slice. True picks a shape of about
+                       gblackboard.array.CHUNK_BYTES. default: None (the array is stored as a whole)
+        :type chunks: tuple or bool
+        """
         if type(key) is not str:
             raise KeyNotString("Blackboard data `key` should be `str` type.")
         if key in self._meta_info:
             raise ExistingKey("Given `key` already exists in blackboard")
+        # attributes are extracted before the write, so that an extractor never fails a stored value
+        attributes = self._extract(value) if self._indexes else None
+        data = None
         try:
-            success = self._memory_wrapper.set(key, value)
+            if structured:
+                if chunks is not None:
+                    raise UnsupportedDataType("Structured data cannot be stored as chunks")
+                success = self._memory_wrapper.set_fields(key, Blackboard._as_fields(value), ttl=ttl)
+            elif chunks is not None:
+                success = self._memory_wrapper.set_array(key, Blackboard._as_array(value), chunks=chunks, ttl=ttl)
+            elif history:
+                # serialized once for both the value and its first version
+                data = reconstruct(value)
+                success = self._memory_wrapper.set_raw(key, data, ttl=ttl)
+            else:
+                success = self._memory_wrapper.set(key, value, ttl=ttl)
         except Exception:
             raise
         if success:
-            self._meta_info[key] = MetaInfo(read_only=read_only)
+            meta_info = self._meta_info.add(key, read_only=read_only, structured=structured, history=history,
+                                            history_bytes=history_bytes, array=chunks is not None)
+            if history:
+                # versions left from a former key of the same name are not versions of this one
+                self._record(key, meta_info, value, data, reset=True)
+            if attributes:
+                self._reindex(key, attributes=attributes)
         return success
 
-    def get(self, key):
+    @staticmethod
+    def _as_fields(value):
+        if not isinstance(value, collections.abc.Mapping):
+            raise UnsupportedDataType("Structured data should be dict-like: {!r}".format(value))
+        if not all(type(name) is str for name in value):
+            raise KeyNotString("Field names of structured data should be `str` type.")
+        return value
+
+    @staticmethod
+    def _as_array(value):
+        if not hasattr(value, '__array_interface__'):
+            raise UnsupportedDataType("Chunked data should be a numpy array: {!r}".format(type(value)))
+        return value
+
+    @instrumented('get')
+    def get(self, key, version=None):
+        """
+        :param version: Version of the value to read (see `history`). None reads the current value.
+        :type version: int
+        """
         if key not in self._meta_info:
             raise NonExistingKey
+        if version is not None:
+            return self._get_version(key, version)
         value = self._memory_wrapper.get(key)
         return value
 
+    @instrumented('get_or_load')
+    def get_or_load(self, key, loader, ttl=None, read_only=False, lease=30.0):
+        """
+        Get `key`, or on a miss call `loader()` and set its value under `key` (with `ttl` and `read_only`).
+        Concurrent misses of `key` call the loader once: in a process, the first caller loads and the others wait
+        for its result (or its exception); across processes sharing a Redis memory, the process which holds the
+        lease of `key` loads and the others wait until it is released, then read the value which it has set.
+
+        :param loader: Function which is called with no argument and returns the value of `key`
+        :param lease: Seconds after which the lease of a loading process expires, e.g. if the process dies; another
+                      process may load `key` as well after it. default: 30.0
+        :type lease: float
+        :return: Value of `key`
+        """
+        if key in self._meta_info:
+            return self.get(key)
+        if type(key) is not str:
+            raise KeyNotString("Blackboard data `key` should be `str` type.")
+        with self._loading_lock:
+            future = self._loading.get(key)
+            loading = future is None
+            if loading:
+                future = self._loading[key] = PendingLoad()
+        if not loading:
+            return future.result()
+        try:
+            value = self._load(key, loader, ttl, read_only, lease)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            with self._loading_lock:
+                del self._loading[key]
+        return value
+
+    def _load(self, key, loader, ttl, read_only, lease):
+        while True:
+            if self._adopt(key, read_only):
+                return self.get(key)
+            token = self._memory_wrapper.acquire_lease(key, lease)
+            if token is not None:
+                break
+            self._memory_wrapper.wait_lease(key, lease)
+        try:
+            # the previous holder of the lease may have set `key` meanwhile
+            if self._adopt(key, read_only):
+                return self.get(key)
+            value = loader()
+            self.set(key, value, read_only=read_only, ttl=ttl)
+            # buffered writes reach the memory before the waiting processes look for them
+            self._memory_wrapper.sync()
+        finally:
+            self._memory_wrapper.release_lease(key, token)
+        return value
+
+    def _adopt(self, key, read_only=False):
+        """
+        Register `key` if another blackboard (e.g. of another process) has set it in the memory.
+
+        :return: True if `key` is in blackboard
+        :rtype: bool
+        """
+        if key in self._meta_info:
+            return True
+        if not self._memory_wrapper.has(key):
+            return False
+        self._meta_info.add(key, read_only=read_only)
+        if self._indexes:
+            self._reindex(key, self._memory_wrapper.get(key))
+        return True
+
+    def _get_version(self, key, version):
+        data = self._memory_wrapper.get_version(key, version)
+        if data is not None:
+            return load(data)
+        raise NonExistingVersion("Version {} of given `key` is not kept in blackboard".format(version))
+
+    @instrumented('history')
+    def history(self, key, since=None):
+        """
+        :param since: Version after which versions are returned. None returns every kept version.
+        :type since: int
+        :return: (version, timestamp, value) of the kept versions of `key`, oldest first. Versions count the writes
+                 of `key` from 1 (`set`).
+        :rtype: list
+        """
+        if key not in self._meta_info:
+            raise NonExistingKey
+        return [(version, timestamp, load(data))
+                for version, timestamp, data in self._memory_wrapper.get_history(key, since)]
+
+    def _record(self, key, meta_info, value, data=None, reset=False):
+        if data is None:
+            data = reconstruct(dict(value) if meta_info.structured else value)
+        meta_info.version += 1
+        self._memory_wrapper.append_history(
+            key, (meta_info.version, time.time(), data), meta_info.history, meta_info.history_bytes, reset)
+
+    @instrumented('set_raw')
+    def set_raw(self, key, data, read_only=False, ttl=None):
+        """
+        Store already serialized (pickled) `data` as it is, e.g. bytes which `get_raw` of another blackboard
+        returned.
+
+        :param data: Serialized value
+        :type data: bytes-like object
+        """
+        self._check_new_key(key)
+        attributes = self._extract(load(data)) if self._indexes else None
+        success = self._memory_wrapper.set_raw(key, Blackboard._as_raw(data), ttl=ttl)
+        if success:
+            self._meta_info.add(key, read_only=read_only)
+            if attributes:
+                self._reindex(key, attributes=attributes)
+        return success
+
+    @instrumented('set_raw_many')
+    def set_raw_many(self, items, read_only=False, ttl=None):
+        """
+        :param items: Serialized values by key
+        :type items: dict
+        """
+        for key, data in items.items():
+            self._check_new_key(key)
+            Blackboard._as_raw(data)
+        attributes = {key: self._extract(load(data)) for key, data in items.items()} if self._indexes else {}
+        success = self._memory_wrapper.set_raw_many(items, ttl=ttl)
+        if success:
+            for key in items:
+                self._meta_info.add(key, read_only=read_only)
+                if key in attributes:
+                    self._reindex(key, attributes=attributes[key])
+        return success
+
+    @instrumented('get_raw')
+    def get_raw(self, key):
+        """
+        :return: Stored (serialized) data of `key` without deserializing it
+        :rtype: memoryview
+        """
+        self._raw_meta_info(key)
+        return self._memory_wrapper.get_raw(key)
+
+    @instrumented('get_raw_many')
+    def get_raw_many(self, keys):
+        """
+        :return: Stored (serialized) data by key
+        :rtype: dict
+        """
+        keys = list(keys)
+        for key in keys:
+            self._raw_meta_info(key)
+        return self._memory_wrapper.get_raw_many(keys)
+
+    @instrumented('update_raw')
+    def update_raw(self, key, data):
+        """
+        Update `key` with already serialized `data`. It is deserialized only if `key` has callbacks or blackboard
+        has indexes.
+        """
+        meta_info = self._raw_meta_info(key)
+        if meta_info.read_only:
+            raise NotEditable("Cannot update read-only data")
+        success = self._memory_wrapper.set_raw(key, Blackboard._as_raw(data))
+        if success and meta_info.history:
+            self._record(key, meta_info, None, bytes(data))
+        if success and (meta_info.has_callbacks or self._indexes):
+            value = load(data)
+            if self._indexes:
+                self._reindex(key, value)
+            self._notify('update', meta_info, value)
+        return success
+
+    def _check_new_key(self, key):
+        if type(key) is not str:
+            raise KeyNotString("Blackboard data `key` should be `str` type.")
+        if key in self._meta_info:
+            raise ExistingKey("Given `key` already exists in blackboard")
+
+    def _raw_meta_info(self, key):
+        if key not in self._meta_info:
+            raise NonExistingKey
+        meta_info = self._meta_info[key]
+        if meta_info.structured or meta_info.array or meta_info.blob:
+            raise UnsupportedDataType("Structured, chunked or blob data cannot be accessed as raw bytes")
+        return meta_info
+
+    @staticmethod
+    def _as_raw(data):
+        if not isinstance(data, (bytes, bytearray, memoryview)):
+            raise UnsupportedDataType("Raw data should be a bytes-like object: {!r}".format(type(data)))
+        return data
+
+    @instrumented('update')
     def update(self, key, value):
         if key not in self._meta_info:
             raise NonExistingKey
         meta_info = self._meta_info[key]
         if meta_info.read_only:
             raise NotEditable("Cannot update read-only data")
+        if meta_info.blob:
+            raise UnsupportedDataType("Blob data is written by `open_writer`; drop it to write it again")
+        attributes = self._extract(value) if self._indexes else None
+        data = None
         try:
-            success = self._memory_wrapper.set(key, value)
+            if meta_info.structured:
+                success = self._memory_wrapper.set_fields(key, Blackboard._as_fields(value))
+            elif meta_info.array:
+                success = self._update_array(key, Blackboard._as_array(value))
+            elif meta_info.history:
+                data = reconstruct(value)
+                success = self._memory_wrapper.set_raw(key, data)
+            else:
+                success = self._memory_wrapper.set(key, value)
         except Exception:
             raise
         if success:
+            if meta_info.history:
+                self._record(key, meta_info, value, data)
+            if attributes:
+                self._reindex(key, attributes=attributes)
+            self._notify('update', meta_info, value)
+        return success
+
+    def _notify(self, operation, meta_info, value):
+        if self._metrics is None:
             meta_info.callback(value)
+        else:
+            started = time.perf_counter()
+            meta_info.callback(value)
+            self._metrics.observe(operation, 'callbacks', time.perf_counter() - started)
+
+    def _structured_meta_info(self, key):
+        if key not in self._meta_info:
+            raise NonExistingKey
+        meta_info = self._meta_info[key]
+        if not meta_info.structured:
+            raise NotStructured("Given `key` is not stored as structured data")
+        return meta_info
+
+    @instrumented('update_fields')
+    def update_fields(self, key, fields):
+        """
+        Update (or add) `fields` of structured data; the other fields are not transferred.
+        Callbacks of `key` receive the dict of the changed fields.
+
+        :param fields: Changed fields
+        :type fields: dict
+        """
+        meta_info = self._structured_meta_info(key)
+        if meta_info.read_only:
+            raise NotEditable("Cannot update read-only data")
+        fields = Blackboard._as_fields(fields)
+        success = self._memory_wrapper.update_fields(key, fields)
+        if success and (self._indexes or meta_info.history):
+            value = self._memory_wrapper.get(key)
+            if meta_info.history:
+                self._record(key, meta_info, value)
+            if self._indexes:
+                self._reindex(key, value)
+        if success:
+            self._notify('update_fields', meta_info, dict(fields))
         return success
 
+    @instrumented('get_fields')
+    def get_fields(self, key, names=None):
+        """
+        :param names: Names of the fields to read; None reads all fields.
+        :type names: list
+        :return: Fields of structured data; missing fields are left out.
+        :rtype: dict
+        """
+        self._structured_meta_info(key)
+        return self._memory_wrapper.get_fields(key, names)
+
+    def _update_array(self, key, value):
+        # the chunk shape of the stored array is kept if it fits the new one
+        chunks = self._memory_wrapper.array_layout(key).chunks
+        if len(chunks) != value.ndim:
+            chunks = None
+        return self._memory_wrapper.set_array(key, value, chunks=chunks)
+
+    def _array_meta_info(self, key):
+        if key not in self._meta_info:
+            raise NonExistingKey
+        meta_info = self._meta_info[key]
+        if not meta_info.array:
+            raise NotArray("Given `key` is not stored as a chunked array")
+        return meta_info
+
+    @instrumented('get_slice')
+    def get_slice(self, key, slices):
+        """
+        Read a part of a chunked array (see `chunks` of `set`); only the chunks which it overlaps are transferred.
+
+        :param slices: Basic numpy index, e.g. `(slice(0, 10), 3)` or `numpy.s_[0:10, 3]`
+        :type slices: tuple
+        :rtype: numpy.ndarray
+        """
+        self._array_meta_info(key)
+        return self._memory_wrapper.get_slice(key, slices)
+
+    @instrumented('update_slice')
+    def update_slice(self, key, slices, value):
+        """
+        Write `value` over a part of a chunked array; only the chunks which it overlaps are transferred.
+        Callbacks of `key` receive `(slices, value)`.
+
+        :param slices: Basic numpy index
+        :type slices: tuple
+        :param value: Values of the part; broadcast to its shape
+        """
+        meta_info = self._array_meta_info(key)
+        if meta_info.read_only:
+            raise NotEditable("Cannot update read-only data")
+        success = self._memory_wrapper.update_slice(key, slices, value)
+        if success and (self._indexes or meta_info.history):
+            array = self._memory_wrapper.get(key)
+            if meta_info.history:
+                self._record(key, meta_info, array)
+            if self._indexes:
+                self._reindex(key, array)
+        if success:
+            self._notify('update_slice', meta_info, (slices, value))
+        return success
+
+    def open_writer(self, key, read_only=False, ttl=None, chunk_size=BLOB_CHUNK_BYTES):
+        """
+        Open a file-like stream which stores a blob under `key` as ordered chunks, for values which are too large to
+        be serialized at once. At most one chunk is buffered. `key` appears in blackboard when the stream is closed;
+        if the `with` block of the stream raises, the written chunks are discarded.
+
+        :param chunk_size: Size of a chunk in bytes. default: gblackboard.blob.BLOB_CHUNK_BYTES (1 MiB)
+        :type chunk_size: int
+        :rtype: gblackboard.blob.BlobWriter
+        """
+        self._check_new_key(key)
+
+        def publish():
+            self._meta_info.add(key, read_only=read_only, blob=True)
+        return self._memory_wrapper.open_writer(key, ttl=ttl, chunk_size=chunk_size, on_close=publish)
+
+    def open_reader(self, key):
+        """
+        Open a seekable file-like stream which reads the blob of `key` a few chunks at a time.
+
+        :rtype: gblackboard.blob.BlobReader
+        """
+        if key not in self._meta_info:
+            raise NonExistingKey
+        if not self._meta_info[key].blob:
+            raise NotBlob("Given `key` is not stored as a blob")
+        return self._memory_wrapper.open_reader(key)
+
+    @instrumented('drop')
     def drop(self, key):
         if key not in self._meta_info:
             raise NonExistingKey
@@ -162,26 +758,315 @@ class Blackboard(object):
         except Exception:
             raise
         if success:
-            meta_info = self._meta_info[key]
-            meta_info.clear_callbacks()
-            del self._meta_info[key]
+            self._meta_info.remove(key)
+            if self._indexes:
+                self._unindex(key)
         return success
 
+    def expire(self, key, ttl):
+        """
+        :param ttl: Seconds after which `key` is dropped from blackboard. None makes `key` persistent.
+        :type ttl: float
+        """
+        if key not in self._meta_info:
+            raise NonExistingKey
+        return self._memory_wrapper.expire(key, ttl)
+
+    def _on_discard(self, keys):
+        self._discarded.extend(keys)
+
+    def _apply_discards(self):
+        while True:
+            try:
+                key = self._discarded.popleft()
+            except IndexError:
+                return
+            if self._meta.remove(key) and self._indexes:
+                self._unindex(key)
+
     def clear(self):
-        keys = self.keys(in_list=True)
-        for key in keys:
-            self.drop(key)
+        """
+        Drop every key in blackboard at once.
+        """
+        self._memory_wrapper.flush()
+        self._meta_info.clear()
+        # flushing the memory drops shared indexes as well
+        for index in self._indexes.values():
+            index.clear()
+
+    def changes(self, since=None, count=None, group=None):
+        """
+        Read the log of changes of the memory (see `change_log`), so that a late joiner catches up with the keys
+        which changed after `since` instead of loading the whole blackboard. Changes made by other blackboards on
+        the same namespace are logged too.
 
-    def keys(self, in_list=False):
+        :param since: Id of the last seen change. None reads from the oldest logged change.
+        :param count: Maximum number of changes. default: None (all)
+        :type count: int
+        :param group: Name of a consumer group. Every change is delivered to a group once; `since` is ignored.
+        :type group: string
+        :return: (id, operation, key) of the changes, oldest first. Operations are 'set', 'delete', 'expire', and
+                 'flush' and 'load' whose key is None.
+        :rtype: list
+        :raises ChangeLogTruncated: if changes after `since` have already been dropped from the log; the caller
+                                    has missed changes and should load the blackboard instead.
+        """
+        return self._memory_wrapper.changes(since, count, group)
+
+    def sync(self):
+        """
+        Wait until every buffered write (see `write_behind` of Redis memory) reaches the memory.
+
+        :return: Number of written keys
+        :rtype: int
+        """
+        return self._memory_wrapper.sync()
+
+    def copy(self, namespace):
+        """
+        Copy the whole blackboard into `namespace` with a single memory operation. Values and read-only flags are
+        copied, but callbacks, indexes, histories and expiry are not.
+
+        :return: Blackboard of `namespace` which is created with the configuration of this blackboard
+        :rtype: gblackboard.Blackboard
+        """
+        self._memory_wrapper.copy_to(namespace)
+        blackboard = Blackboard(self._memory_type, namespace=namespace, metrics=self._metrics, **self._config)
+        for key, meta_info in self._meta_info.items():
+            blackboard._meta_info.add(key, read_only=meta_info.read_only, structured=meta_info.structured,
+                                      array=meta_info.array, blob=meta_info.blob)
+        return blackboard
+
+    def snapshot(self):
+        """
+        Copy the whole blackboard into a new namespace named `<namespace>@<timestamp>`.
+
+        :return: Blackboard of the snapshot namespace
+        :rtype: gblackboard.Blackboard
+        """
+        namespace = '{}@{:.6f}'.format(self._memory_wrapper.namespace or '', time.time())
+        return self.copy(namespace)
+
+    def keys(self, in_list=False, prefix=None, limit=None, cursor=None):
+        """
+        :param prefix: Prefix of the keys to list, e.g. 'robot1.'. Matching keys are returned as a sorted list.
+        :type prefix: string
+        :param limit: Maximum number of keys to list (page size). default: None (all)
+        :type limit: int
+        :param cursor: Last key of the previous page; listing resumes after it. default: None
+        :type cursor: string
+        :return: Keys of blackboard; a sorted list if any of `prefix`, `limit` and `cursor` is given
+        """
+        if prefix is not None or limit is not None or cursor is not None:
+            return self._meta_info.index.keys(prefix or '', limit=limit, cursor=cursor)
         if in_list:
             return list(self._meta_info.keys())
         return self._meta_info.keys()
 
-    def register_callback(self, key, callback):
+    def count(self, prefix=''):
+        """
+        :return: Number of keys which start with `prefix`
+        :rtype: int
+        """
+        return self._meta_info.index.count(prefix)
+
+    @instrumented('get_many')
+    def get_many(self, keys=None, prefix=None):
+        """
+        Get several values with a single memory operation where the memory supports it.
+
+        :param keys: Keys to get
+        :type keys: list
+        :param prefix: Get every key which starts with `prefix` (instead of `keys`)
+        :type prefix: string
+        :return: Values by key
+        :rtype: dict
+        """
+        keys = self._meta_info.index.keys(prefix) if keys is None else list(keys)
+        for key in keys:
+            if key not in self._meta_info:
+                raise NonExistingKey
+        return self._memory_wrapper.get_many(keys)
+
+    @instrumented('drop_prefix')
+    def drop_prefix(self, prefix):
+        """
+        Drop every key which starts with `prefix`, i.e. a subtree of hierarchical keys such as 'robot1.'.
+
+        :return: Number of dropped keys
+        :rtype: int
+        """
+        keys = self._meta_info.index.keys(prefix)
+        if not keys:
+            return 0
+        self._memory_wrapper.delete_many(keys)
+        for key in keys:
+            self._meta_info.remove(key)
+            if self._indexes:
+                self._unindex(key)
+        return len(keys)
+
+    def create_index(self, name, extractor, kind='hash', shared=False):
+        """
+        Index values by an attribute, so that `find` looks keys up without reading and deserializing every value.
+        Current values are indexed at once, and the index follows set, update and drop of keys afterwards.
+
+        :param extractor: Callable which returns the attribute of a value, e.g. `lambda user: user.email`. Values for
+                          which it returns None (or raises AttributeError or KeyError) are not indexed.
+        :type extractor: callable
+        :param kind: 'hash' for lookups by equal attribute or 'sorted' for range lookups as well. default: 'hash'
+        :type kind: string
+        :param shared: Option to keep the index in the memory as well, so that other processes can query it with
+                       `find` (Redis memories only). Attributes of a shared sorted index should be numbers.
+                       default: False
+        :type shared: bool
+        """
+        if name in self._indexes:
+            raise ExistingIndex("Given index `name` already exists in blackboard")
+        index = make_index(kind, extractor)
+        if shared and not self._memory_wrapper.shared_index:
+            raise UnsupportedMemoryType("{} memory does not support shared indexes".format(self._memory_type))
+        self._indexes[name] = index
+        if shared:
+            self._shared_indexes.add(name)
+        self._fill_index(name)
+        return True
+
+    def drop_index(self, name):
+        self._index_of(name)
+        del self._indexes[name]
+        if name in self._shared_indexes:
+            self._shared_indexes.discard(name)
+            self._memory_wrapper.index_drop(name)
+        return True
+
+    @instrumented('find')
+    def find(self, name, value):
+        """
+        :return: Keys whose attribute of index `name` equals `value`
+        :rtype: list
+        """
+        index = self._index_of(name)
+        if name not in self._shared_indexes:
+            return index.find(value)
+        if index.kind == 'sorted':
+            return self._memory_wrapper.index_range(name, value, value)
+        return self._memory_wrapper.index_find(name, value)
+
+    @instrumented('find')
+    def find_range(self, name, low=None, high=None):
+        """
+        :param low: Lower bound of the attribute (inclusive). None is unbounded.
+        :param high: Upper bound of the attribute (inclusive). None is unbounded.
+        :return: Keys whose attribute of the sorted index `name` is between `low` and `high`, in the order of their
+                 attributes
+        :rtype: list
+        """
+        index = self._index_of(name)
+        if index.kind != 'sorted':
+            raise UnsupportedIndexKind("Range lookups need a sorted index: {}".format(name))
+        if name in self._shared_indexes:
+            return self._memory_wrapper.index_range(name, low, high)
+        return index.range(low, high)
+
+    def _index_of(self, name):
+        if self._discarded:
+            self._apply_discards()
+        if name not in self._indexes:
+            raise NonExistingIndex("Given index `name` does not exist in blackboard")
+        return self._indexes[name]
+
+    def _fill_index(self, name):
+        keys = list(self._meta_info)
+        if keys:
+            for key, value in self._memory_wrapper.get_many(keys).items():
+                self._index(name, key, self._extract(value, (name,))[name])
+
+    def _extract(self, value, names=None):
+        """
+        :return: Attribute of `value` by index name (of every index if `names` is None); None for the indexes whose
+                 extractor fails on `value` or which cannot hold its attribute
+        :rtype: dict
+        """
+        attributes = {}
+        for name in self._indexes if names is None else names:
+            index = self._indexes[name]
+            try:
+                attribute = index.extractor(value)
+            except Exception:
+                # e.g. a field extractor on a value of another type
+                attribute = None
+            attributes[name] = attribute if index.admits(attribute) else None
+        return attributes
+
+    def _index(self, name, key, attribute):
+        index = self._indexes[name]
+        old = index.attribute(key)
+        index.add(key, attribute)
+        if name in self._shared_indexes and attribute != old:
+            self._memory_wrapper.index_update(name, index.kind, key, attribute)
+
+    def _reindex(self, key, value=None, attributes=None):
+        """
+        Index `key` by `attributes`, which are extracted from `value` if they are not given.
+        """
+        if attributes is None:
+            attributes = self._extract(value)
+        for name, attribute in attributes.items():
+            self._index(name, key, attribute)
+
+    def _unindex(self, key):
+        for name, index in self._indexes.items():
+            if index.remove(key) is not None and name in self._shared_indexes:
+                self._memory_wrapper.index_update(name, index.kind, key, None)
+
+    def sizeof(self, key):
+        """
+        :return: Serialized size of the value of `key` in bytes
+        :rtype: int
+        """
+        if key not in self._meta_info:
+            raise NonExistingKey
+        return self._memory_wrapper.sizeof(key)
+
+    def stats(self, top=10, memory_usage=False):
+        """
+        Report memory and size accounting of blackboard. Sizes are tracked on every write, so no scan is needed.
+
+        :param top: Number of the largest keys to report in `largest`
+        :type top: int
+        :param memory_usage: Also sample the memory used by Redis with `MEMORY USAGE` (Redis only)
+        :type memory_usage: bool
+        :return: keys, bytes (total serialized bytes), largest ([(key, bytes), ...]), (de)serialization
+                 count & seconds and memory specific counters, such as the number of keys in each bucket of Redis
+                 (buckets) and its `hash-max-listpack-entries` (listpack_entries)
+        :rtype: dict
+        """
+        stats = self._memory_wrapper.stats(top)
+        if memory_usage and hasattr(self._memory_wrapper, 'memory_usage'):
+            stats['memory_usage'] = self._memory_wrapper.memory_usage()
+        return stats
+
+    def register_callback(self, key, callback, debounce=None, throttle=None, coalesce=False):
+        """
+        :param debounce: Seconds without updates after which `callback` receives the latest value. default: None
+        :type debounce: float
+        :param throttle: Minimum seconds between calls of `callback`; updates within the interval are delivered as
+                         their latest value at its end. default: None
+        :type throttle: float
+        :param coalesce: Option to deliver the latest value on the next tick of the shared timer instead of on every
+                         update. default: False
+        :type coalesce: boolean
+
+        Deferred calls run on the shared timer thread (tick: 50 ms). `debounce` and `throttle` are exclusive.
+        """
         if key not in self._meta_info:
             raise NonExistingKey
         meta_info = self._meta_info[key]
-        meta_info.add_callback(callback)
+        if debounce is None and throttle is None and not coalesce:
+            meta_info.add_callback(callback)
+        else:
+            meta_info.add_callback(DeferredCallback(callback, debounce=debounce, throttle=throttle, coalesce=coalesce))
         return id(callback)
 
     def remove_callback(self, key, callback):
@@ -197,6 +1082,7 @@ class Blackboard(object):
         meta_info = self._meta_info[key]
         meta_info.clear_callbacks()
 
+    @instrumented('save')
     def save(self, dir_path='./.gblackboard'):
         if not os.path.exists(dir_path):
             os.mkdir(dir_path, 0o755)
@@ -205,6 +1091,7 @@ class Blackboard(object):
         self._memory_wrapper.save(blackboard_file_path)
         self._save_meta_info(meta_info_file_path)
 
+    @instrumented('load')
     def load(self, dir_path='./.gblackboard', safe=True):
         if self.keys(in_list=True):
             if safe:
@@ -216,14 +1103,21 @@ class Blackboard(object):
             meta_info_file_path = os.path.join(dir_path, '.gblackboard.meta')
             self._memory_wrapper.load(blackboard_file_path)
             self._load_meta_info(meta_info_file_path)
+            for name, index in self._indexes.items():
+                index.clear()
+                if name in self._shared_indexes:
+                    self._memory_wrapper.index_drop(name)
+                self._fill_index(name)
         else:
             raise NonExistingDirectory
 
     def _save_meta_info(self, file_path):
         saved_meta_info = {}
         for key, meta_info in self._meta_info.items():
-            read_only = meta_info.read_only
-            saved_meta_info[key] = read_only
+            saved_meta_info[key] = {'read_only': meta_info.read_only, 'structured': meta_info.structured,
+                                    'history': meta_info.history, 'history_bytes': meta_info.history_bytes,
+                                    'version': meta_info.version, 'array': meta_info.array,
+                                    'blob': meta_info.blob}
         with open(file_path, 'w') as outfile:
             json.dump(saved_meta_info, outfile)
 
@@ -232,8 +1126,12 @@ class Blackboard(object):
             saved_meta_info = json.load(infile)
         if self._meta_info:
             self._meta_info.clear()
-        for key, read_only in saved_meta_info.items():
-            self._meta_info[key] = MetaInfo(read_only=read_only)
+        for key, saved in saved_meta_info.items():
+            if isinstance(saved, dict):
+                self._meta_info.add(key, **saved)
+            else:
+                # saved by gblackboard <= 0.2: read_only only
+                self._meta_info.add(key, read_only=saved)
 
     def print_blackboard(self):
         """
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+import collections
+
+
+class HistoryRing(object):
+
+    """
+    Ring buffer of the versions of a key, oldest first. Each entry is `(version, timestamp, data)` where `data` is
+    the serialized value. The oldest versions are dropped as soon as there are more than `limit` versions or more
+    than `max_bytes` bytes of data; the latest version is always kept.
+    """
+
+    def __init__(self):
+        self._entries = collections.deque()
+        self._sizes = collections.deque()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def append(self, entry, size, limit, max_bytes=None):
+        """
+        :param size: Size of `entry` which counts against `max_bytes`
+        :type size: int
+        :return: Number of kept versions
+        :rtype: int
+        """
+        self._entries.append(entry)
+        self._sizes.append(size)
+        self._bytes += size
+        while len(self._entries) > 1 and (
+                len(self._entries) > limit or (max_bytes is not None and self._bytes > max_bytes)):
+            self._entries.popleft()
+            self._bytes -= self._sizes.popleft()
+        return len(self._entries)
+
+    def entries(self, since=None):
+        """
+        :param since: Version after which entries are returned; None returns every entry.
+        :type since: int
+        :rtype: list
+        """
+        if since is None:
+            return list(self._entries)
+        return [entry for entry in self._entries if entry[0] > since]
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+
+from .exception import NotCallable, UnsupportedIndexKind
+
+# Keys per chunk of KeyIndex; a chunk is split when it holds twice as many.
+KEY_CHUNK = 512
+
+
+def _successor(prefix):
+    """
+    :return: Smallest string which is greater than every string starting with `prefix`, None if there is none
+    :rtype: string
+    """
+    prefix = prefix.rstrip(chr(0x10ffff))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class KeyIndex(object):
+
+    """
+    Sorted index of keys. Keys which share a prefix (e.g. 'robot1.' of 'robot1.pose' and 'robot1.battery') are
+    adjacent, so a prefix query costs O(log n + number of matching keys).
+
+    Keys are kept in sorted chunks of KEY_CHUNK to 2 * KEY_CHUNK keys, with the largest key of each chunk, so adding
+    or removing a key costs O(log n + KEY_CHUNK) instead of shifting every key after it.
+    """
+
+    def __init__(self, keys=()):
+        keys = sorted(set(keys))
+        self._chunks = [keys[begin:begin + KEY_CHUNK] for begin in range(0, len(keys), KEY_CHUNK)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(keys)
+
+    def __len__(self):
+        return self._len
+
+    def __contains__(self, key):
+        index, position = self._seek(key)
+        return index < len(self._chunks) and self._chunks[index][position] == key
+
+    def add(self, key):
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            return
+        index, position = self._seek(key)
+        if index == len(self._chunks):
+            # larger than every key
+            index -= 1
+            self._chunks[index].append(key)
+            self._maxes[index] = key
+        elif self._chunks[index][position] == key:
+            return
+        else:
+            self._chunks[index].insert(position, key)
+        self._len += 1
+        if len(self._chunks[index]) > 2 * KEY_CHUNK:
+            self._split(index)
+
+    def remove(self, key):
+        index, position = self._seek(key)
+        if index == len(self._chunks) or self._chunks[index][position] != key:
+            return
+        chunk = self._chunks[index]
+        del chunk[position]
+        self._len -= 1
+        if not chunk:
+            del self._chunks[index]
+            del self._maxes[index]
+            return
+        self._maxes[index] = chunk[-1]
+        if len(chunk) < KEY_CHUNK // 2 and len(self._chunks) > 1:
+            # merge small chunks, so that the number of chunks stays about n / KEY_CHUNK
+            low = index if index + 1 < len(self._chunks) else index - 1
+            self._chunks[low] += self._chunks.pop(low + 1)
+            del self._maxes[low]
+            if len(self._chunks[low]) > 2 * KEY_CHUNK:
+                self._split(low)
+
+    def _split(self, index):
+        chunk = self._chunks[index]
+        self._chunks.insert(index + 1, chunk[KEY_CHUNK:])
+        del chunk[KEY_CHUNK:]
+        self._maxes.insert(index, chunk[-1])
+
+    def clear(self):
+        del self._chunks[:]
+        del self._maxes[:]
+        self._len = 0
+
+    def _seek(self, key, right=False):
+        """
+        :return: (chunk, position) of the first key which is not less than `key` (greater than `key` if `right`);
+                 (number of chunks, 0) if there is none
+        :rtype: tuple
+        """
+        find = bisect.bisect_right if right else bisect.bisect_left
+        index = find(self._maxes, key)
+        if index == len(self._maxes):
+            return index, 0
+        return index, find(self._chunks[index], key)
+
+    def _range(self, prefix, cursor=None):
+        begin = self._seek(prefix)
+        if cursor is not None:
+            begin = max(begin, self._seek(cursor, right=True))
+        successor = _successor(prefix)
+        if successor is None:
+            return begin, (len(self._chunks), 0)
+        return begin, self._seek(successor)
+
+    def keys(self, prefix='', limit=None, cursor=None):
+        """
+        :param prefix: Prefix of the keys
+        :type prefix: string
+        :param limit: Maximum number of keys. None returns all matching keys.
+        :type limit: int
+        :param cursor: Last key of the previous page; keys after it are returned.
+        :type cursor: string
+        :return: Matching keys in sorted order
+        :rtype: list
+        """
+        (index, position), end = self._range(prefix, cursor)
+        keys = []
+        while (index, position) < end and (limit is None or len(keys) < limit):
+            stop = end[1] if index == end[0] else len(self._chunks[index])
+            if limit is not None:
+                stop = min(stop, position + limit - len(keys))
+            keys.extend(self._chunks[index][position:stop])
+            index, position = index + 1, 0
+        return keys
+
+    def count(self, prefix=''):
+        if not prefix:
+            return self._len
+        (begin, position), (end, end_position) = self._range(prefix)
+        if begin == end:
+            return max(end_position - position, 0)
+        return (len(self._chunks[begin]) - position + sum(len(chunk) for chunk in self._chunks[begin + 1:end]) +
+                end_position)
+
+
+class HashIndex(object):
+
+    """
+    Secondary index which maps an attribute of values to the keys holding it; `find` costs O(1).
+
+    :param extractor: Callable which returns the indexed attribute of a value. Values for which it returns None,
+                      raises an exception or returns an attribute which the index cannot hold (e.g. an unhashable
+                      one) are not indexed.
+    :type extractor: callable
+    """
+
+    kind = 'hash'
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self._attributes = {}
+        self._keys = {}
+
+    def attribute(self, key):
+        return self._attributes.get(key)
+
+    def attributes(self):
+        return set(self._keys)
+
+    def admits(self, attribute):
+        """
+        :return: True if `add` can hold `attribute`
+        :rtype: bool
+        """
+        try:
+            hash(attribute)
+        except TypeError:
+            return False
+        return True
+
+    def add(self, key, attribute):
+        self.remove(key)
+        if attribute is None:
+            return
+        self._attributes[key] = attribute
+        self._keys.setdefault(attribute, set()).add(key)
+
+    def remove(self, key):
+        """
+        :return: Attribute of `key` which was indexed, None if `key` was not indexed
+        """
+        attribute = self._attributes.pop(key, None)
+        if attribute is not None:
+            keys = self._keys[attribute]
+            keys.discard(key)
+            if not keys:
+                del self._keys[attribute]
+        return attribute
+
+    def find(self, value):
+        """
+        :return: Keys whose attribute equals `value`, in sorted order
+        :rtype: list
+        """
+        return sorted(self._keys.get(value, ()))
+
+    def clear(self):
+        self._attributes.clear()
+        self._keys.clear()
+
+
+class SortedIndex(HashIndex):
+
+    """
+    Secondary index which keeps the attributes of values sorted; `find` and `range` cost O(log n + matches).
+    Attributes have to be comparable with each other.
+    """
+
+    kind = 'sorted'
+
+    def __init__(self, extractor):
+        super(SortedIndex, self).__init__(extractor)
+        # (attribute, key) in sorted order, and their attributes alone for range searches
+        self._entries = []
+        self._sorted = []
+
+    def add(self, key, attribute):
+        self.remove(key)
+        if attribute is None:
+            return
+        index = bisect.bisect_left(self._entries, (attribute, key))
+        self._entries.insert(index, (attribute, key))
+        self._sorted.insert(index, attribute)
+        self._attributes[key] = attribute
+
+    def admits(self, attribute):
+        if attribute is None:
+            return True
+        try:
+            # an attribute which does not compare with the held ones fails on its way into `_sorted`
+            bisect.bisect_left(self._sorted, attribute)
+        except TypeError:
+            return False
+        return super(SortedIndex, self).admits(attribute)
+
+    def remove(self, key):
+        attribute = self._attributes.pop(key, None)
+        if attribute is not None:
+            index = bisect.bisect_left(self._entries, (attribute, key))
+            del self._entries[index]
+            del self._sorted[index]
+        return attribute
+
+    def attributes(self):
+        return set(self._sorted)
+
+    def find(self, value):
+        return self.range(value, value)
+
+    def range(self, low=None, high=None):
+        """
+        :return: Keys whose attribute is between `low` and `high` (inclusive; None is unbounded), in the order of
+                 their attributes
+        :rtype: list
+        """
+        begin = 0 if low is None else bisect.bisect_left(self._sorted, low)
+        end = len(self._sorted) if high is None else bisect.bisect_right(self._sorted, high)
+        return [key for _, key in self._entries[begin:end]]
+
+    def clear(self):
+        super(SortedIndex, self).clear()
+        del self._entries[:]
+        del self._sorted[:]
+
+
+INDEX_KINDS = {
+    'hash': HashIndex,
+    'sorted': SortedIndex,
+}
+
+
+def make_index(kind, extractor):
+    if kind not in INDEX_KINDS:
+        raise UnsupportedIndexKind("Index kind should be one of {}: {}".format(sorted(INDEX_KINDS), kind))
+    if not callable(extractor):
+        raise NotCallable('Given `extractor` function is not callable.')
+    return INDEX_KINDS[kind](extractor)
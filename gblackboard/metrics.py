@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import functools
+import random
+import socket
+import threading
+import time
+
+# Upper bounds (in seconds) of latency histogram buckets; from 10 us to 10 s.
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005,
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0,
+)
+
+# Operation of the instrumented method which runs on each thread, under which the memory records its phases.
+_current = threading.local()
+
+
+class Histogram(object):
+
+    """
+    Latency histogram with fixed bucket bounds.
+
+    :param buckets: Sorted upper bounds of buckets in seconds. Values over the last bound go to an overflow bucket.
+    :type buckets: tuple
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """
+        :return: Upper bound of the bucket which holds the `q` quantile (inf for the overflow bucket),
+                 None if nothing has been observed
+        :rtype: float
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': list(zip(self.buckets + (float('inf'),), self.counts)),
+        }
+
+
+class InMemorySink(object):
+
+    """
+    Metrics sink which keeps a latency histogram per (operation, phase) in memory.
+
+    :param buckets: Upper bounds of histogram buckets in seconds
+    :type buckets: tuple
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, operation, phase, seconds):
+        with self._lock:
+            histogram = self._histograms.get((operation, phase))
+            if histogram is None:
+                histogram = self._histograms[(operation, phase)] = Histogram(self._buckets)
+            histogram.observe(seconds)
+
+    def histogram(self, operation, phase='total'):
+        """
+        :return: Histogram of `phase` in `operation`, None if nothing has been observed
+        :rtype: gblackboard.metrics.Histogram
+        """
+        return self._histograms.get((operation, phase))
+
+    def snapshot(self):
+        """
+        :return: {(operation, phase): histogram snapshot}
+        :rtype: dict
+        """
+        with self._lock:
+            return {name: histogram.snapshot() for name, histogram in self._histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+class PrometheusSink(InMemorySink):
+
+    """
+    In-memory sink which renders its histograms in Prometheus text exposition format.
+
+    :param name: Metric name. default: 'gblackboard_operation_seconds'
+    :type name: string
+    """
+
+    def __init__(self, name='gblackboard_operation_seconds', buckets=DEFAULT_BUCKETS):
+        super(PrometheusSink, self).__init__(buckets)
+        self._name = name
+
+    def render(self):
+        """
+        :return: Prometheus text exposition of all histograms
+        :rtype: string
+        """
+        lines = [
+            '# HELP {} Latency of gblackboard operations by phase.'.format(self._name),
+            '# TYPE {} histogram'.format(self._name),
+        ]
+        for (operation, phase), snapshot in sorted(self.snapshot().items()):
+            labels = 'operation="{}",phase="{}"'.format(operation, phase)
+            cumulative = 0
+            for bound, count in snapshot['buckets']:
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('{}_bucket{{{},le="{}"}} {}'.format(self._name, labels, le, cumulative))
+            lines.append('{}_sum{{{}}} {!r}'.format(self._name, labels, snapshot['sum']))
+            lines.append('{}_count{{{}}} {}'.format(self._name, labels, snapshot['count']))
+        return '\n'.join(lines) + '\n'
+
+
+class StatsdSink(object):
+
+    """
+    Metrics sink which sends every observation as a StatsD timer over UDP.
+
+    :param host: StatsD host address. default: 'localhost'
+    :type host: string
+    :param port: StatsD port number. default: 8125
+    :type port: integer
+    :param prefix: Prefix of metric names; a metric is named `<prefix>.<operation>.<phase>`. default: 'gblackboard'
+    :type prefix: string
+    :param sample_rate: Fraction of observations to send (0.0 ~ 1.0). default: 1.0
+    :type sample_rate: float
+    """
+
+    def __init__(self, host='localhost', port=8125, prefix='gblackboard', sample_rate=1.0):
+        self._address = (host, port)
+        self._prefix = prefix
+        self._sample_rate = sample_rate
+        self._random = random.random
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def observe(self, operation, phase, seconds):
+        if self._sample_rate < 1.0:
+            if self._random() > self._sample_rate:
+                return
+            suffix = '|@{}'.format(self._sample_rate)
+        else:
+            suffix = ''
+        payload = '{}.{}.{}:{:.3f}|ms{}'.format(self._prefix, operation, phase, seconds * 1000.0, suffix)
+        try:
+            self._socket.sendto(payload.encode('ascii'), self._address)
+        except OSError:
+            # metrics must never break blackboard operations
+            pass
+
+    def close(self):
+        self._socket.close()
+
+
+def current_operation(default):
+    """
+    :return: Operation of the innermost instrumented method running on this thread, `default` outside of one
+    :rtype: string
+    """
+    return getattr(_current, 'operation', None) or default
+
+
+def instrumented(operation):
+    """
+    Record the total latency of a method as `(operation, 'total')` into `self._metrics`, if it is set.
+    While the method runs, `current_operation` returns `operation`, so that the phases which the memory records
+    (serialize, network, deserialize) are recorded under it too.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            metrics = self._metrics
+            if metrics is None:
+                return func(self, *args, **kwargs)
+            outer = getattr(_current, 'operation', None)
+            _current.operation = operation
+            started = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                metrics.observe(operation, 'total', time.perf_counter() - started)
+                _current.operation = outer
+        return wrapper
+    return decorator
@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+
+import bisect
+import concurrent.futures
+import hashlib
+import heapq
+import operator
+
+from .exception import ChangeLogDisabled, RedisWrongConfig
+from .wrapper import MemoryWrapper, RedisWrapper, parse_node
+
+
+class HashRing(object):
+
+    """
+    Consistent hash ring with virtual nodes. Adding or removing a node only remaps the keys of that node.
+
+    :param replicas: Number of virtual nodes per node. More virtual nodes spread keys more evenly. default: 128
+    :type replicas: int
+    """
+
+    def __init__(self, replicas=128):
+        self._replicas = replicas
+        self._positions = []
+        self._owners = {}
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.md5(value.encode('utf-8')).digest()[:8], 'big')
+
+    def add(self, node):
+        for replica in range(self._replicas):
+            position = HashRing._hash('{}#{}'.format(node, replica))
+            if position not in self._owners:
+                bisect.insort(self._positions, position)
+                self._owners[position] = node
+
+    def remove(self, node):
+        self._positions = [position for position in self._positions if self._owners[position] != node]
+        self._owners = {position: self._owners[position] for position in self._positions}
+
+    def get(self, key):
+        """
+        :return: Node which owns `key`
+        :rtype: string
+        """
+        index = bisect.bisect(self._positions, HashRing._hash(key))
+        if index == len(self._positions):
+            index = 0
+        return self._owners[self._positions[index]]
+
+    @property
+    def nodes(self):
+        return set(self._owners.values())
+
+
+class ShardedRedisWrapper(MemoryWrapper):
+
+    """
+    Redis wrapper which spreads keys over several Redis endpoints (or dbs) with consistent hashing.
+    Each node is served by its own RedisWrapper, and whole-data operations fan out to all nodes in parallel.
+
+    :param nodes: Redis endpoints; dicts of host, port and db_num, or 'host:port/db_num' strings. A dict can also
+                  have 'read_replicas' of the node (see RedisWrapper).
+    :type nodes: list
+    :param replicas: Number of virtual nodes per node on the hash ring. default: 128
+    :type replicas: int
+    :param flush: Option to determine whether flush the blackboard data on every node after closing this wrapper.
+                  default: True
+    :type flush: boolean
+    :param timeout: Timeout for the connection of each node. default: 1.0
+    :type timeout: float
+    :param max_workers: Number of threads for fanning out to nodes. default: number of nodes
+    :type max_workers: int
+    :param **kwargs: You can set extra Redis parameters by kwargs; they are used for every node. With `change_log`,
+                     every node logs its changes into its own stream, in the transaction of each write, and
+                     `changes` merges the streams. With `dedup`, every node
+                     deduplicates the values which it holds.
+
+    :returns: ShardedRedisWrapper object
+    :rtype: gblackboard.sharding.ShardedRedisWrapper
+    """
+
+    shared_index = True
+
+    def __init__(self, nodes, replicas=128, flush=True, timeout=1.0, max_workers=None, **kwargs):
+        if not nodes:
+            raise RedisWrongConfig("At least one Redis node is required.")
+        self._nodes = list(nodes)
+        self._replicas = replicas
+        self._flush = flush
+        self._timeout = timeout
+        self._max_workers = max_workers
+        self._executor = None
+        self._shards = {}
+        super(ShardedRedisWrapper, self).__init__(**kwargs)
+
+    # `on_discard` and `metrics` are handed to every shard.
+
+    @property
+    def on_discard(self):
+        return self._on_discard
+
+    @on_discard.setter
+    def on_discard(self, handler):
+        self._on_discard = handler
+        for shard in self._shards.values():
+            shard.on_discard = handler
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, sink):
+        self._metrics = sink
+        for shard in self._shards.values():
+            shard.metrics = sink
+
+    def setup(self):
+        self._ring = HashRing(self._replicas)
+        for node in self._nodes:
+            self._add_shard(node)
+
+    def _add_shard(self, node):
+        config, name = parse_node(node)
+        shard = RedisWrapper(
+            host=config['host'], port=config['port'], db_num=config['db_num'],
+            flush=self._flush, timeout=self._timeout, namespace=self._namespace,
+            read_replicas=config.get('read_replicas'), change_log=self._change_log, dedup=self._dedup,
+            **self._config)
+        shard.on_discard = self._on_discard
+        shard.metrics = self._metrics
+        self._shards[name] = shard
+        self._ring.add(name)
+        return name, shard
+
+    def _shard(self, key):
+        return self._shards[self._ring.get(key)]
+
+    def _fan_out(self, func, shards=None):
+        shards = list(self._shards.values()) if shards is None else list(shards)
+        if len(shards) == 1:
+            return [func(shards[0])]
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self._max_workers or len(shards), thread_name_prefix='gblackboard-shard')
+        return list(self._executor.map(func, shards))
+
+    @property
+    def nodes(self):
+        return sorted(self._shards)
+
+    def connected(self):
+        return all(self._fan_out(RedisWrapper.connected))
+
+    def close(self):
+        self._fan_out(RedisWrapper.close)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def flush(self):
+        self._fan_out(RedisWrapper.flush)
+
+    def changes(self, since=None, count=None, group=None):
+        """
+        Every node keeps the stream of its own changes, and the streams are merged by stream id. The id of a change
+        is a cursor of the last change read from every node, such as 'node1:6379/0=1700000000000-0,...', so that
+        `since` resumes the stream of each node where it stopped; a node which is not in the cursor is read from
+        its oldest kept change.
+        """
+        if not self._change_log:
+            raise ChangeLogDisabled("Changes are not logged; set `change_log` of the memory.")
+        positions = {}
+        if since:
+            for position in since.split(','):
+                name, _, change_id = position.rpartition('=')
+                if name in self._shards:
+                    positions[name] = change_id
+        names = {shard: name for name, shard in self._shards.items()}
+        if group is None or count is None:
+            replies = self._fan_out(lambda shard: shard.changes(positions.get(names[shard]), count, group))
+        else:
+            # a group receives whatever it reads, so nodes are read in turn until `count` changes are read
+            replies = []
+            for shard in self._shards.values():
+                if sum(len(reply) for reply in replies) < count:
+                    replies.append(shard.changes(None, count - sum(len(reply) for reply in replies), group))
+        streams = [[(tuple(int(part) for part in change_id.split('-')), names[shard], change_id, operation, key)
+                    for change_id, operation, key in reply] for shard, reply in zip(self._shards.values(), replies)]
+        changes = []
+        for _, name, change_id, operation, key in heapq.merge(*streams):
+            if count is not None and len(changes) == count:
+                break
+            positions[name] = change_id
+            cursor = ','.join('{}={}'.format(name, positions[name]) for name in sorted(positions))
+            changes.append((cursor, operation, key))
+        return changes
+
+    def _log_change(self, operation, keys=(None,), pipe=None):
+        self._fan_out(lambda shard: shard._log_change(operation, keys))
+
+    def sync(self):
+        return sum(self._fan_out(RedisWrapper.sync))
+
+    def copy_to(self, namespace):
+        # a key maps to the same node in every namespace
+        return all(self._fan_out(lambda shard: shard.copy_to(namespace)))
+
+    def set(self, key, value, ttl=None):
+        return self._shard(key).set(key, value, ttl=ttl)
+
+    def get(self, key):
+        return self._shard(key).get(key)
+
+    def _write_parts(self, key, header, parts, ttl=None, replace=False):
+        return self._shard(key)._write_parts(key, header, parts, ttl=ttl, replace=replace)
+
+    def _read_parts(self, key, names=None):
+        return self._shard(key)._read_parts(key, names)
+
+    def set_fields(self, key, fields, ttl=None):
+        return self._shard(key).set_fields(key, fields, ttl=ttl)
+
+    def update_fields(self, key, fields):
+        return self._shard(key).update_fields(key, fields)
+
+    def get_fields(self, key, names=None):
+        return self._shard(key).get_fields(key, names)
+
+    def set_array(self, key, array, chunks=None, ttl=None):
+        return self._shard(key).set_array(key, array, chunks=chunks, ttl=ttl)
+
+    def get_slice(self, key, slices):
+        return self._shard(key).get_slice(key, slices)
+
+    def update_slice(self, key, slices, value):
+        return self._shard(key).update_slice(key, slices, value)
+
+    def acquire_lease(self, key, ttl):
+        return self._shard(key).acquire_lease(key, ttl)
+
+    def release_lease(self, key, token):
+        return self._shard(key).release_lease(key, token)
+
+    def wait_lease(self, key, timeout):
+        return self._shard(key).wait_lease(key, timeout)
+
+    # Histories stay on the node of their key; add_node/remove_node move them along with the value.
+
+    def append_history(self, key, entry, limit, max_bytes=None, reset=False):
+        return self._shard(key).append_history(key, entry, limit, max_bytes, reset)
+
+    def get_history(self, key, since=None):
+        return self._shard(key).get_history(key, since)
+
+    def get_version(self, key, version):
+        return self._shard(key).get_version(key, version)
+
+    # Chunks of a blob stay on the node of its key; add_node/remove_node move them along with the header.
+
+    def _write_chunk(self, key, index, data):
+        return self._shard(key)._write_chunk(key, index, data)
+
+    def _read_chunks(self, key, begin, end):
+        return self._shard(key)._read_chunks(key, begin, end)
+
+    def _drop_blob(self, key):
+        return self._shard(key)._drop_blob(key)
+
+    def _blob_keys(self):
+        return [key for keys in self._fan_out(RedisWrapper._blob_keys) for key in keys]
+
+    def set_raw(self, key, data, ttl=None):
+        return self._shard(key).set_raw(key, data, ttl=ttl)
+
+    def get_raw(self, key):
+        return self._shard(key).get_raw(key)
+
+    # A shared index lives on the node of its name. add_node/remove_node do not move it; create it again instead.
+
+    def index_update(self, name, kind, key, attribute):
+        return self._shard(name).index_update(name, kind, key, attribute)
+
+    def index_find(self, name, value):
+        return self._shard(name).index_find(name, value)
+
+    def index_range(self, name, low=None, high=None):
+        return self._shard(name).index_range(name, low, high)
+
+    def index_drop(self, name):
+        return self._shard(name).index_drop(name)
+
+    def _group(self, keys):
+        groups = {}
+        for key in keys:
+            groups.setdefault(self._ring.get(key), []).append(key)
+        return groups
+
+    def set_raw_many(self, items, ttl=None):
+        groups = self._group(items)
+        return all(self._fan_out(
+            lambda name: self._shards[name].set_raw_many({key: items[key] for key in groups[name]}, ttl=ttl),
+            groups))
+
+    def get_raw_many(self, keys):
+        keys = list(keys)
+        groups = self._group(keys)
+        found = {}
+        for data in self._fan_out(lambda name: self._shards[name].get_raw_many(groups[name]), groups):
+            found.update(data)
+        return {key: found[key] for key in keys}
+
+    def delete(self, key):
+        return self._shard(key).delete(key)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        groups = self._group(keys)
+        found = {}
+        for values in self._fan_out(lambda name: self._shards[name].get_many(groups[name]), groups):
+            found.update(values)
+        return {key: found[key] for key in keys}
+
+    def delete_many(self, keys):
+        groups = self._group(keys)
+        return sum(self._fan_out(lambda name: self._shards[name].delete_many(groups[name]), groups))
+
+    def has(self, key):
+        return self._shard(key).has(key)
+
+    def expire(self, key, ttl):
+        return self._shard(key).expire(key, ttl)
+
+    def reap(self, limit=None):
+        return [key for keys in self._fan_out(lambda shard: shard.reap(limit)) for key in keys]
+
+    def _discard_expired(self, key):
+        # every shard reaps its own keys
+        return False
+
+    def sizeof(self, key):
+        return self._shard(key).sizeof(key)
+
+    def stats(self, top=10):
+        shard_stats = self._fan_out(lambda shard: shard.stats(top))
+        stats = {name: sum(s[name] for s in shard_stats)
+                 for name in ('keys', 'bytes', 'serializations', 'serialize_seconds',
+                              'deserializations', 'deserialize_seconds')}
+        stats['largest'] = heapq.nlargest(
+            top, (item for s in shard_stats for item in s['largest']), key=operator.itemgetter(1))
+        # bucket hashes of every node are named alike, so their sizes are reported by node
+        stats['buckets'] = {node: s['buckets'] for node, s in zip(self._shards, shard_stats)}
+        stats['listpack_entries'] = min(s['listpack_entries'] for s in shard_stats)
+        return stats
+
+    def memory_usage(self, samples=5):
+        usages = self._fan_out(lambda shard: shard.memory_usage(samples))
+        if any(usage is None for usage in usages):
+            return None
+        return sum(usages)
+
+    def _get_all(self):
+        """
+        :return: Whole (serialized) data in blackboard
+        :rtype: dict
+        """
+        whole_data = {}
+        for data in self._fan_out(RedisWrapper._get_all):
+            whole_data.update(data)
+        return whole_data
+
+    def _restore(self, kv_pairs):
+        """
+        :param kv_pairs: (serialized) key-value pairs
+        :type: dict
+        :return: True if succeed to store kv_pairs to memory else False
+        :rtype: bool
+        """
+        groups = {name: {} for name in self._shards}
+        for key, val in kv_pairs.items():
+            if type(key) is bytes:
+                key = key.decode('utf-8')
+            groups[self._ring.get(key)][key] = val
+        return all(self._fan_out(lambda name: self._shards[name]._restore(groups[name]), groups))
+
+    def _get_all_parts(self):
+        all_parts = {}
+        for parts in self._fan_out(RedisWrapper._get_all_parts):
+            all_parts.update(parts)
+        return all_parts
+
+    def _restore_parts(self, all_parts):
+        groups = {name: {} for name in self._shards}
+        for key, parts in all_parts.items():
+            groups[self._ring.get(key)][key] = parts
+        return all(self._fan_out(lambda name: self._shards[name]._restore_parts(groups[name]), groups))
+
+    def add_node(self, node):
+        """
+        Add a Redis node and move the keys which it owns from the other nodes.
+
+        :return: Number of moved keys
+        :rtype: int
+        """
+        name, shard = self._add_shard(node)
+        others = [other for other_name, other in self._shards.items() if other_name != name]
+
+        def rebalance(other):
+            return other._move_to(shard, [key for key in other._keys() if self._ring.get(key) == name])
+        return sum(self._fan_out(rebalance, others))
+
+    def remove_node(self, node):
+        """
+        Remove a Redis node and move its keys to the remaining nodes.
+
+        :return: Number of moved keys
+        :rtype: int
+        """
+        _, name = parse_node(node)
+        if len(self._shards) == 1:
+            raise RedisWrongConfig("Cannot remove the last Redis node.")
+        shard = self._shards.pop(name)
+        self._ring.remove(name)
+        groups = {}
+        for key in shard._keys():
+            groups.setdefault(self._ring.get(key), []).append(key)
+        moved = sum(shard._move_to(self._shards[owner], keys) for owner, keys in groups.items())
+        shard.close()
+        return moved
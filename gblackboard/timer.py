@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import logging
+import threading
+import time
+
+
+class TimerWheel(object):
+
+    """
+    Hashed timer wheel which runs scheduled calls on a single background thread.
+
+    Scheduling and cancelling a call are O(1); the background thread only visits
+    the slots whose ticks have passed, so thousands of pending timers (e.g. one
+    per expiring key) cost no more than a handful.
+
+    :param tick: Resolution of the wheel in seconds. default: 0.05
+    :type tick: float
+    :param slots: Number of slots in the wheel. default: 512
+    :type slots: int
+    """
+
+    def __init__(self, tick=0.05, slots=512):
+        self._tick = tick
+        self._slots = [dict() for _ in range(slots)]
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._cursor = self._tick_of(time.monotonic())
+
+    def _tick_of(self, moment):
+        return int(moment / self._tick)
+
+    def schedule(self, delay, func, *args):
+        """
+        Call `func(*args)` on the wheel thread after `delay` seconds.
+
+        :return: Handle which can be passed to `cancel`
+        :rtype: tuple
+        """
+        deadline = time.monotonic() + max(delay, 0.0)
+        tick = self._tick_of(deadline) + 1
+        index = tick % len(self._slots)
+        timer_id = next(self._ids)
+        with self._lock:
+            self._slots[index][timer_id] = (tick, func, args)
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name='gblackboard-timer', daemon=True)
+                self._thread.start()
+        return index, timer_id
+
+    def cancel(self, handle):
+        """
+        :return: True if the call was still pending else False
+        :rtype: bool
+        """
+        index, timer_id = handle
+        with self._lock:
+            return self._slots[index].pop(timer_id, None) is not None
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            for slot in self._slots:
+                slot.clear()
+        self._stop.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self._tick):
+            for func, args in self._advance(self._tick_of(time.monotonic())):
+                try:
+                    func(*args)
+                except Exception:
+                    logging.getLogger(__name__).exception("Scheduled call %r failed", func)
+
+    def _advance(self, now):
+        due = []
+        with self._lock:
+            if now - self._cursor >= len(self._slots):
+                indexes = range(len(self._slots))
+            else:
+                indexes = (t % len(self._slots) for t in range(self._cursor + 1, now + 1))
+            for index in indexes:
+                slot = self._slots[index]
+                expired = [timer_id for timer_id, (tick, _, _) in slot.items() if tick <= now]
+                for timer_id in expired:
+                    _, func, args = slot.pop(timer_id)
+                    due.append((func, args))
+            self._cursor = now
+        return due
+
+
+_shared_wheel = None
+_shared_lock = threading.Lock()
+
+
+def shared_wheel():
+    """
+    :return: Process-wide timer wheel shared by all blackboards
+    :rtype: gblackboard.timer.TimerWheel
+    """
+    global _shared_wheel
+    with _shared_lock:
+        if _shared_wheel is None:
+            _shared_wheel = TimerWheel()
+        return _shared_wheel
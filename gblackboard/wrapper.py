@@ -1,14 +1,74 @@
 # -*- coding: utf-8 -*-
 
 import abc
+import binascii
+import collections
 import enum
+import hashlib
+import heapq
+import importlib
+import logging
+import operator
+import os
 import pickle
-import redis
-
-from .data import reconstruct, load
+import shutil
+import tempfile
+import threading
+import time
+
+from .changes import ChangeLog
+from .circuit import CircuitBreaker
+from .array import ArrayLayout
+from .blob import BlobReader, BlobWriter, BLOB_CHUNK_BYTES, BLOB_READAHEAD
+from .data import reconstruct, load, Composite, FIELDS, ARRAY, BLOB
+from .eviction import make_policy, SpillStore
 from .exception import *
+from .history import HistoryRing
+from .metrics import current_operation
+from .timer import shared_wheel
 
 GBLACKBOARD = 'gblackboard'
+GBLACKBOARD_EXPIRY = 'gblackboard:expiry'
+
+# Fields per HSET command when restoring data into Redis.
+RESTORE_BATCH = 1000
+
+# Expired keys which a periodic sweep of Redis memory removes at most.
+REAP_BATCH = 1000
+
+# Default `hash-max-listpack-entries` of Redis, for servers which do not allow `CONFIG GET`.
+LISTPACK_ENTRIES = 128
+
+# Read-replica routing: seconds for which an unreachable replica is skipped,
+# and every n-th read probes replicas in turn under the 'latency' policy.
+REPLICA_RETRY_INTERVAL = 5.0
+LATENCY_PROBE_INTERVAL = 8
+READ_POLICIES = ('round_robin', 'latency')
+
+# Save file formats of Redis memory: pickled fields, or DUMP payloads of the Redis keys which is marked by
+# a (REDIS_DUMP, ...) header.
+SNAPSHOT_FORMATS = ('pickle', 'dump')
+REDIS_DUMP = 'gblackboard-redis-dump'
+
+# Seconds between the first two polls of a lease which another process holds, and between any two polls at most.
+LEASE_POLL = 0.005
+LEASE_POLL_MAX = 0.1
+
+# Prefix of the reference which Redis memory stores in place of a deduplicated value, followed by its digest.
+# Pickled values start with the pickle protocol opcode, so they never start with it.
+DEDUP_REF = b'\x00gblackboard:ref:'
+
+# `redis` is imported when the first RedisWrapper is built, so that `import gblackboard` stays light for the
+# dictionary memory. Optional dependencies (redis, numpy in `gblackboard.array`, click in `gblackboard.cli`) are
+# imported on first use; the standard library is imported at module level.
+redis = None
+
+
+def import_redis():
+    global redis
+    if redis is None:
+        redis = importlib.import_module('redis')
+    return redis
 
 
 class SupportedMemoryType(enum.Enum):
@@ -19,6 +79,7 @@ class SupportedMemoryType(enum.Enum):
 
     DICTIONARY = 0
     REDIS = 1
+    SHARDED_REDIS = 2
 
     @classmethod
     def has_value(cls, value):
@@ -29,11 +90,44 @@ class MemoryWrapper(object):
 
     """
     Abstract class for DctionaryWrapper and RedisWrapper.
+
+    :param namespace: Namespace which isolates the data of this wrapper from the others. default: None
+    :type namespace: string
+    :param change_log: Number of the latest changes (set, delete, expire, flush and load of keys) which are logged
+                       for `changes`. 0 logs no changes. default: 0
+    :type change_log: int
+    :param dedup: Minimum size in bytes of the (serialized) values which are deduplicated: such a value is stored
+                  once under the digest of its contents, however many keys hold it, and is freed with the last of
+                  them. 0 disables deduplication. Every wrapper of a namespace should use the same value. default: 0
+    :type dedup: int
     """
 
-    def __init__(self, **kwargs):
+    # Whether the memory keeps secondary indexes which other processes can query (index_update, index_find, ...)
+    shared_index = False
+
+    def __init__(self, namespace=None, change_log=0, dedup=0, **kwargs):
+        self._namespace = namespace
+        self._change_log = change_log
+        self._dedup = dedup
+        # local ChangeLog of the memory, if it logs changes in the process
+        self._changes = None
         self._mem = None
         self._config = kwargs
+        self._timers = {}
+        self._lock = threading.RLock()
+        # serialized size of each key written through this wrapper
+        self._sizes = {}
+        self._stored_bytes = 0
+        # sizes of the header (None) and the parts of each composite value
+        self._part_sizes = {}
+        self._serializations = 0
+        self._serialize_time = 0.0
+        self._deserializations = 0
+        self._deserialize_time = 0.0
+        # Callable invoked with a list of keys which the memory discarded by itself (e.g. expired keys).
+        self.on_discard = None
+        # Metrics sink (see gblackboard.metrics) which receives phase latencies; None disables instrumentation.
+        self.metrics = None
         self.setup()
 
     @abc.abstractmethod
@@ -45,13 +139,77 @@ class MemoryWrapper(object):
         self._mem = None
 
     @abc.abstractmethod
-    def set(self, key, value):
+    def set(self, key, value, ttl=None):
+        """
+        :param ttl: Seconds after which `key` expires. None keeps the current expiry of `key`.
+        :type ttl: float
+        """
         return True
 
     @abc.abstractmethod
     def get(self, key):
         return None
 
+    @abc.abstractmethod
+    def set_raw(self, key, data, ttl=None):
+        """
+        Store already serialized `data` as it is.
+
+        :param data: Serialized value
+        :type data: bytes-like object
+        """
+        return True
+
+    @abc.abstractmethod
+    def get_raw(self, key):
+        """
+        :return: Stored (serialized) data of `key` without deserializing it, None if `key` does not exist
+        :rtype: memoryview
+        """
+        return None
+
+    def set_raw_many(self, items, ttl=None):
+        """
+        :param items: Serialized values by key
+        :type items: dict
+        """
+        return all([self.set_raw(key, data, ttl=ttl) for key, data in items.items()])
+
+    def get_raw_many(self, keys):
+        """
+        :return: Stored (serialized) data by key; None for missing keys
+        :rtype: dict
+        """
+        return {key: self.get_raw(key) for key in keys}
+
+    def get_many(self, keys):
+        """
+        :return: Values by key; None for missing keys
+        :rtype: dict
+        """
+        return {key: self.get(key) for key in keys}
+
+    def delete_many(self, keys):
+        """
+        :return: Number of deleted keys
+        :rtype: int
+        """
+        return sum(1 for key in keys if self.delete(key))
+
+    @staticmethod
+    def _frozen(data):
+        # a caller may change its buffer later; keep an immutable copy
+        return data if type(data) is bytes else bytes(data)
+
+    def _digest(self, data):
+        """
+        :return: Digest of the contents of (serialized) `data`, None if `data` is not deduplicated
+        :rtype: string
+        """
+        if not self._dedup or len(data) < self._dedup:
+            return None
+        return hashlib.blake2b(data, digest_size=20).hexdigest()
+
     @abc.abstractmethod
     def delete(self, key):
         return True
@@ -60,6 +218,80 @@ class MemoryWrapper(object):
     def has(self, key):
         return None
 
+    @abc.abstractmethod
+    def expire(self, key, ttl):
+        """
+        :param ttl: Seconds after which `key` expires. None makes `key` persistent.
+        :type ttl: float
+        :return: True if `key` exists else False
+        :rtype: bool
+        """
+        return True
+
+    @abc.abstractmethod
+    def flush(self):
+        """
+        Drop every key in the namespace of this wrapper at once.
+        """
+        pass
+
+    def sync(self):
+        """
+        Write every buffered write through to the memory. Memories which write through immediately have nothing
+        to do.
+
+        :return: Number of written keys
+        :rtype: int
+        """
+        return 0
+
+    # A lease lets one of the processes which share a memory do some work for a key (e.g. load its value) while the
+    # others wait for it. Memories which are local to a process have no other processes to exclude.
+
+    def acquire_lease(self, key, ttl):
+        """
+        :param ttl: Seconds after which the lease expires if it is not released
+        :type ttl: float
+        :return: Token of the lease, None if another process holds the lease of `key`
+        """
+        return True
+
+    def release_lease(self, key, token):
+        """
+        :return: True if the lease was still held with `token` and has been released else False
+        :rtype: bool
+        """
+        return True
+
+    def wait_lease(self, key, timeout):
+        """
+        Block until the lease of `key` is released or expires, or for `timeout` seconds at most.
+        """
+        pass
+
+    @abc.abstractmethod
+    def copy_to(self, namespace):
+        """
+        Copy every (serialized) value in the namespace of this wrapper into `namespace`, replacing its contents.
+        Expiry of keys is not copied.
+
+        :return: True if succeed to copy else False
+        :rtype: bool
+        """
+        return True
+
+    @property
+    def namespace(self):
+        return self._namespace
+
+    @abc.abstractmethod
+    def _discard_expired(self, key):
+        """
+        :return: True if `key` was expired and has been removed else False
+        :rtype: bool
+        """
+        return False
+
     @abc.abstractmethod
     def _get_all(self):
         """
@@ -78,6 +310,396 @@ class MemoryWrapper(object):
         """
         return True
 
+    # A composite value is stored as a Composite header under its key, and its parts are stored separately.
+
+    @abc.abstractmethod
+    def _write_parts(self, key, header, parts, ttl=None, replace=False):
+        """
+        :param header: Composite header which is stored under `key`; None keeps the current header.
+        :type header: gblackboard.data.Composite
+        :param parts: (serialized) parts of the value by name
+        :type parts: dict
+        :param replace: Option to drop the current parts of `key` first
+        :type replace: bool
+        :return: True if succeed to store the parts else False
+        :rtype: bool
+        """
+        return True
+
+    @abc.abstractmethod
+    def _read_parts(self, key, names=None):
+        """
+        :param names: Names of the parts to read; None reads all parts.
+        :type names: list
+        :return: (serialized) parts of `key` by name; missing parts are left out.
+        :rtype: dict
+        """
+        return dict()
+
+    def _get_all_parts(self):
+        """
+        :return: (serialized) parts of every composite value; {key: {name: part}}
+        :rtype: dict
+        """
+        return dict()
+
+    def _restore_parts(self, all_parts):
+        """
+        :param all_parts: (serialized) parts of composite values; {key: {name: part}}
+        :type all_parts: dict
+        """
+        for key, parts in all_parts.items():
+            self._write_parts(key, None, parts)
+        return True
+
+    def _load_native(self, head, infile):
+        """
+        Load a save file in the native format of the memory, if `head` (the first object of the file) marks one.
+
+        :param infile: Save file which is positioned after `head`
+        :return: True if the file has been loaded else False
+        :rtype: bool
+        """
+        return False
+
+    def _resolve(self, key, value):
+        """
+        :return: Value of `key` whose (deserialized) stored value is `value`; composite values are assembled.
+        """
+        if isinstance(value, Composite) and value.kind == FIELDS:
+            return self.get_fields(key)
+        if isinstance(value, Composite) and value.kind == ARRAY:
+            layout = value.meta
+            return layout.read((0,) * len(layout.shape), layout.shape, self._read_parts(key, layout.names()))
+        if isinstance(value, Composite) and value.kind == BLOB:
+            return b''.join(self._read_chunks(key, 0, value.meta[1]))
+        return value
+
+    def set_fields(self, key, fields, ttl=None):
+        """
+        Store a dict-like value field by field, so that its fields can be read and updated one by one.
+
+        :param fields: Value to store
+        :type fields: dict
+        """
+        parts = {name: self._serialize(value) for name, value in fields.items()}
+        return self._write_parts(key, Composite(FIELDS), parts, ttl=ttl, replace=True)
+
+    def update_fields(self, key, fields):
+        """
+        Update (or add) `fields` of the structured value of `key`; the other fields are not touched.
+        """
+        parts = {name: self._serialize(value) for name, value in fields.items()}
+        return self._write_parts(key, None, parts)
+
+    def get_fields(self, key, names=None):
+        """
+        :param names: Names of the fields to read; None reads all fields.
+        :type names: list
+        :return: Fields of the structured value of `key`; missing fields are left out.
+        :rtype: dict
+        """
+        return {name: self._deserialize(data) for name, data in self._read_parts(key, names).items()}
+
+    def set_array(self, key, array, chunks=None, ttl=None):
+        """
+        Store a numpy array as chunks, so that `get_slice` and `update_slice` transfer only the chunks of a slice.
+
+        :param array: Value to store
+        :type array: numpy.ndarray
+        :param chunks: Shape of a chunk; None picks one of about gblackboard.array.CHUNK_BYTES.
+        :type chunks: tuple
+        """
+        layout = ArrayLayout.of(array, chunks)
+        return self._write_parts(key, Composite(ARRAY, layout), layout.split(array), ttl=ttl, replace=True)
+
+    def _header(self, key, kind):
+        """
+        :return: Composite header of `key` if it is a composite value of `kind` else None
+        :rtype: gblackboard.data.Composite
+        """
+        data = self.get_raw(key)
+        header = None if data is None else self._deserialize(data)
+        if isinstance(header, Composite) and header.kind == kind:
+            return header
+        return None
+
+    def array_layout(self, key):
+        """
+        :return: Layout of the array of `key`
+        :rtype: gblackboard.array.ArrayLayout
+        """
+        header = self._header(key, ARRAY)
+        if header is None:
+            raise NotArray("Given `key` is not stored as a chunked array")
+        return header.meta
+
+    def get_slice(self, key, slices):
+        """
+        :param slices: Basic numpy index of the array of `key` (ints, slices and an Ellipsis)
+        :return: Indexed part of the array, read from the chunks which it overlaps only
+        :rtype: numpy.ndarray
+        """
+        layout = self.array_layout(key)
+        lo, hi, local = layout.region(slices)
+        return layout.read(lo, hi, self._read_parts(key, layout.names(lo, hi)))[local]
+
+    def update_slice(self, key, slices, value):
+        """
+        Write `value` over the indexed part of the array of `key`. Only the chunks which it overlaps are written,
+        and only those which it covers partly are read first.
+        """
+        layout = self.array_layout(key)
+        lo, hi, local = layout.region(slices)
+        if all(index == slice(None) for index in local):
+            box = value
+            parts = self._read_parts(key, layout.partial(lo, hi))
+        else:
+            # strided or integer indices: patch the bounding box and write it back
+            parts = self._read_parts(key, layout.names(lo, hi))
+            box = layout.read(lo, hi, parts)
+            box[local] = value
+        return self._write_parts(key, None, layout.write(lo, hi, box, parts))
+
+    # A blob is stored as ordered chunks apart from its key, which holds a Composite header of
+    # (size, count, chunk_size). The header is written after the chunks, so readers never see a partial blob.
+
+    def open_writer(self, key, ttl=None, chunk_size=BLOB_CHUNK_BYTES, on_close=None):
+        """
+        :return: File-like stream which stores a blob under `key` when it is closed
+        :rtype: gblackboard.blob.BlobWriter
+        """
+        return BlobWriter(self, key, ttl=ttl, chunk_size=chunk_size, on_close=on_close)
+
+    def open_reader(self, key, readahead=BLOB_READAHEAD):
+        """
+        :return: File-like stream which reads the blob of `key`
+        :rtype: gblackboard.blob.BlobReader
+        """
+        header = self._header(key, BLOB)
+        if header is None:
+            raise NotBlob("Given `key` is not stored as a blob")
+        return BlobReader(self, key, header.meta, readahead=readahead)
+
+    def _publish_blob(self, key, meta, ttl=None):
+        return self._write_parts(key, Composite(BLOB, meta), {}, ttl=ttl)
+
+    @abc.abstractmethod
+    def _write_chunk(self, key, index, data):
+        """
+        Store chunk `index` of the blob of `key`; chunks are written in order.
+
+        :type data: bytes
+        """
+        return True
+
+    @abc.abstractmethod
+    def _read_chunks(self, key, begin, end):
+        """
+        :return: Chunks [begin, end) of the blob of `key` which exist, in order
+        :rtype: list
+        """
+        return []
+
+    @abc.abstractmethod
+    def _drop_blob(self, key):
+        """
+        Drop the chunks of `key`, e.g. of a blob which has not been published.
+        """
+        return True
+
+    @abc.abstractmethod
+    def _blob_keys(self):
+        """
+        :return: Keys which have chunks
+        :rtype: list
+        """
+        return []
+
+    def _save_blobs(self, outfile):
+        # chunks follow the other data one by one, so neither the memory nor the file holds a whole blob at once
+        for key in self._blob_keys():
+            index = 0
+            while True:
+                chunks = self._read_chunks(key, index, index + BLOB_READAHEAD)
+                for chunk in chunks:
+                    pickle.dump((key, index, chunk), outfile, protocol=pickle.HIGHEST_PROTOCOL)
+                    index += 1
+                if len(chunks) < BLOB_READAHEAD:
+                    break
+
+    def _load_blobs(self, infile):
+        while True:
+            try:
+                key, index, chunk = pickle.load(infile)
+            except EOFError:
+                return
+            self._write_chunk(key, index, chunk)
+
+    def changes(self, since=None, count=None, group=None):
+        """
+        :param since: Id of the last seen change; None reads from the oldest logged change.
+        :param count: Maximum number of changes. default: None (all)
+        :type count: int
+        :param group: Name of a consumer group. Every change is delivered to a group once, regardless of `since`.
+        :type group: string
+        :return: (id, operation, key) of the changes after `since`, oldest first. Operations are 'set', 'delete',
+                 'expire', and 'flush' and 'load' whose key is None.
+        :rtype: list
+        :raises ChangeLogTruncated: if changes after `since` have already been dropped from the log
+        """
+        if self._changes is None:
+            raise ChangeLogDisabled("Changes are not logged; set `change_log` of the memory.")
+        if group is None:
+            return self._changes.read(since, count)
+        return self._changes.read_group(group, count)
+
+    def _log_change(self, operation, keys=(None,), pipe=None):
+        """
+        Log `operation` on `keys`. A memory which logs changes remotely adds them to `pipe` if it is given.
+        """
+        if self._changes is not None:
+            for key in keys:
+                self._changes.append(operation, key)
+
+    # Versions of a key are kept apart from its value, so reading the current value never touches them.
+
+    @abc.abstractmethod
+    def append_history(self, key, entry, limit, max_bytes=None, reset=False):
+        """
+        Append a version to the history of `key`, dropping its oldest versions over `limit` versions or `max_bytes`
+        bytes.
+
+        :param entry: (version, timestamp, serialized value)
+        :type entry: tuple
+        :param reset: Option to drop every kept version first, when `key` has been set anew
+        :type reset: bool
+        :return: True if succeed to append `entry` else False
+        :rtype: bool
+        """
+        return True
+
+    @abc.abstractmethod
+    def get_history(self, key, since=None):
+        """
+        :param since: Version after which entries are returned; None returns every entry.
+        :type since: int
+        :return: (version, timestamp, serialized value) entries of `key`, oldest first
+        :rtype: list
+        """
+        return []
+
+    def get_version(self, key, version):
+        """
+        :param version: Version of `key` to read
+        :type version: int
+        :return: Serialized value of `version` of `key`, or None if it is not kept
+        :rtype: bytes
+        """
+        for entry_version, _, data in self.get_history(key, since=version - 1):
+            if entry_version == version:
+                return data
+        return None
+
+    def _schedule_expiry(self, key, ttl):
+        handle = self._timers.pop(key, None)
+        if handle is not None:
+            shared_wheel().cancel(handle)
+        if ttl is not None:
+            self._timers[key] = shared_wheel().schedule(ttl, self._reap, key)
+
+    def _cancel_expiries(self):
+        wheel = shared_wheel()
+        for handle in self._timers.values():
+            wheel.cancel(handle)
+        self._timers.clear()
+
+    def _reap(self, key):
+        self._timers.pop(key, None)
+        if self._discard_expired(key) and self.on_discard is not None:
+            self.on_discard([key])
+
+    def _serialize(self, value):
+        started = time.perf_counter()
+        data = MemoryWrapper.transform_value_to_pickle(value)
+        elapsed = time.perf_counter() - started
+        self._serialize_time += elapsed
+        self._serializations += 1
+        if self.metrics is not None:
+            self.metrics.observe(current_operation('set'), 'serialize', elapsed)
+        return data
+
+    def _deserialize(self, data):
+        started = time.perf_counter()
+        value = MemoryWrapper.transform_pickle_to_value(data)
+        elapsed = time.perf_counter() - started
+        self._deserialize_time += elapsed
+        self._deserializations += 1
+        if self.metrics is not None:
+            self.metrics.observe(current_operation('get'), 'deserialize', elapsed)
+        return value
+
+    def _observe(self, operation, phase, started):
+        """
+        Record `phase` under the running instrumented operation, or under `operation` outside of one (e.g. on the
+        write-behind thread).
+        """
+        if self.metrics is not None:
+            self.metrics.observe(current_operation(operation), phase, time.perf_counter() - started)
+
+    def _account(self, key, nbytes):
+        with self._lock:
+            self._stored_bytes += nbytes - self._sizes.get(key, 0)
+            self._sizes[key] = nbytes
+
+    def _unaccount(self, key):
+        with self._lock:
+            self._stored_bytes -= self._sizes.pop(key, 0)
+            self._part_sizes.pop(key, None)
+
+    def _account_parts(self, key, header_size, parts, replace=False):
+        self._account_part_sizes(key, header_size, {name: len(data) for name, data in parts.items()}, replace)
+
+    def _account_part_sizes(self, key, header_size, part_sizes, replace=False):
+        with self._lock:
+            sizes = {} if replace else self._part_sizes.get(key) or {None: self._sizes.get(key, 0)}
+            sizes.update(part_sizes)
+            if header_size is not None:
+                sizes[None] = header_size
+            self._part_sizes[key] = sizes
+            self._account(key, sum(sizes.values()))
+
+    def _reset_accounting(self):
+        with self._lock:
+            self._sizes.clear()
+            self._part_sizes.clear()
+            self._stored_bytes = 0
+
+    def sizeof(self, key):
+        """
+        :return: Serialized size of `key` in bytes, None if it is unknown
+        :rtype: int
+        """
+        return self._sizes.get(key)
+
+    def stats(self, top=10):
+        """
+        :param top: Number of the largest keys to report
+        :type top: int
+        :return: Serialized sizes and (de)serialization time which are tracked by this wrapper
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'keys': len(self._sizes),
+                'bytes': self._stored_bytes,
+                'largest': heapq.nlargest(top, self._sizes.items(), key=operator.itemgetter(1)),
+                'serializations': self._serializations,
+                'serialize_seconds': self._serialize_time,
+                'deserializations': self._deserializations,
+                'deserialize_seconds': self._deserialize_time,
+            }
+
     @staticmethod
     def transform_value_to_pickle(value):
         return reconstruct(value)
@@ -88,98 +710,554 @@ class MemoryWrapper(object):
 
     def save(self, file_path):
         whole_data = self._get_all()
+        all_parts = self._get_all_parts()
+        started = time.perf_counter()
         with open(file_path, 'wb') as outfile:
             pickle.dump(whole_data, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+            # parts of composite values follow the data, so files without them are still readable
+            if all_parts:
+                pickle.dump(all_parts, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+            self._save_blobs(outfile)
+        self._observe('save', 'serialize', started)
         return True
 
     def load(self, file_path):
+        started = time.perf_counter()
         with open(file_path, 'rb') as infile:
             read_data = pickle.load(infile)
-        if type(read_data) is not dict:
-            raise ReadWrongFile("File contents must be dictionary data: {}".format(read_data))
-        self._restore(read_data)
+            if self._load_native(read_data, infile):
+                return True
+            try:
+                all_parts = pickle.load(infile)
+            except EOFError:
+                all_parts = {}
+            self._observe('load', 'deserialize', started)
+            if type(read_data) is not dict or type(all_parts) is not dict:
+                raise ReadWrongFile("File contents must be dictionary data: {}".format(read_data))
+            self._restore(read_data)
+            self._restore_parts(all_parts)
+            self._load_blobs(infile)
+        self._log_change('load')
         return True
 
 
 class Dictionary(object):
 
     """
-    Dictionary as shared memory in a process.
+    Dictionary as shared memory in a process. Each namespace has its own dictionary.
     """
 
     __SHARED_MEMORY = {}
-
-    def __init__(self):
-        self._dict = Dictionary.__SHARED_MEMORY
-
-    def set(self, key, value):
+    # parts of composite values; {namespace: {key: {name: part}}}
+    __SHARED_PARTS = {}
+    # versions of keys; {namespace: {key: HistoryRing}}
+    __SHARED_HISTORY = {}
+    # {namespace: ChangeLog}
+    __SHARED_CHANGES = {}
+    # chunks of blobs; {namespace: {key: [chunk]}}. A chunk is bytes, or the path of the file which holds it.
+    __SHARED_BLOBS = {}
+    # deduplicated values; {namespace: {digest: [data, number of keys]}} and {namespace: {key: digest}}
+    __SHARED_CONTENTS = {}
+    __SHARED_DIGESTS = {}
+
+    def __init__(self, namespace=None):
+        self._dict = Dictionary.__SHARED_MEMORY.setdefault(namespace, {})
+        self._parts = Dictionary.__SHARED_PARTS.setdefault(namespace, {})
+        self._history = Dictionary.__SHARED_HISTORY.setdefault(namespace, {})
+        self._blobs = Dictionary.__SHARED_BLOBS.setdefault(namespace, {})
+        self._contents = Dictionary.__SHARED_CONTENTS.setdefault(namespace, {})
+        self._digests = Dictionary.__SHARED_DIGESTS.setdefault(namespace, {})
+        self._namespace = namespace
+
+    def set(self, key, value, digest=None):
+        """
+        :param digest: Digest of `value`; keys with the same digest share a single copy of the value.
+        """
+        self._release(key)
+        if digest is not None:
+            content = self._contents.get(digest)
+            if content is None:
+                content = self._contents[digest] = [value, 0]
+            content[1] += 1
+            self._digests[key] = digest
+            value = content[0]
         self._dict[key] = value
+        self._parts.pop(key, None)
         return True
 
+    def shared_size(self, key):
+        """
+        :return: Size of the value of `key` if other keys share its contents, else 0
+        :rtype: int
+        """
+        digest = self._digests.get(key)
+        if digest is None:
+            return 0
+        value, count = self._contents[digest]
+        return len(value) if count > 1 else 0
+
+    def _release(self, key):
+        digest = self._digests.pop(key, None)
+        if digest is not None:
+            content = self._contents[digest]
+            content[1] -= 1
+            if not content[1]:
+                del self._contents[digest]
+
+    def set_parts(self, key, parts, replace=False):
+        if replace or key not in self._parts:
+            self._parts[key] = dict(parts)
+        else:
+            self._parts[key].update(parts)
+
+    def get_parts(self, key, names=None):
+        parts = self._parts.get(key, {})
+        if names is None:
+            return dict(parts)
+        return {name: parts[name] for name in names if name in parts}
+
     def get(self, key):
         if key in self._dict:
             return self._dict[key]
         else:
             return None
 
+    def change_log(self, maxlen):
+        """
+        :return: ChangeLog of the namespace, which is created with `maxlen` by its first user
+        :rtype: gblackboard.changes.ChangeLog
+        """
+        return Dictionary.__SHARED_CHANGES.setdefault(self._namespace, ChangeLog(maxlen))
+
+    def drop_change_log(self):
+        Dictionary.__SHARED_CHANGES.pop(self._namespace, None)
+
+    def append_history(self, key, entry, limit, max_bytes=None, reset=False):
+        ring = self._history.get(key)
+        if ring is None or reset:
+            ring = self._history[key] = HistoryRing()
+        ring.append(entry, len(entry[2]), limit, max_bytes)
+
+    def get_history(self, key, since=None):
+        ring = self._history.get(key)
+        return [] if ring is None else ring.entries(since)
+
+    def set_chunk(self, key, index, chunk):
+        chunks = self._blobs.setdefault(key, [])
+        if index < len(chunks):
+            Dictionary._remove_chunk(chunks[index])
+            chunks[index] = chunk
+        else:
+            chunks.append(chunk)
+
+    def get_chunks(self, key, begin, end):
+        return [Dictionary._read_chunk(chunk) for chunk in self._blobs.get(key, [])[begin:end]]
+
+    @staticmethod
+    def _read_chunk(chunk):
+        if isinstance(chunk, str):
+            with open(chunk, 'rb') as infile:
+                return infile.read()
+        return chunk
+
+    @staticmethod
+    def _remove_chunk(chunk):
+        if isinstance(chunk, str) and os.path.exists(chunk):
+            os.remove(chunk)
+
+    def delete_blob(self, key):
+        for chunk in self._blobs.pop(key, ()):
+            Dictionary._remove_chunk(chunk)
+
+    def blob_keys(self):
+        return list(self._blobs)
+
     def keys(self):
         return self._dict.keys()
 
-    def delete(self, key):
-        del self._dict[key]
+    def delete(self, key, parts=True):
+        self._dict.pop(key, None)
+        self._release(key)
+        if parts:
+            self._parts.pop(key, None)
+            self._history.pop(key, None)
+            self.delete_blob(key)
 
     def exists(self, key):
         return key in self._dict
 
     def flush(self):
         self._dict.clear()
+        self._parts.clear()
+        self._history.clear()
+        self._contents.clear()
+        self._digests.clear()
+        for key in list(self._blobs):
+            self.delete_blob(key)
+
+    def copy_to(self, namespace):
+        target = Dictionary.__SHARED_MEMORY.setdefault(namespace, {})
+        if target is not self._dict:
+            target.clear()
+            target.update(self._dict)
+            target_parts = Dictionary.__SHARED_PARTS.setdefault(namespace, {})
+            target_parts.clear()
+            target_parts.update((key, dict(parts)) for key, parts in self._parts.items())
+            target_contents = Dictionary.__SHARED_CONTENTS.setdefault(namespace, {})
+            target_contents.clear()
+            target_contents.update((digest, list(content)) for digest, content in self._contents.items())
+            target_digests = Dictionary.__SHARED_DIGESTS.setdefault(namespace, {})
+            target_digests.clear()
+            target_digests.update(self._digests)
+            target_blobs = Dictionary.__SHARED_BLOBS.setdefault(namespace, {})
+            for key in list(target_blobs):
+                for chunk in target_blobs.pop(key):
+                    Dictionary._remove_chunk(chunk)
+            for key, chunks in self._blobs.items():
+                target_blobs[key] = [Dictionary._copy_chunk(chunk) for chunk in chunks]
+
+    @staticmethod
+    def _copy_chunk(chunk):
+        if not isinstance(chunk, str):
+            return chunk
+        fd, path = tempfile.mkstemp(suffix='.chunk', dir=os.path.dirname(chunk))
+        os.close(fd)
+        shutil.copyfile(chunk, path)
+        return path
 
     @property
     def all(self):
         return self._dict
 
+    @property
+    def all_parts(self):
+        return self._parts
+
 
 class DictionaryWrapper(MemoryWrapper):
 
     """
     Dictionary class wrapper class. This is used for using Dictionary as a memory.
+
+    :param max_bytes: Memory cap in serialized bytes. Cold values are evicted when the stored values exceed it.
+                      None means unbounded. default: None
+    :type max_bytes: int
+    :param eviction: Eviction policy, 'lru' (least recently used) or 'lfu' (least frequently used). default: 'lru'
+    :type eviction: string
+    :param spill_dir: Directory for spilling evicted values to local files. Spilled values are reloaded when they
+                      are accessed again. If it is None, evicted values are dropped. Chunks of blobs are written
+                      there as well instead of being kept in memory, with or without `max_bytes`. default: None
+    :type spill_dir: string
+
+    :returns: DictionaryWrapper object
+    :rtype: gblackboard.wrapper.DictionaryWrapper
     """
 
+    def __init__(self, max_bytes=None, eviction='lru', spill_dir=None, **kwargs):
+        self._max_bytes = max_bytes
+        self._policy = make_policy(eviction) if max_bytes is not None else None
+        self._spill = SpillStore(spill_dir) if max_bytes is not None and spill_dir else None
+        self._blob_dir = spill_dir or None
+        if self._blob_dir is not None and not os.path.exists(self._blob_dir):
+            os.makedirs(self._blob_dir, 0o755)
+        self._evictions = 0
+        self._spills = 0
+        self._reloads = 0
+        super(DictionaryWrapper, self).__init__(**kwargs)
+
+    @property
+    def bounded(self):
+        return self._max_bytes is not None
+
     def setup(self):
-        self._mem = Dictionary()
+        self._mem = Dictionary(self._namespace)
+        self._deadlines = {}
+        if self._change_log:
+            self._changes = self._mem.change_log(self._change_log)
 
     def close(self):
+        self.flush()
+        if self._changes is not None:
+            self._mem.drop_change_log()
+            self._changes = None
+
+    def flush(self):
+        self._cancel_expiries()
+        self._deadlines.clear()
         self._mem.flush()
+        self._reset_accounting()
+        if self.bounded:
+            self._reset_bound()
+        self._log_change('flush')
+
+    def copy_to(self, namespace):
+        self._mem.copy_to(namespace)
+        if self._spill is not None:
+            # spilled values have to be copied too
+            with self._lock:
+                target = Dictionary(namespace).all
+                for key in self._spill.keys():
+                    target[key] = self._spill.peek(key)
+        return True
 
-    def set(self, key, value):
-        data = MemoryWrapper.transform_value_to_pickle(value)
-        self._mem.set(key, data)
+    def set(self, key, value, ttl=None):
+        return self.set_raw(key, self._serialize(value), ttl=ttl)
+
+    def set_raw(self, key, data, ttl=None):
+        data = MemoryWrapper._frozen(data)
+        if self.bounded:
+            with self._lock:
+                self._admit(key, data)
+        else:
+            self._store(key, data)
+            self._account(key, len(data))
+        self._log_change('set', (key,))
+        if ttl is not None:
+            self._deadlines[key] = time.monotonic() + ttl
+            self._schedule_expiry(key, ttl)
         return True
 
     def get(self, key):
-        data = self._mem.get(key)
+        data = self._fetch(key)
         if data:
-            value = MemoryWrapper.transform_pickle_to_value(data)
+            value = self._resolve(key, self._deserialize(data))
         else:
             value = None
         return value
 
+    def get_raw(self, key):
+        data = self._fetch(key)
+        return None if data is None else memoryview(data)
+
+    def _fetch(self, key):
+        data = self._mem.get(key)
+        if self.bounded:
+            with self._lock:
+                if data is None:
+                    data = self._reload(key)
+                else:
+                    self._policy.touch(key)
+        return data
+
+    def _write_parts(self, key, header, parts, ttl=None, replace=False):
+        header_data = None if header is None else self._serialize(header)
+        with self._lock:
+            if header_data is not None:
+                self._store(key, header_data, dedup=False)
+                if self._spill is not None:
+                    self._spill.discard(key)
+            if self.bounded:
+                # composite values are kept in memory; they are never evicted nor spilled
+                self._policy.remove(key)
+            self._mem.set_parts(key, parts, replace=replace)
+            self._account_parts(key, None if header_data is None else len(header_data), parts, replace)
+            if self.bounded:
+                self._evict(keep=key)
+        self._log_change('set', (key,))
+        if ttl is not None:
+            self._deadlines[key] = time.monotonic() + ttl
+            self._schedule_expiry(key, ttl)
+        return True
+
+    def _read_parts(self, key, names=None):
+        return self._mem.get_parts(key, names)
+
+    def append_history(self, key, entry, limit, max_bytes=None, reset=False):
+        with self._lock:
+            self._mem.append_history(
+                key, (entry[0], entry[1], MemoryWrapper._frozen(entry[2])), limit, max_bytes, reset)
+        return True
+
+    def get_history(self, key, since=None):
+        return self._mem.get_history(key, since)
+
+    def _get_all_parts(self):
+        return self._mem.all_parts
+
+    def _write_chunk(self, key, index, data):
+        if self._blob_dir is None:
+            with self._lock:
+                self._mem.set_chunk(key, index, data)
+            self._account_parts(key, None, {str(index): data})
+            return True
+        fd, path = tempfile.mkstemp(suffix='.chunk', dir=self._blob_dir)
+        with os.fdopen(fd, 'wb') as outfile:
+            outfile.write(data)
+        # chunks in files are not counted against `max_bytes`
+        with self._lock:
+            self._mem.set_chunk(key, index, path)
+        return True
+
+    def _read_chunks(self, key, begin, end):
+        return self._mem.get_chunks(key, begin, end)
+
+    def _drop_blob(self, key):
+        with self._lock:
+            self._mem.delete_blob(key)
+        self._unaccount(key)
+        return True
+
+    def _blob_keys(self):
+        return self._mem.blob_keys()
+
     def delete(self, key):
-        if key in self._mem.keys():
-            self._mem.delete(key)
+        if self.bounded:
+            with self._lock:
+                if not self.has(key):
+                    return False
+                self._forget(key)
+        elif key in self._mem.keys():
+            self._remove(key)
+            self._unaccount(key)
         else:
             return False
+        if self._deadlines.pop(key, None) is not None:
+            self._schedule_expiry(key, None)
+        self._log_change('delete', (key,))
         return True
 
     def has(self, key):
+        if self._spill is not None and key in self._spill:
+            return True
         return self._mem.exists(key)
 
+    def expire(self, key, ttl):
+        if not self.has(key):
+            return False
+        if ttl is None:
+            self._deadlines.pop(key, None)
+        else:
+            self._deadlines[key] = time.monotonic() + ttl
+        self._schedule_expiry(key, ttl)
+        return True
+
+    def _discard_expired(self, key):
+        deadline = self._deadlines.get(key)
+        if deadline is None or deadline > time.monotonic():
+            return False
+        del self._deadlines[key]
+        if self.bounded:
+            with self._lock:
+                self._forget(key)
+        else:
+            self._remove(key)
+            self._unaccount(key)
+        self._log_change('expire', (key,))
+        return True
+
+    def sizeof(self, key):
+        """
+        :return: Serialized size of `key` in bytes (including a spilled value), None if it is unknown
+        :rtype: int
+        """
+        size = self._sizes.get(key)
+        if size is None and self._spill is not None:
+            size = self._spill.sizeof(key)
+        return size
+
+    def stats(self, top=10):
+        stats = super(DictionaryWrapper, self).stats(top)
+        if self.bounded:
+            stats.update(self.eviction_stats)
+        return stats
+
+    @property
+    def eviction_stats(self):
+        """
+        :return: Memory usage and eviction counters of this wrapper
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                'max_bytes': self._max_bytes,
+                'used_bytes': self._stored_bytes,
+                'keys': len(self._sizes),
+                'evictions': self._evictions,
+                'spills': self._spills,
+                'reloads': self._reloads,
+                'spilled_keys': len(self._spill) if self._spill is not None else 0,
+                'spilled_bytes': self._spill.nbytes if self._spill is not None else 0,
+            }
+
+    # Keys which share deduplicated contents are accounted in full, less the shared size: the contents are charged
+    # once when the first key refers to them and released when the last one goes.
+
+    def _store(self, key, data, dedup=True):
+        released = self._mem.shared_size(key)
+        self._mem.set(key, data, self._digest(data) if dedup else None)
+        with self._lock:
+            self._stored_bytes += released - self._mem.shared_size(key)
+
+    def _remove(self, key, parts=True):
+        released = self._mem.shared_size(key)
+        self._mem.delete(key, parts=parts)
+        with self._lock:
+            self._stored_bytes += released
+
+    def _admit(self, key, data):
+        if self._spill is not None:
+            self._spill.discard(key)
+        self._account(key, len(data))
+        self._store(key, data)
+        self._policy.add(key)
+        self._evict(keep=key)
+
+    def _evict(self, keep):
+        discarded = []
+        while self._stored_bytes > self._max_bytes:
+            victim = next((k for k in self._policy.victims() if k != keep), None)
+            if victim is None:
+                break
+            data = self._mem.get(victim)
+            if self._spill is not None:
+                self._spill.put(victim, data)
+                self._spills += 1
+            else:
+                self._deadlines.pop(victim, None)
+                self._schedule_expiry(victim, None)
+                discarded.append(victim)
+            self._evictions += 1
+            self._unaccount(victim)
+            self._policy.remove(victim)
+            # a spilled key keeps its parts, versions and chunks for its reload; a discarded one drops them
+            self._remove(victim, parts=self._spill is None)
+        if discarded and self.on_discard is not None:
+            self.on_discard(discarded)
+
+    def _reload(self, key):
+        if self._spill is None:
+            return None
+        data = self._spill.take(key)
+        if data is not None:
+            self._reloads += 1
+            self._admit(key, data)
+        return data
+
+    def _forget(self, key):
+        if self._spill is not None:
+            self._spill.discard(key)
+        self._unaccount(key)
+        self._policy.remove(key)
+        self._remove(key)
+
+    def _reset_bound(self):
+        with self._lock:
+            if self._spill is not None:
+                self._spill.clear()
+            self._policy.clear()
+
     def _get_all(self):
         """
         :return: Whole (serialized) data in blackboard
         :rtype: dict
         """
-        return self._mem.all
+        if self._spill is None or not len(self._spill):
+            return self._mem.all
+        with self._lock:
+            whole_data = dict(self._mem.all)
+            for key in self._spill.keys():
+                whole_data[key] = self._spill.peek(key)
+        return whole_data
 
     def _restore(self, kv_pairs):
         """
@@ -188,20 +1266,66 @@ class DictionaryWrapper(MemoryWrapper):
         :return: True if succeed to store kv_pairs to memory else False
         :rtype: bool
         """
+        self._cancel_expiries()
+        self._deadlines.clear()
         self._mem.flush()
+        self._reset_accounting()
+        if self.bounded:
+            self._reset_bound()
         for key, val in kv_pairs.items():
             if type(key) is bytes:
                 key = key.decode("utf-8")
-            self._mem.set(key, val)
+            if self.bounded:
+                with self._lock:
+                    self._admit(key, val)
+            else:
+                self._store(key, val)
+                self._account(key, len(val))
         return True
 
 
+def parse_node(node):
+    """
+    :param node: Redis endpoint; dict of host, port and db_num, or 'host:port/db_num' string
+    :type node: dict or string
+    :return: Normalized endpoint config and its name 'host:port/db_num'
+    :rtype: tuple
+    """
+    if isinstance(node, str):
+        address, _, db_num = node.partition('/')
+        host, _, port = address.partition(':')
+        node = {'host': host or 'localhost', 'port': int(port or 6379), 'db_num': int(db_num or 0)}
+    else:
+        node = dict({'host': 'localhost', 'port': 6379, 'db_num': 0}, **node)
+    return node, '{host}:{port}/{db_num}'.format(**node)
+
+
+def _stream_id(change_id):
+    """
+    :param change_id: Redis stream id such as '1700000000000-0'; the sequence number may be omitted.
+    :type change_id: string or bytes
+    :return: (milliseconds, sequence number), which are ordered as the stream ids
+    :rtype: tuple
+    """
+    if type(change_id) is bytes:
+        change_id = change_id.decode('utf-8')
+    milliseconds, _, sequence = str(change_id).partition('-')
+    return int(milliseconds), int(sequence or 0)
+
+
 def raise_conn_error(func):
-    def wrapper(*args, **kwargs):
+    def wrapper(self, *args, **kwargs):
+        breaker = getattr(self, '_breaker', None)
+        if breaker is not None and not breaker.allow():
+            raise RedisCircuitOpen
         try:
-            result = func(*args, **kwargs)
-        except redis.ConnectionError:
+            result = func(self, *args, **kwargs)
+        except (redis.ConnectionError, redis.TimeoutError):
+            if breaker is not None:
+                breaker.failure()
             raise RedisNotConnected
+        if breaker is not None:
+            breaker.success()
         return result
     return wrapper
 
@@ -221,6 +1345,65 @@ class RedisWrapper(MemoryWrapper):
     :param timeout: Timeout for db connection. It would be dangerous if you set timeout as None because the connection
                     attempt between redis client and server can block the whole process.
     :type timeout: float
+    :param buckets: Number of bucket hashes which keys are partitioned into by the hash of key. 0 keeps every key in
+                    a single hash. Small buckets keep the compact (listpack) encoding of Redis and make whole-data
+                    operations iterate bucket by bucket; choose about (expected number of keys / 100). A bucket
+                    over `hash-max-listpack-entries` keys is reported by `stats()`. default: 0
+    :type buckets: int
+    :param read_replicas: Redis replicas of this server; dicts of host, port and db_num, or 'host:port/db_num'
+                          strings. `get`, `has` and `save` read from them, and fall back to the primary if a replica
+                          is unreachable. default: None
+    :type read_replicas: list
+    :param read_policy: How a replica is chosen for a read; 'round_robin' or 'latency' (the lowest moving average
+                        of read latency). default: 'round_robin'
+    :type read_policy: string
+    :param read_your_writes: False reads possibly stale data from replicas. True reads a key from the primary for
+                             `replica_lag` seconds after this wrapper wrote it. 'wait' blocks every write with
+                             `WAIT` until all replicas acknowledged it. default: False
+    :type read_your_writes: boolean or string
+    :param replica_lag: Upper bound of the replication lag in seconds, used by read_your_writes=True. default: 1.0
+    :type replica_lag: float
+    :param circuit_breaker: Number of consecutive connection failures which opens the circuit breaker. While it is
+                            open, every call raises RedisCircuitOpen immediately instead of waiting for `timeout`, and
+                            Redis is probed in the background every `probe_interval` seconds. 0 disables the circuit
+                            breaker. default: 0
+    :type circuit_breaker: int
+    :param probe_interval: Seconds between probes while the circuit breaker is open. default: 1.0
+    :type probe_interval: float
+    :param stale_cache: Number of recently read or written values kept locally; `get` and `has` serve them when Redis
+                        is unreachable. 0 disables the cache. default: 0
+    :type stale_cache: int
+    :param write_behind: Option to buffer `set` locally and write it to Redis from a background thread. Repeated
+                         writes of a key are collapsed to the latest value, and reads of this wrapper see buffered
+                         values. Other operations (and `sync`/`close`) write the buffer through first. default: False
+    :type write_behind: boolean
+    :param write_batch: Number of buffered keys which triggers a write, and the size of each pipelined batch.
+                        default: 500
+    :type write_batch: int
+    :param write_delay: Seconds after which buffered keys are written at the latest. default: 0.05
+    :type write_delay: float
+    :param snapshot: Format of save files. 'pickle' pickles the fields of the hash(es) on the client. 'dump' saves
+                     the `DUMP` payload of each bucket (and of the parts of composite values) and `load` restores
+                     them with `RESTORE`, so fields are never handled one by one; the payloads can only be restored
+                     by a Redis server of the same or a newer version. `load` reads files of either format.
+                     default: 'pickle'
+    :type snapshot: string
+    :param change_log: Number of the latest changes kept in the stream `<hash>:changes` (see `changes`); the stream
+                       is trimmed approximately. 0 logs no changes. default: 0
+    :type change_log: int
+    :param reap_interval: Seconds between sweeps which remove the due keys of the expiry index `<hash>:expiry`,
+                          including keys whose expiry was set by processes which have exited or closed without
+                          flushing. A wrapper sweeps once it sets an expiry, or if it finds the index non-empty
+                          when it connects. Sweeps and the expiries of keys run on a thread of the wrapper, so
+                          that a slow server never holds up the shared timer thread. 0 disables the sweeps; call
+                          `reap` instead. default: 1.0
+    :type reap_interval: float
+    :param dedup: Minimum size in bytes of the values which are deduplicated (see MemoryWrapper). Such a value is
+                  kept once in the hash `<hash>:cas` by digest, and its key holds a short reference to it; the
+                  references of each digest are counted in `<hash>:cas:refs`. Writes move the counts in the same
+                  transaction, and reads of such a value take one more round trip. It cannot be combined with
+                  write_behind. default: 0
+    :type dedup: int
     :param **kwargs: You can set extra Redis parameters by kwargs.
                     (e.g. socket_keepalive, socket_keepalive_options, connection_pool, encoding, charset and etc.)
 
@@ -228,19 +1411,238 @@ class RedisWrapper(MemoryWrapper):
     :rtype: gblackboard.wrapper.RedisWrapper
     """
 
-    def __init__(self, host='localhost', port=6379, db_num=0, flush=True, timeout=1.0, **kwargs):
+    shared_index = True
+
+    def __init__(self, host='localhost', port=6379, db_num=0, flush=True, timeout=1.0, buckets=0,
+                 read_replicas=None, read_policy='round_robin', read_your_writes=False, replica_lag=1.0,
+                 circuit_breaker=0, probe_interval=1.0, stale_cache=0,
+                 write_behind=False, write_batch=500, write_delay=0.05, snapshot='pickle', reap_interval=1.0,
+                 **kwargs):
         self._host = host
         self._port = port
         self._db_num = db_num
         self._flush = flush
         self._timeout = timeout
+        self._buckets = buckets
+        self._read_replicas = list(read_replicas or ())
+        self._read_policy = read_policy
+        self._read_your_writes = read_your_writes
+        self._replica_lag = replica_lag
+        self._breaker = CircuitBreaker(
+            lambda: self._ping(), circuit_breaker, probe_interval) if circuit_breaker else None
+        self._stale_size = stale_cache
+        self._stale = collections.OrderedDict()
+        self._write_behind = write_behind
+        self._write_batch = write_batch
+        self._write_delay = write_delay
+        self._snapshot = snapshot
+        self._reap_interval = reap_interval
+        # keys whose expiry timers have fired, waiting for the reaper thread which also sweeps the expiry index
+        self._due = []
+        self._due_ready = threading.Condition(threading.Lock())
+        self._reaper = None
+        # `hash-max-listpack-entries` of the server, read on the first `stats()`, and the buckets reported over it
+        self._listpack_entries = None
+        self._oversized = set()
+        # key -> (serialized data, expiry deadline) waiting for the writer thread, and the batch being written
+        self._pending = {}
+        self._inflight = {}
+        self._pending_ready = threading.Condition(threading.Lock())
+        self._writing = threading.Lock()
+        self._writer = None
+        self._closing = False
+        # sizes of the versions which this wrapper appended to histories bounded by bytes
+        self._history_sizes = {}
+        # `timeout` and `socket_timeout` are the same option.
+        kwargs.pop('socket_timeout', None)
         super(RedisWrapper, self).__init__(**kwargs)
 
+    @staticmethod
+    def hash_name(namespace):
+        """
+        :return: Name of the Redis hash which holds the data of `namespace`. The namespace is wrapped in a hash tag,
+                 so all Redis keys of a namespace map to the same cluster slot.
+        :rtype: string
+        """
+        if namespace is None:
+            return GBLACKBOARD
+        return '{}:{{{}}}'.format(GBLACKBOARD, namespace)
+
+    def _bucket_names(self, hash_name):
+        if not self._buckets:
+            return [hash_name]
+        return ['{}:{}'.format(hash_name, index) for index in range(self._buckets)]
+
+    def _parts_name(self, key, hash_name=None):
+        """
+        :return: Name of the hash which holds the parts of the composite value of `key`
+        :rtype: string
+        """
+        if type(key) is bytes:
+            key = key.decode('utf-8')
+        return '{}:parts:{}'.format(hash_name or self._hash, key)
+
+    def _log_change(self, operation, keys=(None,), pipe=None):
+        if not self._change_log:
+            return
+        batch = self._mem.pipeline(transaction=False) if pipe is None else pipe
+        for key in keys:
+            if type(key) is bytes:
+                key = key.decode('utf-8')
+            fields = {'op': operation} if key is None else {'op': operation, 'key': key}
+            batch.xadd(self._changes_key, fields, maxlen=self._change_log, approximate=True)
+        if pipe is None:
+            batch.execute()
+
+    @raise_conn_error
+    def changes(self, since=None, count=None, group=None):
+        """
+        Changes are kept in a Redis stream, so their ids are stream ids such as '1700000000000-0'.
+        A consumer group is created on its first read, starting from the oldest kept change.
+        Stream ids are not consecutive, so the log counts as truncated once the change `since` itself is dropped.
+        """
+        if not self._change_log:
+            raise ChangeLogDisabled("Changes are not logged; set `change_log` of the memory.")
+        if group is None:
+            with self._mem.pipeline() as pipe:
+                pipe.xrange(self._changes_key, count=1)
+                pipe.xread({self._changes_key: since or '0-0'}, count=count)
+                first, reply = pipe.execute()
+            if since and first and _stream_id(since) < _stream_id(first[0][0]):
+                raise ChangeLogTruncated("Changes after {} have been dropped; the oldest kept change is {}.".format(
+                    since, first[0][0].decode('utf-8')))
+        else:
+            try:
+                self._mem.xgroup_create(self._changes_key, group, id='0', mkstream=True)
+            except redis.ResponseError as re:
+                if 'BUSYGROUP' not in str(re):
+                    raise
+            reply = self._mem.xreadgroup(group, GBLACKBOARD, {self._changes_key: '>'}, count=count, noack=True)
+        entries = reply[0][1] if reply else []
+        return [(change_id.decode('utf-8'), fields[b'op'].decode('utf-8'),
+                 fields[b'key'].decode('utf-8') if b'key' in fields else None) for change_id, fields in entries]
+
+    def _history_name(self, key):
+        """
+        :return: Name of the list which holds the versions of `key`
+        :rtype: string
+        """
+        if type(key) is bytes:
+            key = key.decode('utf-8')
+        return '{}:history:{}'.format(self._hash, key)
+
+    def _blob_name(self, key, hash_name=None):
+        """
+        :return: Name of the hash which holds the chunks of the blob of `key`, by index
+        :rtype: string
+        """
+        if type(key) is bytes:
+            key = key.decode('utf-8')
+        return '{}:blob:{}'.format(hash_name or self._hash, key)
+
+    def _lease_name(self, key):
+        """
+        :return: Name of the string which holds the token of the lease of `key`
+        :rtype: string
+        """
+        if type(key) is bytes:
+            key = key.decode('utf-8')
+        return '{}:lease:{}'.format(self._hash, key)
+
+    def _bucket(self, key):
+        """
+        :return: Name of the hash which holds `key`
+        :rtype: string
+        """
+        if not self._buckets:
+            return self._hash
+        if type(key) is str:
+            key = key.encode('utf-8')
+        return self._hashes[binascii.crc32(key) % self._buckets]
+
     def setup(self):
+        self._hash = RedisWrapper.hash_name(self._namespace)
+        self._hashes = self._bucket_names(self._hash)
+        self._expiry_key = self._hash + ':expiry'
+        # set of the keys of composite values, whose parts are kept in `<hash>:parts:<key>` hashes
+        self._parts_key = self._hash + ':parts'
+        self._indexes_key = self._hash + ':indexes'
+        # set of the keys which have versions in `<hash>:history:<key>` lists
+        self._histories_key = self._hash + ':histories'
+        # set of the keys which have chunks in `<hash>:blob:<key>` hashes
+        self._blobs_key = self._hash + ':blobs'
+        # stream of the changes of the namespace, capped at `change_log` entries
+        self._changes_key = self._hash + ':changes'
+        # deduplicated values by digest, number of keys which refer to each digest, and digest of each such key
+        self._cas_key = self._hash + ':cas'
+        self._cas_refs_key = self._hash + ':cas:refs'
+        self._cas_keys_key = self._hash + ':cas:keys'
+        import_redis()
         self._mem = redis.Redis(
             host=self._host, port=self._port, db=self._db_num,
             socket_timeout=self._timeout, **self._config)
         self._validate_config()
+        self._readers = []
+        for node in self._read_replicas:
+            config, _ = parse_node(node)
+            self._readers.append(redis.Redis(
+                host=config['host'], port=config['port'], db=config['db_num'],
+                socket_timeout=self._timeout, **self._config))
+        self._latencies = [0.0] * len(self._readers)
+        self._down_until = [0.0] * len(self._readers)
+        self._reads = 0
+        # key -> monotonic time until which reads of the key go to the primary
+        self._written = {}
+        self._written_all = 0.0
+        if self._reap_interval:
+            try:
+                # expiries which other processes left behind
+                swept = self._mem.zcard(self._expiry_key) > 0
+            except redis.RedisError:
+                swept = False
+            if swept:
+                self._start_reaper()
+
+    def _start_reaper(self):
+        with self._due_ready:
+            if self._reaper is None and not self._closing:
+                self._reaper = threading.Thread(target=self._reap_loop, name='gblackboard-reaper', daemon=True)
+                self._reaper.start()
+
+    def _schedule_expiry(self, key, ttl):
+        if ttl is not None and self._reaper is None:
+            self._start_reaper()
+        super(RedisWrapper, self)._schedule_expiry(key, ttl)
+
+    def _reap(self, key):
+        # Removing a key takes round trips which block for `timeout` while Redis is down; the timer thread only
+        # hands the key over to the reaper thread.
+        self._timers.pop(key, None)
+        with self._due_ready:
+            self._due.append(key)
+            self._due_ready.notify()
+
+    def _reap_loop(self):
+        next_sweep = time.monotonic() + self._reap_interval if self._reap_interval else None
+        while True:
+            with self._due_ready:
+                if not self._closing and not self._due:
+                    self._due_ready.wait(None if next_sweep is None else max(next_sweep - time.monotonic(), 0.0))
+                if self._closing:
+                    return
+                due, self._due = self._due, []
+            try:
+                discarded = [key for key in due if self._discard_expired(key)]
+                if discarded and self.on_discard is not None:
+                    self.on_discard(discarded)
+                if next_sweep is not None and time.monotonic() >= next_sweep:
+                    next_sweep = time.monotonic() + self._reap_interval
+                    self.reap(REAP_BATCH)
+            except RedisNotConnected:
+                # the keys stay in the expiry index, so the next sweep removes them
+                pass
+            except Exception:
+                logging.getLogger(__name__).exception("Reaping expired keys from Redis failed")
 
     def _validate_config(self):
         # TODO: check that followings have valid values
@@ -249,7 +1651,77 @@ class RedisWrapper(MemoryWrapper):
         #       db_num: > 0,
         #       timeout: > 0
         #       RedisWrongConfig can be raised.
-        pass
+        if self._read_policy not in READ_POLICIES:
+            raise RedisWrongConfig(
+                "Read policy should be one of {}: {}".format(READ_POLICIES, self._read_policy))
+        if self._snapshot not in SNAPSHOT_FORMATS:
+            raise RedisWrongConfig(
+                "Snapshot format should be one of {}: {}".format(SNAPSHOT_FORMATS, self._snapshot))
+        if self._dedup and self._write_behind:
+            raise RedisWrongConfig("Deduplication cannot be combined with write_behind")
+
+    def _reader(self, key=None):
+        """
+        :return: Index of the replica which serves a read of `key` (of whole data if `key` is None),
+                 None if the primary serves it
+        :rtype: int
+        """
+        if not self._readers:
+            return None
+        now = time.monotonic()
+        if self._read_your_writes is True:
+            if now < self._written_all:
+                return None
+            if key is None:
+                if any(until > now for until in self._written.values()):
+                    return None
+            elif now < self._written.get(key, 0.0):
+                return None
+        candidates = [index for index, until in enumerate(self._down_until) if until <= now]
+        if not candidates:
+            return None
+        self._reads += 1
+        if self._read_policy == 'latency' and self._reads % LATENCY_PROBE_INTERVAL:
+            return min(candidates, key=self._latencies.__getitem__)
+        return candidates[self._reads % len(candidates)]
+
+    def _read(self, key, command):
+        """
+        Run `command(client)` on the replica chosen for `key`, or on the primary.
+        """
+        index = self._reader(key)
+        if index is None:
+            return command(self._mem)
+        started = time.perf_counter()
+        try:
+            result = command(self._readers[index])
+        except (redis.ConnectionError, redis.TimeoutError):
+            # a hung replica is skipped as well as an unreachable one
+            self._down_until[index] = time.monotonic() + REPLICA_RETRY_INTERVAL
+            return command(self._mem)
+        elapsed = time.perf_counter() - started
+        latency = self._latencies[index]
+        self._latencies[index] = elapsed if not latency else 0.8 * latency + 0.2 * elapsed
+        return result
+
+    def _wrote(self, key=None):
+        """
+        Keep reads consistent with a write of `key` (of whole data if `key` is None) by `read_your_writes`.
+        """
+        if not self._readers or not self._read_your_writes:
+            return
+        if self._read_your_writes == 'wait':
+            self._mem.execute_command('WAIT', len(self._readers), int((self._timeout or 0) * 1000))
+            return
+        until = time.monotonic() + self._replica_lag
+        if key is None:
+            self._written_all = until
+            self._written.clear()
+            return
+        self._written[key] = until
+        if len(self._written) > 1024:
+            now = time.monotonic()
+            self._written = {k: t for k, t in self._written.items() if t > now}
 
     def connected(self):
         if not self._mem:
@@ -264,56 +1736,942 @@ class RedisWrapper(MemoryWrapper):
         else:
             return True
 
+    @property
+    def circuit_state(self):
+        """
+        :return: 'closed', 'open' or 'half_open'; None if the circuit breaker is disabled
+        :rtype: string
+        """
+        return self._breaker.state if self._breaker is not None else None
+
+    def _remember(self, key, data):
+        """
+        Keep the latest (serialized) `data` of `key` in the stale cache; None forgets `key`.
+        """
+        if not self._stale_size:
+            return
+        with self._lock:
+            if data is None:
+                self._stale.pop(key, None)
+                return
+            self._stale[key] = data
+            self._stale.move_to_end(key)
+            while len(self._stale) > self._stale_size:
+                self._stale.popitem(last=False)
+
     def _flush_hash(self):
-        keys = self._mem.hkeys(GBLACKBOARD)
-        if keys:
-            self._mem.hdel(GBLACKBOARD, *keys)
+        with self._writing:
+            with self._pending_ready:
+                self._pending.clear()
+            self._cancel_expiries()
+            self._reset_accounting()
+            self._unlink_parts(self._hash, self._parts_key)
+            self._unlink_histories()
+            self._unlink_blobs(self._hash)
+            self._unlink_indexes()
+            # UNLINK frees hashes in the background, so it does not block Redis even for a large hash.
+            self._mem.unlink(self._expiry_key, self._cas_key, self._cas_refs_key, self._cas_keys_key, *self._hashes)
+            self._stale.clear()
+            self._wrote()
+
+    def _unlink_histories(self):
+        names = [self._history_name(key) for key in self._mem.smembers(self._histories_key)]
+        for begin in range(0, len(names), RESTORE_BATCH):
+            self._mem.unlink(*names[begin:begin + RESTORE_BATCH])
+        self._mem.unlink(self._histories_key)
+        self._history_sizes.clear()
+
+    def _unlink_blobs(self, hash_name):
+        blobs_key = hash_name + ':blobs'
+        names = [self._blob_name(key, hash_name) for key in self._mem.smembers(blobs_key)]
+        for begin in range(0, len(names), RESTORE_BATCH):
+            self._mem.unlink(*names[begin:begin + RESTORE_BATCH])
+        self._mem.unlink(blobs_key)
+
+    def _unlink_parts(self, hash_name, parts_key):
+        names = [self._parts_name(key, hash_name) for key in self._mem.smembers(parts_key)]
+        for begin in range(0, len(names), RESTORE_BATCH):
+            self._mem.unlink(*names[begin:begin + RESTORE_BATCH])
+        self._mem.unlink(parts_key)
+
+    @raise_conn_error
+    def sync(self):
+        return self._drain()
+
+    def _drain(self):
+        """
+        Write the buffered writes to Redis in pipelined batches.
+
+        :return: Number of written keys
+        :rtype: int
+        """
+        with self._writing:
+            with self._pending_ready:
+                batch, self._pending = self._pending, {}
+                self._inflight = batch
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            items = list(batch.items())
+            try:
+                for begin in range(0, len(items), self._write_batch):
+                    pipe = self._mem.pipeline(transaction=False)
+                    for key, (data, deadline) in items[begin:begin + self._write_batch]:
+                        pipe.hset(self._bucket(key), key, data)
+                        if deadline is not None:
+                            pipe.zadd(self._expiry_key, {key: deadline})
+                    self._log_change('set', [key for key, _ in items[begin:begin + self._write_batch]], pipe)
+                    pipe.execute()
+            except redis.RedisError:
+                # keep unwritten keys buffered unless they have been written again meanwhile
+                with self._pending_ready:
+                    for key, entry in items[begin:]:
+                        self._pending.setdefault(key, entry)
+                raise
+            finally:
+                with self._pending_ready:
+                    self._inflight = {}
+            self._observe('sync', 'network', started)
+            if self._read_your_writes == 'wait':
+                self._wrote()
+            else:
+                for key, _ in items:
+                    self._wrote(key)
+            return len(items)
+
+    def _buffer(self, key, data, ttl):
+        with self._pending_ready:
+            self._pending[key] = (data, None if ttl is None else time.time() + ttl)
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_behind_loop, name='gblackboard-writer', daemon=True)
+                self._writer.start()
+            if len(self._pending) == 1 or len(self._pending) >= self._write_batch:
+                self._pending_ready.notify()
+
+    def _buffered(self, key):
+        """
+        :return: Buffered (serialized) data of `key`, None if `key` is not buffered
+        :rtype: bytes
+        """
+        with self._pending_ready:
+            entry = self._pending.get(key) or self._inflight.get(key)
+        return entry[0] if entry is not None else None
+
+    def _write_behind_loop(self):
+        while True:
+            with self._pending_ready:
+                if not self._closing and not self._pending:
+                    self._pending_ready.wait()
+                if not self._closing and len(self._pending) < self._write_batch:
+                    self._pending_ready.wait(self._write_delay)
+                if self._closing:
+                    return
+            try:
+                self._drain()
+            except Exception:
+                logging.getLogger(__name__).exception("Write-behind to Redis failed; retrying")
+                time.sleep(self._write_delay)
+
+    @raise_conn_error
+    def flush(self):
+        self._flush_hash()
+        self._log_change('flush')
 
     @raise_conn_error
+    def copy_to(self, namespace):
+        self._drain()
+        target_hash = RedisWrapper.hash_name(namespace)
+        targets = self._bucket_names(target_hash)
+        if targets == self._hashes:
+            return True
+        target_parts_key = target_hash + ':parts'
+        self._unlink_parts(target_hash, target_parts_key)
+        self._unlink_blobs(target_hash)
+        composites = self._mem.smembers(self._parts_key)
+        blobs = self._mem.smembers(self._blobs_key)
+        sources = self._hashes + [self._parts_key] + [self._parts_name(key) for key in composites]
+        targets = targets + [target_parts_key] + [self._parts_name(key, target_hash) for key in composites]
+        sources += [self._blobs_key] + [self._blob_name(key) for key in blobs]
+        targets += [target_hash + ':blobs'] + [self._blob_name(key, target_hash) for key in blobs]
+        sources += [self._cas_key, self._cas_refs_key, self._cas_keys_key]
+        targets += [target_hash + ':cas', target_hash + ':cas:refs', target_hash + ':cas:keys']
+        if self._copy_keys(sources, targets):
+            return True
+        for source, target in zip(sources, targets):
+            payload = self._mem.dump(source)
+            if payload is None:
+                self._mem.unlink(target)
+            else:
+                self._mem.restore(target, 0, payload, replace=True)
+        return True
+
+    def _copy_keys(self, sources, targets):
+        """
+        Copy each of `sources` to the target with the same position with `COPY`.
+
+        :return: True if copied, False if the server (before Redis 6.2) or the client (before redis-py 4.0) does not
+                 support `COPY`
+        :rtype: bool
+        """
+        pipe = self._mem.pipeline()
+        if not hasattr(pipe, 'copy'):
+            return False
+        for source, target in zip(sources, targets):
+            pipe.unlink(target)
+            pipe.copy(source, target)
+        try:
+            pipe.execute()
+        except redis.ResponseError:
+            return False
+        return True
+
     def close(self):
+        if self._breaker is not None:
+            self._breaker.reset()
+        with self._pending_ready:
+            self._closing = True
+            self._pending_ready.notify()
+        with self._due_ready:
+            self._due_ready.notify()
+        if self._reaper is not None and self._reaper is not threading.current_thread():
+            self._reaper.join()
+            self._reaper = None
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self._close()
+
+    @raise_conn_error
+    def _close(self):
         if self._flush:
             self._flush_hash()
+            self._mem.unlink(self._changes_key)
+        else:
+            self._drain()
+            self._cancel_expiries()
+
+    def _queue_sets(self, pipe, items):
+        groups = {}
+        for key, data in items.items():
+            groups.setdefault(self._bucket(key), {})[key] = data
+        for name, mapping in groups.items():
+            pipe.hset(name, mapping=mapping)
+
+    def _transact(self, refs, queue, watch=(), check=None):
+        """
+        Run the commands which `queue(pipe, stored)` adds as a transaction, moving the references of deduplicated
+        values along with them.
+
+        :param refs: New (serialized) data of the keys which the commands write, or None for the keys which they
+                     drop or give a composite header
+        :type refs: dict
+        :param queue: Function which adds the commands; `stored` is the data to write into the bucket of each key of
+                      `refs`, which is a reference for a deduplicated value
+        :param watch: Redis keys which are watched while `check(pipe)` tells whether the commands still apply
+        :return: Replies of the commands, None if `check` declined them
+        :rtype: list
+        """
+        dedup = bool(self._dedup and refs)
+        if not dedup and check is None:
+            pipe = self._mem.pipeline()
+            queue(pipe, refs)
+            return pipe.execute()
+        if dedup:
+            watch = tuple(watch) + (self._cas_keys_key, self._cas_refs_key)
+        with self._mem.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*watch)
+                    if check is not None and not check(pipe):
+                        return None
+                    stored, move = self._plan_refs(pipe, refs) if dedup else (refs, None)
+                    pipe.multi()
+                    if move is not None:
+                        move(pipe)
+                    skip = len(pipe)
+                    queue(pipe, stored)
+                    return pipe.execute()[skip:]
+                except redis.WatchError:
+                    # another process has moved references meanwhile
+                    continue
+
+    def _plan_refs(self, pipe, refs):
+        """
+        Read the digests which the keys of `refs` refer to and their counts, with `pipe` watching them.
+
+        :return: Data to write into the bucket of each key, and a function which adds the commands that move the
+                 references to a pipeline
+        :rtype: tuple
+        """
+        keys = list(refs)
+        digests = {}
+        for key, data in refs.items():
+            digest = None if data is None else self._digest(data)
+            if digest is not None:
+                digests[key] = digest
+        old = {key: digest.decode('utf-8')
+               for key, digest in zip(keys, pipe.hmget(self._cas_keys_key, keys)) if digest is not None}
+        touched = list(set(old.values()) | set(digests.values()))
+        before = {}
+        if touched:
+            before = {digest: int(count or 0)
+                      for digest, count in zip(touched, pipe.hmget(self._cas_refs_key, touched))}
+        counts = dict(before)
+        for key in keys:
+            if key in old:
+                counts[old[key]] -= 1
+            if key in digests:
+                counts[digests[key]] += 1
+        payloads = {digest: refs[key] for key, digest in digests.items()}
+        dropped = [key for key in old if key not in digests]
+
+        def move(pipe):
+            for digest, count in counts.items():
+                if count == before[digest]:
+                    continue
+                if count > 0:
+                    pipe.hset(self._cas_refs_key, digest, count)
+                    # a value is sent only by the first key which refers to it
+                    if before[digest] <= 0:
+                        pipe.hset(self._cas_key, digest, payloads[digest])
+                else:
+                    pipe.hdel(self._cas_refs_key, digest)
+                    pipe.hdel(self._cas_key, digest)
+            if digests:
+                pipe.hset(self._cas_keys_key, mapping=digests)
+            if dropped:
+                pipe.hdel(self._cas_keys_key, *dropped)
+        stored = {key: data if key not in digests else DEDUP_REF + digests[key].encode('ascii')
+                  for key, data in refs.items()}
+        return stored, move
+
+    def _dereference_many(self, found):
+        """
+        Replace the references in `found` (key -> serialized data) by the values which they refer to, in place.
+        Keys of the same value get the same bytes object.
+        """
+        refs = {key: data[len(DEDUP_REF):] for key, data in found.items()
+                if data is not None and data.startswith(DEDUP_REF)}
+        if refs:
+            digests = list(set(refs.values()))
+            payloads = dict(zip(digests, self._read(None, lambda client: client.hmget(self._cas_key, digests))))
+            for key, digest in refs.items():
+                found[key] = payloads[digest]
+        return found
+
+    def set(self, key, value, ttl=None):
+        return self.set_raw(key, self._serialize(value), ttl=ttl)
 
     @raise_conn_error
-    def set(self, key, value):
-        data = MemoryWrapper.transform_value_to_pickle(value)
+    def set_raw(self, key, data, ttl=None):
+        data = MemoryWrapper._frozen(data)
+        if self._write_behind:
+            self._buffer(key, data, ttl)
+            self._remember(key, data)
+            self._account(key, len(data))
+            if ttl is not None:
+                self._schedule_expiry(key, ttl)
+            return True
+
+        def queue(pipe, stored):
+            pipe.hset(self._bucket(key), key, stored[key])
+            if ttl is not None:
+                pipe.zadd(self._expiry_key, {key: time.time() + ttl})
+            self._log_change('set', (key,), pipe)
+        started = time.perf_counter()
         try:
-            self._mem.hset(GBLACKBOARD, key, data)
+            self._transact({key: data}, queue)
         except redis.exceptions.DataError:
             return False
+        self._observe('set', 'network', started)
+        self._wrote(key)
+        self._remember(key, data)
+        self._account(key, len(data))
+        if ttl is not None:
+            self._schedule_expiry(key, ttl)
         return True
 
-    @raise_conn_error
     def get(self, key):
-        data = self._mem.hget(GBLACKBOARD, key)
+        data = self._fetch_or_stale(key)
         if data:
-            return MemoryWrapper.transform_pickle_to_value(data)
+            return self._resolve(key, self._deserialize(data))
         else:
             return None
 
+    def get_raw(self, key):
+        data = self._fetch_or_stale(key)
+        return None if data is None else memoryview(data)
+
+    def _fetch_or_stale(self, key):
+        try:
+            return self._fetch(key)
+        except RedisNotConnected:
+            data = self._stale.get(key)
+            if data is None:
+                raise
+            return data
+
+    @raise_conn_error
+    def set_raw_many(self, items, ttl=None):
+        items = {key: MemoryWrapper._frozen(data) for key, data in items.items()}
+        if self._write_behind:
+            for key, data in items.items():
+                self._buffer(key, data, ttl)
+        else:
+
+            def queue(pipe, stored):
+                self._queue_sets(pipe, stored)
+                if ttl is not None and items:
+                    deadline = time.time() + ttl
+                    pipe.zadd(self._expiry_key, {key: deadline for key in items})
+                self._log_change('set', items, pipe)
+            started = time.perf_counter()
+            self._transact(items, queue)
+            self._observe('set', 'network', started)
+            if self._read_your_writes == 'wait':
+                self._wrote()
+        for key, data in items.items():
+            if self._read_your_writes is True:
+                self._wrote(key)
+            self._remember(key, data)
+            self._account(key, len(data))
+            if ttl is not None:
+                self._schedule_expiry(key, ttl)
+        return True
+
+    @raise_conn_error
+    def get_raw_many(self, keys):
+        keys = list(keys)
+        found = {}
+        groups = {}
+        for key in keys:
+            data = self._buffered(key) if self._write_behind else None
+            if data is not None:
+                found[key] = data
+            else:
+                groups.setdefault(self._bucket(key), []).append(key)
+
+        def fetch(client):
+            pipe = client.pipeline(transaction=False)
+            for name, names in groups.items():
+                pipe.hmget(name, names)
+            return pipe.execute()
+        started = time.perf_counter()
+        if groups:
+            for names, values in zip(groups.values(), self._read(None, fetch)):
+                found.update(zip(names, values))
+            self._dereference_many(found)
+        self._observe('get', 'network', started)
+        return {key: None if found.get(key) is None else memoryview(found[key]) for key in keys}
+
+    def get_many(self, keys):
+        return {key: self._resolve(key, self._deserialize(data)) if data else None
+                for key, data in self.get_raw_many(keys).items()}
+
+    @raise_conn_error
+    def delete_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return 0
+        self._drain()
+        groups = {}
+        for key in keys:
+            groups.setdefault(self._bucket(key), []).append(key)
+
+        def queue(pipe, stored):
+            for name, names in groups.items():
+                pipe.hdel(name, *names)
+            pipe.zrem(self._expiry_key, *keys)
+            pipe.unlink(*[self._parts_name(key) for key in keys] + [self._history_name(key) for key in keys] +
+                        [self._blob_name(key) for key in keys])
+            pipe.srem(self._parts_key, *keys)
+            pipe.srem(self._histories_key, *keys)
+            pipe.srem(self._blobs_key, *keys)
+            self._log_change('delete', keys, pipe)
+        started = time.perf_counter()
+        replies = self._transact(dict.fromkeys(keys), queue)
+        self._observe('delete', 'network', started)
+        if self._read_your_writes == 'wait':
+            self._wrote()
+        for key in keys:
+            if self._read_your_writes is True:
+                self._wrote(key)
+            self._remember(key, None)
+            self._unaccount(key)
+            self._history_sizes.pop(key, None)
+            self._schedule_expiry(key, None)
+        return sum(replies[:len(groups)])
+
+    # A shared secondary index `name` of the hash kind is a hash `<hash>:index:<name>` of key -> attribute and a set
+    # `<hash>:index:<name>:<attribute>` of keys per attribute; one of the sorted kind is a sorted set
+    # `<hash>:index:<name>` of keys scored by their (numeric) attribute. `<hash>:indexes` holds the kind of each index.
+
+    def _index_name(self, name, attribute=None):
+        if attribute is None:
+            return '{}:index:{}'.format(self._hash, name)
+        return '{}:index:{}:{!r}'.format(self._hash, name, attribute)
+
+    @raise_conn_error
+    def index_update(self, name, kind, key, attribute):
+        """
+        Index `key` under `attribute` in the shared index `name`. None removes `key` from the index.
+        """
+        index_name = self._index_name(name)
+        if kind == 'sorted':
+            if attribute is None:
+                self._mem.zrem(index_name, key)
+            else:
+                if not isinstance(attribute, (int, float)):
+                    raise UnsupportedDataType(
+                        "Attributes of a shared sorted index should be numbers: {!r}".format(attribute))
+                pipe = self._mem.pipeline()
+                pipe.hset(self._indexes_key, name, kind)
+                pipe.zadd(index_name, {key: attribute})
+                pipe.execute()
+            return True
+        old = self._mem.hget(index_name, key)
+        pipe = self._mem.pipeline()
+        if old is not None:
+            pipe.srem('{}:{}'.format(index_name, old.decode('utf-8')), key)
+        if attribute is None:
+            pipe.hdel(index_name, key)
+        else:
+            pipe.hset(self._indexes_key, name, kind)
+            pipe.hset(index_name, key, repr(attribute))
+            pipe.sadd(self._index_name(name, attribute), key)
+        pipe.execute()
+        return True
+
+    @raise_conn_error
+    def index_find(self, name, value):
+        """
+        :return: Keys whose attribute equals `value` in the shared hash index `name`, in sorted order
+        :rtype: list
+        """
+        return sorted(key.decode('utf-8') for key in self._mem.smembers(self._index_name(name, value)))
+
+    @raise_conn_error
+    def index_range(self, name, low=None, high=None):
+        """
+        :return: Keys whose attribute is between `low` and `high` (inclusive; None is unbounded) in the shared sorted
+                 index `name`, in the order of their attributes
+        :rtype: list
+        """
+        keys = self._mem.zrangebyscore(
+            self._index_name(name), '-inf' if low is None else low, '+inf' if high is None else high)
+        return [key.decode('utf-8') for key in keys]
+
+    @raise_conn_error
+    def index_drop(self, name):
+        index_name = self._index_name(name)
+        if self._mem.hget(self._indexes_key, name) == b'hash':
+            attributes = set(self._mem.hvals(index_name))
+            names = ['{}:{}'.format(index_name, attribute.decode('utf-8')) for attribute in attributes]
+            for begin in range(0, len(names), RESTORE_BATCH):
+                self._mem.unlink(*names[begin:begin + RESTORE_BATCH])
+        self._mem.unlink(index_name)
+        self._mem.hdel(self._indexes_key, name)
+        return True
+
+    def _unlink_indexes(self):
+        for name in self._mem.hkeys(self._indexes_key):
+            self.index_drop(name.decode('utf-8'))
+
+    @raise_conn_error
+    def _fetch(self, key):
+        if self._write_behind:
+            data = self._buffered(key)
+            if data is not None:
+                return data
+        started = time.perf_counter()
+        name = self._bucket(key)
+        data = self._read(key, lambda client: client.hget(name, key))
+        if data is not None and data.startswith(DEDUP_REF):
+            digest = data[len(DEDUP_REF):]
+            data = self._read(key, lambda client: client.hget(self._cas_key, digest))
+        self._observe('get', 'network', started)
+        self._remember(key, data)
+        return data
+
+    @raise_conn_error
+    def _write_parts(self, key, header, parts, ttl=None, replace=False):
+        header_data = None if header is None else self._serialize(header)
+        self._drain()
+        name = self._parts_name(key)
+
+        def queue(pipe, stored):
+            if replace:
+                pipe.unlink(name)
+            if parts:
+                pipe.hset(name, mapping=parts)
+            pipe.sadd(self._parts_key, key)
+            if header_data is not None:
+                pipe.hset(self._bucket(key), key, header_data)
+            if ttl is not None:
+                pipe.zadd(self._expiry_key, {key: time.time() + ttl})
+            self._log_change('set', (key,), pipe)
+        started = time.perf_counter()
+        # a header replaces the value of `key`, which may have been deduplicated
+        self._transact({} if header_data is None else {key: None}, queue)
+        self._observe('set', 'network', started)
+        self._wrote(key)
+        self._remember(key, None)
+        self._account_parts(key, None if header_data is None else len(header_data), parts, replace)
+        if ttl is not None:
+            self._schedule_expiry(key, ttl)
+        return True
+
+    @raise_conn_error
+    def _read_parts(self, key, names=None):
+        name = self._parts_name(key)
+        started = time.perf_counter()
+        if names is None:
+            parts = {field.decode('utf-8'): data
+                     for field, data in self._read(key, lambda client: client.hgetall(name)).items()}
+        else:
+            names = list(names)
+            if not names:
+                return {}
+            values = self._read(key, lambda client: client.hmget(name, names))
+            parts = {field: data for field, data in zip(names, values) if data is not None}
+        self._observe('get', 'network', started)
+        return parts
+
+    @raise_conn_error
+    def append_history(self, key, entry, limit, max_bytes=None, reset=False):
+        data = self._serialize(entry)
+        keep = limit
+        if max_bytes is not None:
+            # Redis cannot trim a list by bytes; count the versions which fit from the sizes appended here.
+            ring = self._history_sizes.get(key)
+            if ring is None or reset:
+                ring = self._history_sizes[key] = HistoryRing()
+            keep = ring.append(entry[0], len(entry[2]), limit, max_bytes)
+        elif reset:
+            self._history_sizes.pop(key, None)
+        name = self._history_name(key)
+        pipe = self._mem.pipeline()
+        if reset:
+            pipe.unlink(name)
+        pipe.rpush(name, data)
+        pipe.ltrim(name, -keep, -1)
+        pipe.sadd(self._histories_key, key)
+        started = time.perf_counter()
+        pipe.execute()
+        self._observe('set', 'network', started)
+        return True
+
+    # Versions in a history list are consecutive, so the list offset of a version follows from the newest one;
+    # a versioned read fetches the entries it returns rather than the whole list.
+
+    def _newest_entry(self, name, key):
+        item = self._read(key, lambda client: client.lindex(name, -1))
+        return None if item is None else self._deserialize(item)
+
+    @raise_conn_error
+    def get_history(self, key, since=None):
+        name = self._history_name(key)
+        started = time.perf_counter()
+        if since is None:
+            items = self._read(key, lambda client: client.lrange(name, 0, -1))
+        else:
+            newest = self._newest_entry(name, key)
+            count = 0 if newest is None else newest[0] - since
+            items = self._read(key, lambda client: client.lrange(name, -count, -1)) if count > 0 else []
+        self._observe('get', 'network', started)
+        entries = [self._deserialize(item) for item in items]
+        if since is None:
+            return entries
+        return [entry for entry in entries if entry[0] > since]
+
+    @raise_conn_error
+    def get_version(self, key, version):
+        name = self._history_name(key)
+        started = time.perf_counter()
+        entry = self._newest_entry(name, key)
+        if entry is not None and entry[0] > version:
+            item = self._read(key, lambda client: client.lindex(name, version - entry[0] - 1))
+            entry = None if item is None else self._deserialize(item)
+        self._observe('get', 'network', started)
+        return entry[2] if entry is not None and entry[0] == version else None
+
+    @raise_conn_error
+    def _write_chunk(self, key, index, data):
+        pipe = self._mem.pipeline()
+        pipe.hset(self._blob_name(key), str(index), data)
+        pipe.sadd(self._blobs_key, key)
+        started = time.perf_counter()
+        pipe.execute()
+        self._observe('set', 'network', started)
+        self._account_parts(key, None, {str(index): data})
+        return True
+
+    @raise_conn_error
+    def _read_chunks(self, key, begin, end):
+        names = [str(index) for index in range(begin, end)]
+        if not names:
+            return []
+        name = self._blob_name(key)
+        started = time.perf_counter()
+        values = self._read(key, lambda client: client.hmget(name, names))
+        self._observe('get', 'network', started)
+        chunks = []
+        for data in values:
+            if data is None:
+                break
+            chunks.append(data)
+        return chunks
+
+    @raise_conn_error
+    def _drop_blob(self, key):
+        pipe = self._mem.pipeline()
+        pipe.unlink(self._blob_name(key))
+        pipe.srem(self._blobs_key, key)
+        pipe.execute()
+        self._unaccount(key)
+        return True
+
+    @raise_conn_error
+    def _blob_keys(self):
+        return [key.decode('utf-8') for key in self._mem.smembers(self._blobs_key)]
+
+    @raise_conn_error
+    def _get_all_parts(self):
+        self._drain()
+        composites = [key.decode('utf-8') for key in self._mem.smembers(self._parts_key)]
+        pipe = self._mem.pipeline(transaction=False)
+        for key in composites:
+            pipe.hgetall(self._parts_name(key))
+        return {key: {field.decode('utf-8'): data for field, data in parts.items()}
+                for key, parts in zip(composites, pipe.execute())}
+
     @raise_conn_error
     def delete(self, key):
-        result = self._mem.hdel(GBLACKBOARD, key)
+        self._drain()
+
+        def queue(pipe, stored):
+            pipe.hdel(self._bucket(key), key)
+            pipe.zrem(self._expiry_key, key)
+            pipe.unlink(self._parts_name(key), self._history_name(key), self._blob_name(key))
+            pipe.srem(self._parts_key, key)
+            pipe.srem(self._histories_key, key)
+            pipe.srem(self._blobs_key, key)
+            self._log_change('delete', (key,), pipe)
+        started = time.perf_counter()
+        result, expiring = self._transact({key: None}, queue)[:2]
+        self._observe('delete', 'network', started)
+        self._wrote(key)
+        self._remember(key, None)
+        self._unaccount(key)
+        self._history_sizes.pop(key, None)
+        if expiring:
+            self._schedule_expiry(key, None)
         if result > 0:
             return True
         else:
             return False
 
-    @raise_conn_error
     def has(self, key):
-        result = self._mem.hexists(GBLACKBOARD, key)
+        try:
+            return self._exists(key)
+        except RedisNotConnected:
+            if key not in self._stale:
+                raise
+            return True
+
+    @raise_conn_error
+    def _exists(self, key):
+        if self._write_behind and self._buffered(key) is not None:
+            return True
+        name = self._bucket(key)
+        result = self._read(key, lambda client: client.hexists(name, key))
         if result > 0:
             return True
         else:
             return False
 
+    @raise_conn_error
+    def acquire_lease(self, key, ttl):
+        """
+        The lease is a string `<hash>:lease:<key>` which is set with `SET NX PX`, so it is freed by Redis if its
+        holder dies.
+        """
+        token = binascii.hexlify(os.urandom(8)).decode('ascii')
+        if self._mem.set(self._lease_name(key), token, nx=True, px=max(int(ttl * 1000), 1)):
+            return token
+        return None
+
+    @raise_conn_error
+    def release_lease(self, key, token):
+        name = self._lease_name(key)
+        with self._mem.pipeline() as pipe:
+            try:
+                pipe.watch(name)
+                # the lease may have expired and been acquired by another process
+                if pipe.get(name) != token.encode('ascii'):
+                    return False
+                pipe.multi()
+                pipe.delete(name)
+                pipe.execute()
+            except redis.WatchError:
+                return False
+        return True
+
+    @raise_conn_error
+    def wait_lease(self, key, timeout):
+        name = self._lease_name(key)
+        deadline = time.monotonic() + timeout
+        delay = LEASE_POLL
+        while self._mem.exists(name) and time.monotonic() < deadline:
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0.0)))
+            delay = min(delay * 2, LEASE_POLL_MAX)
+
+    @raise_conn_error
+    def expire(self, key, ttl):
+        self._drain()
+        if not self._mem.hexists(self._bucket(key), key):
+            return False
+        if ttl is None:
+            self._mem.zrem(self._expiry_key, key)
+        else:
+            self._mem.zadd(self._expiry_key, {key: time.time() + ttl})
+        self._schedule_expiry(key, ttl)
+        return True
+
+    @raise_conn_error
+    def reap(self, limit=None):
+        """
+        Remove every expired key in the expiry index, including keys which were set by other processes. Wrappers
+        which use expiries call it every `reap_interval` seconds by themselves.
+
+        :param limit: Number of expired keys to remove at most. default: None (all)
+        :type limit: int
+        :return: Removed keys
+        :rtype: list
+        """
+        if limit is None:
+            expired = self._mem.zrangebyscore(self._expiry_key, '-inf', time.time())
+        else:
+            expired = self._mem.zrangebyscore(self._expiry_key, '-inf', time.time(), start=0, num=limit)
+        keys = [key.decode('utf-8') for key in expired if self._discard_expired(key)]
+        if keys and self.on_discard is not None:
+            self.on_discard(keys)
+        return keys
+
+    def _discard_expired(self, key):
+        self._drain()
+
+        def expired(pipe):
+            # if expiry of `key` has been changed meanwhile, its new timer takes care of it.
+            deadline = pipe.zscore(self._expiry_key, key)
+            return deadline is not None and deadline <= time.time()
+
+        def queue(pipe, stored):
+            pipe.hdel(self._bucket(key), key)
+            pipe.zrem(self._expiry_key, key)
+            pipe.unlink(self._parts_name(key), self._history_name(key), self._blob_name(key))
+            pipe.srem(self._parts_key, key)
+            pipe.srem(self._histories_key, key)
+            pipe.srem(self._blobs_key, key)
+            self._log_change('expire', (key,), pipe)
+        if self._transact({key: None}, queue, watch=(self._expiry_key,), check=expired) is None:
+            # a sweep of another wrapper may have removed `key` already; this wrapper still has to forget it
+            if self._mem.zscore(self._expiry_key, key) is not None or self._mem.hexists(self._bucket(key), key):
+                return False
+        key = key.decode('utf-8') if type(key) is bytes else key
+        self._wrote(key)
+        self._remember(key, None)
+        self._unaccount(key)
+        self._history_sizes.pop(key, None)
+        return True
+
+    @raise_conn_error
+    def sizeof(self, key):
+        """
+        :return: Serialized size of `key` in bytes, None if `key` does not exist
+        :rtype: int
+        """
+        size = self._sizes.get(key)
+        if size is None:
+            # written by another process or before this wrapper was created
+            size = self._mem.hstrlen(self._bucket(key), key) or None
+        return size
+
+    @raise_conn_error
+    def stats(self, top=10):
+        """
+        Besides the sizes tracked by this wrapper, report the number of keys in each bucket hash ('buckets') and
+        `hash-max-listpack-entries` of the server ('listpack_entries'). A bucket over it loses the compact encoding,
+        which is logged once per bucket.
+        """
+        stats = super(RedisWrapper, self).stats(top)
+        pipe = self._mem.pipeline(transaction=False)
+        for name in self._hashes:
+            pipe.hlen(name)
+        buckets = dict(zip(self._hashes, pipe.execute()))
+        limit = self._max_listpack_entries()
+        oversized = {name for name, size in buckets.items() if size > limit} - self._oversized
+        if oversized:
+            self._oversized.update(oversized)
+            logging.getLogger(__name__).warning(
+                "Buckets %s hold more than hash-max-listpack-entries (%d) keys, so Redis keeps them as hash tables; "
+                "set `buckets` to about %d or more.", sorted(oversized), limit,
+                -(-sum(buckets.values()) * 2 // limit))
+        stats['buckets'] = buckets
+        stats['listpack_entries'] = limit
+        return stats
+
+    def _max_listpack_entries(self):
+        """
+        :return: Number of fields up to which the server keeps a hash in the compact encoding
+        :rtype: int
+        """
+        if self._listpack_entries is None:
+            try:
+                # servers before Redis 7 name it after ziplists
+                config = self._mem.config_get('hash-max-*-entries')
+            except redis.ResponseError:
+                config = {}
+            value = config.get('hash-max-listpack-entries', config.get('hash-max-ziplist-entries'))
+            self._listpack_entries = int(value) if value is not None else LISTPACK_ENTRIES
+        return self._listpack_entries
+
+    @raise_conn_error
+    def memory_usage(self, samples=5):
+        """
+        Sample the memory which Redis spends on the blackboard hashes with `MEMORY USAGE`.
+
+        :param samples: Number of sampled hash fields. 0 samples all fields.
+        :type samples: int
+        :return: Bytes used by the blackboard hashes, None if the server does not support `MEMORY USAGE`
+        :rtype: int
+        """
+        pipe = self._mem.pipeline(transaction=False)
+        for name in self._hashes + ([self._cas_key] if self._dedup else []):
+            pipe.memory_usage(name, samples=samples)
+        try:
+            usages = pipe.execute()
+        except redis.ResponseError:
+            return None
+        return sum(usage or 0 for usage in usages)
+
     @raise_conn_error
     def _get_all(self):
         """
         :return: Whole (serialized) data in blackboard
         :rtype: dict
         """
-        return self._mem.hgetall(GBLACKBOARD)
+        self._drain()
+        started = time.perf_counter()
+        whole_data = {}
+        # bucket by bucket, so that no single command blocks Redis for long
+        for name in self._hashes:
+            whole_data.update(self._read(None, lambda client: client.hgetall(name)))
+        # keys of a deduplicated value share one bytes object, which pickle writes once
+        self._dereference_many(whole_data)
+        self._observe('save', 'network', started)
+        return {key: data for key, data in whole_data.items() if data is not None}
 
     @raise_conn_error
     def _restore(self, kv_pairs):
@@ -324,7 +2682,265 @@ class RedisWrapper(MemoryWrapper):
         :rtype: bool
         """
         self._flush_hash()
+        started = time.perf_counter()
+        groups = {}
         for key, val in kv_pairs.items():
-            self._mem.hset(GBLACKBOARD, key, val)
+            if type(key) is bytes:
+                key = key.decode('utf-8')
+            groups.setdefault(self._bucket(key), []).append((key, val))
+            self._account(key, len(val))
+        if self._dedup:
+            items = [item for bucket in groups.values() for item in bucket]
+            groups = {}
+            for begin in range(0, len(items), RESTORE_BATCH):
+                self._transact(dict(items[begin:begin + RESTORE_BATCH]), self._queue_sets)
+        for name, items in groups.items():
+            for begin in range(0, len(items), RESTORE_BATCH):
+                self._mem.hset(name, mapping=dict(items[begin:begin + RESTORE_BATCH]))
+        self._wrote()
+        self._observe('load', 'network', started)
+        return True
+
+    @raise_conn_error
+    def save(self, file_path):
+        if self._snapshot != 'dump':
+            return super(RedisWrapper, self).save(file_path)
+        self._drain()
+        started = time.perf_counter()
+        composites = [key.decode('utf-8') for key in self._mem.smembers(self._parts_key)]
+        entries = [('bucket', index, name) for index, name in enumerate(self._hashes)]
+        entries.append(('composites', None, self._parts_key))
+        entries.extend(('parts', key, self._parts_name(key)) for key in composites)
+        entries.extend(('cas', name[len(self._hash) + 1:], name)
+                       for name in (self._cas_key, self._cas_refs_key, self._cas_keys_key))
+        with self._lock:
+            sizes, part_sizes = dict(self._sizes), dict(self._part_sizes)
+        with open(file_path, 'wb') as outfile:
+            pickle.dump((REDIS_DUMP, self._buckets, sizes, part_sizes, len(entries)), outfile,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            for begin in range(0, len(entries), RESTORE_BATCH):
+                batch = entries[begin:begin + RESTORE_BATCH]
+
+                def dump(client):
+                    pipe = client.pipeline(transaction=False)
+                    for _, _, name in batch:
+                        pipe.dump(name)
+                    return pipe.execute()
+                for (kind, ident, _), payload in zip(batch, self._read(None, dump)):
+                    pickle.dump((kind, ident, payload), outfile, protocol=pickle.HIGHEST_PROTOCOL)
+            # the DUMP payload of a blob would hold it whole; its chunks are streamed instead
+            self._save_blobs(outfile)
+        self._observe('save', 'network', started)
+        return True
+
+    @raise_conn_error
+    def _load_native(self, head, infile):
+        if type(head) is not tuple or not head or head[0] != REDIS_DUMP:
+            return False
+        _, buckets, sizes, part_sizes, count = head
+        self._flush_hash()
+        started = time.perf_counter()
+        # buckets of another layout are restored aside and rehashed into the buckets of this wrapper
+        rehashed = []
+        pipe = self._mem.pipeline(transaction=False)
+        for index in range(count):
+            kind, ident, payload = pickle.load(infile)
+            if payload is None:
+                continue
+            if kind == 'bucket' and buckets == self._buckets:
+                name = self._hashes[ident]
+            elif kind == 'bucket':
+                name = '{}:restore:{}'.format(self._hash, ident)
+                rehashed.append(name)
+            elif kind == 'composites':
+                name = self._parts_key
+            elif kind == 'cas':
+                name = '{}:{}'.format(self._hash, ident)
+            else:
+                name = self._parts_name(ident)
+            pipe.restore(name, 0, payload, replace=True)
+            if len(pipe) >= RESTORE_BATCH:
+                pipe.execute()
+        pipe.execute()
+        for name in rehashed:
+            groups = {}
+            for key, data in self._mem.hgetall(name).items():
+                groups.setdefault(self._bucket(key), {})[key] = data
+            for bucket, mapping in groups.items():
+                self._mem.hset(bucket, mapping=mapping)
+            self._mem.unlink(name)
+        with self._lock:
+            self._sizes.update(sizes)
+            self._part_sizes.update(part_sizes)
+            self._stored_bytes = sum(self._sizes.values())
+        self._load_blobs(infile)
+        self._wrote()
+        self._observe('load', 'network', started)
+        self._log_change('load')
         return True
 
+    @raise_conn_error
+    def _keys(self):
+        self._drain()
+        return [key.decode('utf-8') for name in self._hashes for key in self._mem.hkeys(name)]
+
+    @raise_conn_error
+    def _move_to(self, other, keys):
+        """
+        Move `keys` with their expiry (and the parts of composite values, the chunks of blobs and the kept versions)
+        into the memory of RedisWrapper `other`.
+
+        :return: Number of moved keys
+        :rtype: int
+        """
+        if not keys:
+            return 0
+        pipe = self._mem.pipeline(transaction=False)
+        for key in keys:
+            pipe.hget(self._bucket(key), key)
+            pipe.zscore(self._expiry_key, key)
+            pipe.sismember(self._parts_key, key)
+            pipe.hgetall(self._parts_name(key))
+            pipe.sismember(self._blobs_key, key)
+            pipe.sismember(self._histories_key, key)
+        replies = pipe.execute()
+        found = self._dereference_many(dict(zip(keys, replies[::6])))
+        moved = [(key, found[key], deadline, parts if composite else None)
+                 for key, deadline, composite, parts
+                 in zip(keys, replies[1::6], replies[2::6], replies[3::6]) if found[key] is not None]
+        if not moved:
+            return 0
+        blobs = {key for key, blob in zip(keys, replies[4::6]) if blob and found[key] is not None}
+        histories = {key for key, history in zip(keys, replies[5::6]) if history and found[key] is not None}
+        # chunks and versions go first, so that a value never comes without them
+        chunk_sizes = {key: self._copy_blob(other, key) for key in blobs}
+        for key in histories:
+            self._copy_history(other, key)
+
+        def write(target, stored):
+            for key, data, deadline, parts in moved:
+                target.hset(other._bucket(key), key, data if parts is not None else stored[key])
+                if deadline is not None:
+                    target.zadd(other._expiry_key, {key: deadline})
+                if parts is not None:
+                    target.unlink(other._parts_name(key))
+                    if parts:
+                        target.hset(other._parts_name(key), mapping=parts)
+                    target.sadd(other._parts_key, key)
+        other._transact({key: None if parts is not None else data for key, data, _, parts in moved}, write)
+
+        def remove(source, stored):
+            for key, _, _, parts in moved:
+                source.hdel(self._bucket(key), key)
+                if parts is not None:
+                    source.unlink(self._parts_name(key))
+                    source.srem(self._parts_key, key)
+            if blobs:
+                source.unlink(*[self._blob_name(key) for key in blobs])
+                source.srem(self._blobs_key, *blobs)
+            if histories:
+                source.unlink(*[self._history_name(key) for key in histories])
+                source.srem(self._histories_key, *histories)
+            source.zrem(self._expiry_key, *[key for key, _, _, _ in moved])
+        self._transact(dict.fromkeys(key for key, _, _, _ in moved), remove)
+        for key, data, deadline, parts in moved:
+            self._remember(key, None)
+            self._unaccount(key)
+            self._schedule_expiry(key, None)
+            other._wrote(key)
+            if parts is None:
+                other._account(key, len(data))
+            else:
+                other._account_part_sizes(key, len(data), chunk_sizes.get(key, {}), replace=True)
+                other._account_parts(key, None, parts)
+            if deadline is not None:
+                other._schedule_expiry(key, max(deadline - time.time(), 0.0))
+            # sizes of the versions bound the history by bytes; they go along with it
+            ring = self._history_sizes.pop(key, None)
+            if ring is not None:
+                other._history_sizes[key] = ring
+        return len(moved)
+
+    def _copy_blob(self, other, key):
+        """
+        Copy the chunks of the blob of `key` into RedisWrapper `other` a few at a time, as `save` streams them, so
+        that a large blob is never held whole.
+
+        :return: Size of each copied chunk by name
+        :rtype: dict
+        """
+        source, target = self._blob_name(key), other._blob_name(key)
+        other._mem.unlink(target)
+        sizes = {}
+        while True:
+            names = [str(index) for index in range(len(sizes), len(sizes) + BLOB_READAHEAD)]
+            chunks = {}
+            for name, data in zip(names, self._mem.hmget(source, names)):
+                if data is None:
+                    break
+                chunks[name] = data
+            if not chunks:
+                return sizes
+            pipe = other._mem.pipeline()
+            pipe.hset(target, mapping=chunks)
+            pipe.sadd(other._blobs_key, key)
+            pipe.execute()
+            sizes.update((name, len(data)) for name, data in chunks.items())
+            if len(chunks) < len(names):
+                return sizes
+
+    def _copy_history(self, other, key):
+        """
+        Copy the versions of `key` into RedisWrapper `other`, RESTORE_BATCH versions at a time.
+        """
+        source, target = self._history_name(key), other._history_name(key)
+        other._mem.unlink(target)
+        begin = 0
+        while True:
+            entries = self._mem.lrange(source, begin, begin + RESTORE_BATCH - 1)
+            if not entries:
+                return
+            pipe = other._mem.pipeline()
+            pipe.rpush(target, *entries)
+            pipe.sadd(other._histories_key, key)
+            pipe.execute()
+            if len(entries) < RESTORE_BATCH:
+                return
+            begin += len(entries)
+
+
+_BACKENDS = {}
+
+
+def register_backend(memory_type, factory):
+    """
+    Register the memory wrapper of `memory_type`.
+
+    :param memory_type: Memory type (e.g. a SupportedMemoryType member) which is passed to `Blackboard`
+    :param factory: MemoryWrapper class (or callable) which is called with the keyword arguments of `Blackboard`.
+                    It can also be given as a 'package.module:ClassName' string, which is imported only when a
+                    blackboard of `memory_type` is built.
+    :type factory: callable or string
+    """
+    _BACKENDS[memory_type] = factory
+
+
+def create_wrapper(memory_type, **kwargs):
+    """
+    :return: Memory wrapper of `memory_type` built with `kwargs`
+    :rtype: gblackboard.wrapper.MemoryWrapper
+    """
+    try:
+        factory = _BACKENDS[memory_type]
+    except (KeyError, TypeError):
+        raise UnsupportedMemoryType
+    if isinstance(factory, str):
+        module_name, _, attr = factory.partition(':')
+        factory = getattr(importlib.import_module(module_name), attr)
+        _BACKENDS[memory_type] = factory
+    return factory(**kwargs)
+
+
+register_backend(SupportedMemoryType.DICTIONARY, DictionaryWrapper)
+register_backend(SupportedMemoryType.REDIS, RedisWrapper)
+register_backend(SupportedMemoryType.SHARDED_REDIS, 'gblackboard.sharding:ShardedRedisWrapper')
@@ -13,7 +13,7 @@ with open('HISTORY.rst') as history_file:
 
 requirements = [
     'Click>=6.0',
-    'redis>=3.0.0',
+    'redis>=4.0.0',
 ]
 
 setup_requirements = [ ]
@@ -30,8 +30,6 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: MIT License',
         'Natural Language :: English',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
         'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
     ],
@@ -42,12 +40,16 @@ setup(
         ],
     },
     install_requires=requirements,
+    extras_require={
+        'array': ['numpy'],
+    },
     license="MIT license",
     long_description=readme + '\n\n' + history,
     include_package_data=True,
     keywords='gblackboard',
     name='gblackboard',
     packages=find_packages(include=['gblackboard']),
+    python_requires='>=3.6',
     setup_requires=setup_requirements,
     test_suite='tests',
     tests_require=test_requirements,
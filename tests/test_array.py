@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for chunked arrays of `gblackboard` package."""
+
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.array import ArrayLayout, guess_chunks
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NODES = ['node1:6379', 'node2:6379']
+
+
+class TestArrayLayout(unittest.TestCase):
+
+    def test_guess_chunks(self):
+        self.assertTupleEqual(guess_chunks((1000, 1000), 8, target=80000), (63, 125))
+        self.assertTupleEqual(guess_chunks((10,), 8), (10,))
+        self.assertTupleEqual(guess_chunks((), 8), ())
+
+    def test_region(self):
+        layout = ArrayLayout('<f8', (10, 20), (4, 8))
+        self.assertTupleEqual(layout.region((slice(2, 5), 3)), ((2, 3), (5, 4), (slice(None), 0)))
+        self.assertTupleEqual(layout.region(-1)[:2], ((9, 0), (10, 20)))
+        self.assertTupleEqual(layout.region((Ellipsis, slice(None, None, -2)))[:2], ((0, 1), (10, 20)))
+        self.assertListEqual(layout.names((2, 3), (5, 4)), ['0,0', '1,0'])
+        self.assertListEqual(layout.partial((0, 0), (4, 10)), ['0,1'])
+        with self.assertRaises(IndexError):
+            layout.region(10)
+        with self.assertRaises(IndexError):
+            layout.region((0, 0, 0))
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class ArrayTestMixin(object):
+
+    def setUp(self):
+        self.array = numpy.arange(100 * 60, dtype='<f4').reshape(100, 60)
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def test_get_slice(self):
+        self.blackboard.set('image', self.array, chunks=(16, 16))
+        for index in [numpy.s_[10:20, 5:40], numpy.s_[3], numpy.s_[..., 7], numpy.s_[::7, ::-3],
+                      numpy.s_[90:, -5:], numpy.s_[5:5], (42, 17)]:
+            numpy.testing.assert_array_equal(self.blackboard.get_slice('image', index), self.array[index])
+        numpy.testing.assert_array_equal(self.blackboard.get('image'), self.array)
+
+    def test_update_slice(self):
+        self.blackboard.set('image', self.array, chunks=(16, 16))
+        self.blackboard.update_slice('image', numpy.s_[10:40, 20:30], -1)
+        self.array[10:40, 20:30] = -1
+        self.blackboard.update_slice('image', numpy.s_[::9, 3], numpy.arange(12))
+        self.array[::9, 3] = numpy.arange(12)
+        numpy.testing.assert_array_equal(self.blackboard.get('image'), self.array)
+
+    def test_update(self):
+        received = []
+        self.blackboard.set('image', self.array, chunks=True, history=2)
+        self.blackboard.register_callback('image', received.append)
+        self.blackboard.update_slice('image', numpy.s_[0, 0], 7)
+        self.assertEqual(received[0][1], 7)
+        self.assertEqual(self.blackboard.get('image', version=2)[0, 0], 7)
+        self.blackboard.update('image', numpy.zeros((3, 3), dtype='i8'))
+        numpy.testing.assert_array_equal(self.blackboard.get_slice('image', numpy.s_[1:]), numpy.zeros((2, 3)))
+
+    def test_not_array(self):
+        self.blackboard.set('plain', self.array)
+        with self.assertRaises(exception.NotArray):
+            self.blackboard.get_slice('plain', 0)
+        self.blackboard.set('image', self.array, chunks=True, read_only=True)
+        with self.assertRaises(exception.NotEditable):
+            self.blackboard.update_slice('image', 0, 0)
+        with self.assertRaises(exception.UnsupportedDataType):
+            self.blackboard.get_raw('image')
+        with self.assertRaises(exception.UnsupportedDataType):
+            self.blackboard.set('objects', numpy.array([None, 1]), chunks=True)
+        with self.assertRaises(exception.UnsupportedDataType):
+            self.blackboard.set('list', [1, 2], chunks=True)
+
+
+class TestDictionaryArray(ArrayTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        super(TestDictionaryArray, self).setUp()
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY, namespace='array')
+
+
+class TestRedisArray(ArrayTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        super(TestRedisArray, self).setUp()
+        self.blackboard = Blackboard(SupportedMemoryType.REDIS, flush=True, buckets=4)
+
+    def test_reads_chunks_of_slice(self):
+        self.blackboard.set('image', self.array, chunks=(10, 60))
+        redis = self.blackboard._memory_wrapper._mem
+        with patch.object(redis, 'hmget', wraps=redis.hmget) as hmget:
+            self.blackboard.get_slice('image', numpy.s_[25:35])
+        self.assertListEqual(sorted(hmget.call_args[0][1]), ['2,0', '3,0'])
+        with patch.object(redis, 'hmget', wraps=redis.hmget) as hmget:
+            self.blackboard.update_slice('image', numpy.s_[20:30], 0)
+        # a covered chunk is written without being read
+        self.assertEqual(hmget.call_count, 0)
+
+
+class TestShardedRedisArray(ArrayTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        super(TestShardedRedisArray, self).setUp()
+        self.blackboard = Blackboard(SupportedMemoryType.SHARDED_REDIS, nodes=NODES, flush=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
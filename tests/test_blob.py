@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for streaming blobs of `gblackboard` package."""
+
+import gc
+import io
+import os
+import shutil
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+
+DIR_PATH = './gblackboard-blob'
+SPILL_DIR = './gblackboard-blob-chunks'
+NODES = ['node1:6379', 'node2:6379']
+PAYLOAD = bytes(range(256)) * 40
+
+
+class BlobTestMixin(object):
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def write(self, key, payload=PAYLOAD, **kwargs):
+        with self.blackboard.open_writer(key, chunk_size=1000, **kwargs) as writer:
+            # pieces smaller and larger than a chunk
+            writer.write(payload[:10])
+            writer.write(payload[10:2500])
+            writer.write(payload[2500:])
+        return writer
+
+    def test_round_trip(self):
+        writer = self.write('blob')
+        self.assertEqual(writer.size, len(PAYLOAD))
+        with self.blackboard.open_reader('blob') as reader:
+            self.assertEqual(reader.read(5), PAYLOAD[:5])
+            self.assertEqual(reader.read(), PAYLOAD[5:])
+            reader.seek(-1500, io.SEEK_END)
+            self.assertEqual(reader.read(600), PAYLOAD[-1500:-900])
+            self.assertEqual(reader.tell(), len(PAYLOAD) - 900)
+        self.assertEqual(self.blackboard.get('blob'), PAYLOAD)
+        self.assertEqual(self.blackboard._memory_wrapper._read_chunks('blob', 0, 100)[-1], PAYLOAD[10000:])
+
+    def test_empty_and_copy(self):
+        with self.blackboard.open_writer('empty'):
+            pass
+        self.assertEqual(self.blackboard.open_reader('empty').read(), b'')
+        # a blob can be copied from any file-like stream
+        with self.blackboard.open_writer('copy', chunk_size=1000) as writer:
+            shutil.copyfileobj(io.BytesIO(PAYLOAD), writer, 3000)
+        self.assertEqual(self.blackboard.get('copy'), PAYLOAD)
+
+    def test_published_on_close(self):
+        writer = self.blackboard.open_writer('blob', chunk_size=1000)
+        writer.write(PAYLOAD)
+        self.assertNotIn('blob', self.blackboard.keys())
+        writer.close()
+        self.assertIn('blob', self.blackboard.keys())
+        with self.assertRaises(exception.ExistingKey):
+            self.blackboard.open_writer('blob')
+        with self.assertRaises(exception.UnsupportedDataType):
+            self.blackboard.update('blob', b'')
+        self.blackboard.set('plain', PAYLOAD)
+        with self.assertRaises(exception.NotBlob):
+            self.blackboard.open_reader('plain')
+
+    def test_abort(self):
+        with self.assertRaises(RuntimeError):
+            with self.blackboard.open_writer('blob', chunk_size=1000) as writer:
+                writer.write(PAYLOAD)
+                raise RuntimeError
+        self.assertNotIn('blob', self.blackboard.keys())
+        self.assertListEqual(self.blackboard._memory_wrapper._blob_keys(), [])
+
+    def test_abandoned(self):
+        writer = self.blackboard.open_writer('partial', chunk_size=1000)
+        writer.write(PAYLOAD[:2500])
+        del writer
+        gc.collect()
+        self.assertNotIn('partial', self.blackboard.keys())
+        self.assertListEqual(self.blackboard._memory_wrapper._blob_keys(), [])
+
+    def test_drop_and_expiry(self):
+        self.write('blob')
+        self.write('temp', ttl=0.1)
+        self.blackboard.drop('blob')
+        time.sleep(0.3)
+        self.assertListEqual(self.blackboard._memory_wrapper._blob_keys(), [])
+        self.assertEqual(self.blackboard.stats()['bytes'], 0)
+
+    def test_save_and_load(self):
+        self.write('blob')
+        self.blackboard.set('plain', 1)
+        self.blackboard.save(DIR_PATH)
+        self.blackboard.clear()
+        self.blackboard.load(DIR_PATH)
+        self.assertEqual(self.blackboard.open_reader('blob').read(), PAYLOAD)
+        self.assertEqual(self.blackboard.get('plain'), 1)
+
+    def remove_dirs(self):
+        for path in (DIR_PATH, SPILL_DIR):
+            if os.path.exists(path):
+                shutil.rmtree(path)
+
+
+class TestDictionaryBlob(BlobTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY, namespace='blob')
+        self.addCleanup(self.remove_dirs)
+
+
+class TestFileBlob(BlobTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY, namespace='file-blob', spill_dir=SPILL_DIR)
+        self.addCleanup(self.remove_dirs)
+
+    def test_chunks_in_files(self):
+        self.write('blob')
+        self.assertEqual(len(os.listdir(SPILL_DIR)), 11)
+        copy = self.blackboard.copy('file-blob-copy')
+        self.blackboard.drop('blob')
+        self.assertEqual(copy.get('blob'), PAYLOAD)
+        copy.close()
+        self.assertListEqual(os.listdir(SPILL_DIR), [])
+
+
+class TestRedisBlob(BlobTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.REDIS, flush=True, buckets=4)
+        self.addCleanup(self.remove_dirs)
+
+    def test_layout(self):
+        self.write('blob')
+        redis = self.blackboard._memory_wrapper._mem
+        self.assertEqual(redis.hlen('gblackboard:blob:blob'), 11)
+        with patch.object(redis, 'hmget', wraps=redis.hmget) as hmget:
+            self.blackboard.open_reader('blob').read()
+        # chunks are fetched a few at a time
+        self.assertEqual(hmget.call_count, 3)
+        self.blackboard.clear()
+        self.assertFalse(redis.exists('gblackboard:blob:blob', 'gblackboard:blobs'))
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_dump_snapshot(self):
+        blackboard = Blackboard(SupportedMemoryType.REDIS, namespace='dump', snapshot='dump')
+        self.addCleanup(blackboard.close)
+        with blackboard.open_writer('blob', chunk_size=1000) as writer:
+            writer.write(PAYLOAD)
+        blackboard.save(DIR_PATH)
+        blackboard.clear()
+        blackboard.load(DIR_PATH)
+        self.assertEqual(blackboard.get('blob'), PAYLOAD)
+        self.assertEqual(blackboard.sizeof('blob'), blackboard.stats()['bytes'])
+
+
+class TestShardedRedisBlob(BlobTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.SHARDED_REDIS, nodes=NODES, flush=True)
+        self.addCleanup(self.remove_dirs)
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_reshard(self):
+        keys = ['blob{}'.format(index) for index in range(20)]
+        for key in keys:
+            self.write(key)
+        wrapper = self.blackboard._memory_wrapper
+        size = self.blackboard.stats()['bytes']
+        self.assertGreater(wrapper.add_node('node3:6379'), 0)
+        for key in keys:
+            self.assertEqual(self.blackboard.open_reader(key).read(), PAYLOAD)
+        self.assertEqual(self.blackboard.stats()['bytes'], size)
+        # the removed node is flushed after its keys have been moved
+        self.assertGreater(wrapper.remove_node('node1:6379'), 0)
+        for key in keys:
+            self.assertEqual(self.blackboard.get(key), PAYLOAD)
+        self.assertEqual(sorted(wrapper._blob_keys()), sorted(keys))
+        self.assertEqual(self.blackboard.stats()['bytes'], size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for bucketed hash layout of `RedisWrapper`."""
+
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.wrapper import RedisWrapper
+
+FILE_PATH = './gblackboard-buckets.pickle'
+
+
+class TestBucketedRedisWrapper(unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.wrapper = RedisWrapper(flush=True, buckets=8)
+        self.redis = self.wrapper._mem
+        self.data = {'key{}'.format(i): i for i in range(200)}
+        for key, value in self.data.items():
+            self.wrapper.set(key, value)
+
+    def tearDown(self):
+        self.wrapper.close()
+        if os.path.exists(FILE_PATH):
+            os.remove(FILE_PATH)
+
+    def test_layout(self):
+        self.assertFalse(self.redis.exists('gblackboard'))
+        sizes = [self.redis.hlen('gblackboard:{}'.format(index)) for index in range(8)]
+        self.assertEqual(sum(sizes), len(self.data))
+        self.assertTrue(all(size > 0 for size in sizes))
+        self.assertEqual(self.wrapper.get('key5'), 5)
+        self.assertTrue(self.wrapper.has('key5'))
+        self.assertTrue(self.wrapper.delete('key5'))
+        self.assertFalse(self.wrapper.has('key5'))
+        self.assertEqual(len(self.wrapper._keys()), len(self.data) - 1)
+
+    def test_save_load(self):
+        self.wrapper.save(FILE_PATH)
+        self.wrapper.flush()
+        self.assertEqual(self.redis.keys('gblackboard*'), [])
+        self.wrapper.load(FILE_PATH)
+        for key, value in self.data.items():
+            self.assertEqual(self.wrapper.get(key), value)
+
+    def test_stats(self):
+        stats = self.wrapper.stats()
+        self.assertEqual(sum(stats['buckets'].values()), len(self.data))
+        self.assertEqual(len(stats['buckets']), 8)
+        # fakeredis does not support `CONFIG GET`
+        self.assertEqual(stats['listpack_entries'], 128)
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_oversized_buckets(self):
+        wrapper = RedisWrapper(flush=False, buckets=8)
+        self.addCleanup(wrapper.close)
+        config = {'hash-max-listpack-entries': '16'}
+        with patch.object(wrapper._mem, 'config_get', return_value=config):
+            with self.assertLogs('gblackboard.wrapper', 'WARNING') as logs:
+                stats = wrapper.stats()
+        self.assertEqual(stats['listpack_entries'], 16)
+        self.assertIn('set `buckets` to about 25 or more', logs.output[0])
+        self.assertSetEqual(wrapper._oversized, set(stats['buckets']))
+
+    def test_expiry(self):
+        self.wrapper.expire('key1', 0.1)
+        time.sleep(0.3)
+        self.assertFalse(self.wrapper.has('key1'))
+        self.assertTrue(self.wrapper.has('key2'))
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_blackboard(self):
+        blackboard = Blackboard(SupportedMemoryType.REDIS, namespace='bucketed', buckets=4, flush=True)
+        blackboard.set('key', 'value')
+        copied = blackboard.copy('copied')
+        self.assertEqual(copied.get('key'), 'value')
+        self.assertEqual(sum(self.redis.hlen('gblackboard:{{copied}}:{}'.format(i)) for i in range(4)), 1)
+        copied.close()
+        blackboard.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
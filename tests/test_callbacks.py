@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for debounced, throttled and coalesced callbacks."""
+
+import threading
+import time
+import unittest
+
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard import InvalidCallbackOption, NotCallable
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.values = []
+        self.threads = []
+
+    def __call__(self, value):
+        self.values.append(value)
+        self.threads.append(threading.current_thread().name)
+
+
+class TestDeferredCallbacks(unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY)
+        self.blackboard.set('key', 0)
+        self.recorder = Recorder()
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def updates(self, count):
+        for value in range(1, count + 1):
+            self.blackboard.update('key', value)
+
+    def test_debounce(self):
+        self.blackboard.register_callback('key', self.recorder, debounce=0.1)
+        self.updates(50)
+        self.assertEqual(self.recorder.values, [])
+        time.sleep(0.3)
+        self.assertEqual(self.recorder.values, [50])
+        self.assertEqual(self.recorder.threads, ['gblackboard-timer'])
+
+    def test_throttle(self):
+        self.blackboard.register_callback('key', self.recorder, throttle=0.2)
+        self.updates(50)
+        # leading call is immediate
+        self.assertEqual(self.recorder.values, [1])
+        time.sleep(0.4)
+        self.assertEqual(self.recorder.values, [1, 50])
+        time.sleep(0.2)
+        self.blackboard.update('key', 51)
+        self.assertEqual(self.recorder.values, [1, 50, 51])
+
+    def test_coalesce(self):
+        self.blackboard.register_callback('key', self.recorder, coalesce=True)
+        self.updates(1000)
+        time.sleep(0.2)
+        self.assertEqual(self.recorder.values[-1], 1000)
+        self.assertLess(len(self.recorder.values), 1000)
+
+    def test_plain_callback_is_immediate(self):
+        self.blackboard.register_callback('key', self.recorder)
+        self.updates(3)
+        self.assertEqual(self.recorder.values, [1, 2, 3])
+
+    def test_remove_cancels_pending(self):
+        self.blackboard.register_callback('key', self.recorder, debounce=0.1)
+        self.updates(3)
+        self.blackboard.remove_callback('key', self.recorder)
+        time.sleep(0.2)
+        self.assertEqual(self.recorder.values, [])
+        self.blackboard.register_callback('key', self.recorder, coalesce=True)
+        self.updates(3)
+        self.blackboard.drop('key')
+        time.sleep(0.2)
+        self.assertEqual(self.recorder.values, [])
+
+    def test_invalid_options(self):
+        with self.assertRaises(InvalidCallbackOption):
+            self.blackboard.register_callback('key', self.recorder, debounce=0.1, throttle=0.1)
+        with self.assertRaises(NotCallable):
+            self.blackboard.register_callback('key', None, coalesce=True)
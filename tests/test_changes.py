@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the change log of `gblackboard` package."""
+
+import os
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import fakeredis
+import redis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.changes import ChangeLog
+from gblackboard.wrapper import parse_node
+
+DIR_PATH = './gblackboard-changes'
+NODES = ['node1:6379', 'node2:6379']
+
+
+class TestChangeLog(unittest.TestCase):
+
+    def test_read(self):
+        log = ChangeLog(3)
+        for key in 'abcd':
+            log.append('set', key)
+        self.assertListEqual(log.read(), [(2, 'set', 'b'), (3, 'set', 'c'), (4, 'set', 'd')])
+        self.assertListEqual(log.read(since=1), log.read())
+        self.assertListEqual(log.read(since=3), [(4, 'set', 'd')])
+        self.assertListEqual(log.read(since=2, count=1), [(3, 'set', 'c')])
+        self.assertListEqual(log.read(since=4), [])
+        with self.assertRaises(exception.ChangeLogTruncated):
+            log.read(since=0)
+        # a group which fell behind continues from the oldest kept change
+        self.assertListEqual(log.read_group('g1'), log.read())
+
+    def test_groups(self):
+        log = ChangeLog(10)
+        log.append('set', 'a')
+        self.assertListEqual(log.read_group('g1'), [(1, 'set', 'a')])
+        log.append('delete', 'a')
+        self.assertListEqual(log.read_group('g1'), [(2, 'delete', 'a')])
+        self.assertListEqual(log.read_group('g1'), [])
+        self.assertEqual(len(log.read_group('g2')), 2)
+
+
+class ChangesTestMixin(object):
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def summary(self, changes):
+        return [(operation, key) for _, operation, key in changes]
+
+    def test_changes(self):
+        self.blackboard.set('a', 1)
+        self.blackboard.set('b', {'x': 1}, structured=True)
+        self.blackboard.update('a', 2)
+        self.blackboard.drop('a')
+        changes = self.blackboard.changes()
+        self.assertListEqual(self.summary(changes),
+                             [('set', 'a'), ('set', 'b'), ('set', 'a'), ('delete', 'a')])
+        # catch up from the last seen change
+        self.blackboard.set('c', 3)
+        self.assertListEqual(self.summary(self.blackboard.changes(since=changes[-1][0])), [('set', 'c')])
+        self.assertListEqual(self.summary(self.blackboard.changes(count=1)), [('set', 'a')])
+
+    def test_expire_and_flush(self):
+        self.blackboard.set('temp', 0, ttl=0.1)
+        time.sleep(0.3)
+        self.blackboard.clear()
+        self.assertIn(('expire', 'temp'), self.summary(self.blackboard.changes()))
+        self.assertEqual(self.summary(self.blackboard.changes())[-1], ('flush', None))
+
+    def test_groups(self):
+        self.blackboard.set('a', 1)
+        self.assertListEqual(self.summary(self.blackboard.changes(group='viewer')), [('set', 'a')])
+        self.blackboard.set('b', 1)
+        self.assertListEqual(self.summary(self.blackboard.changes(group='viewer')), [('set', 'b')])
+        self.assertListEqual(self.blackboard.changes(group='viewer'), [])
+
+    def test_load(self):
+        self.blackboard.set('a', 1)
+        self.blackboard.save(DIR_PATH)
+        self.blackboard.clear()
+        self.blackboard.load(DIR_PATH)
+        self.assertEqual(self.summary(self.blackboard.changes())[-1], ('load', None))
+
+    def remove_dir(self):
+        if os.path.exists(DIR_PATH):
+            for name in os.listdir(DIR_PATH):
+                os.remove(os.path.join(DIR_PATH, name))
+            os.rmdir(DIR_PATH)
+
+
+class TestDictionaryChanges(ChangesTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY, namespace='changes', change_log=100)
+        self.addCleanup(self.remove_dir)
+
+    def test_disabled(self):
+        blackboard = Blackboard(SupportedMemoryType.DICTIONARY, namespace='no-changes')
+        self.addCleanup(blackboard.close)
+        with self.assertRaises(exception.ChangeLogDisabled):
+            blackboard.changes()
+
+    def test_capped(self):
+        for index in range(150):
+            self.blackboard.set('key{}'.format(index), index)
+        changes = self.blackboard.changes()
+        self.assertEqual(len(changes), 100)
+        self.assertEqual(changes[0][2], 'key50')
+        self.assertEqual(len(self.blackboard.changes(since=changes[0][0] - 1)), 100)
+        with self.assertRaises(exception.ChangeLogTruncated):
+            self.blackboard.changes(since=changes[0][0] - 2)
+
+
+class TestRedisChanges(ChangesTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.REDIS, flush=True, buckets=4, change_log=100)
+        self.addCleanup(self.remove_dir)
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_write_behind(self):
+        blackboard = Blackboard(SupportedMemoryType.REDIS, namespace='buffered', write_behind=True, change_log=100)
+        self.addCleanup(blackboard.close)
+        blackboard.set('a', 1)
+        blackboard.sync()
+        self.assertListEqual(self.summary(blackboard.changes()), [('set', 'a')])
+
+    def test_truncated(self):
+        self.blackboard.set('a', 1)
+        since = self.blackboard.changes()[-1][0]
+        self.assertListEqual(self.blackboard.changes(since=since), [])
+        for index in range(300):
+            self.blackboard.set('key{}'.format(index), index)
+        redis = self.blackboard._memory_wrapper._mem
+        # the stream is trimmed approximately
+        redis.xtrim('gblackboard:changes', maxlen=100, approximate=False)
+        with self.assertRaises(exception.ChangeLogTruncated):
+            self.blackboard.changes(since=since)
+        first = self.blackboard.changes(count=1)[0][0]
+        self.assertEqual(len(self.blackboard.changes(since=first)), 99)
+
+    def test_single_round_trip(self):
+        redis = self.blackboard._memory_wrapper._mem
+        with patch.object(redis, 'pipeline', wraps=redis.pipeline) as pipeline:
+            self.blackboard.set('a', 1)
+            self.blackboard.drop('a')
+        self.assertEqual(pipeline.call_count, 2)
+        self.assertEqual(redis.xlen('gblackboard:changes'), 2)
+
+
+class TestShardedRedisChanges(ChangesTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.SHARDED_REDIS, nodes=NODES, flush=True, change_log=100)
+        self.addCleanup(self.remove_dir)
+
+    def test_expire_and_flush(self):
+        self.blackboard.set('temp', 0, ttl=0.1)
+        time.sleep(0.3)
+        self.blackboard.clear()
+        changes = self.summary(self.blackboard.changes())
+        self.assertIn(('expire', 'temp'), changes)
+        # every node logs its flush
+        self.assertEqual(changes.count(('flush', None)), len(NODES))
+
+    def test_changes(self):
+        self.blackboard.set('a', 1)
+        self.blackboard.set('b', {'x': 1}, structured=True)
+        self.blackboard.update('a', 2)
+        self.blackboard.drop('a')
+        changes = self.blackboard.changes()
+        # the streams of the nodes are merged by stream id; the changes of a key keep their order
+        self.assertListEqual([change for change in self.summary(changes) if change[1] == 'a'],
+                             [('set', 'a'), ('set', 'a'), ('delete', 'a')])
+        self.assertIn(('set', 'b'), self.summary(changes))
+        self.blackboard.set('c', 3)
+        self.assertListEqual(self.summary(self.blackboard.changes(since=changes[-1][0])), [('set', 'c')])
+        self.assertEqual(len(self.blackboard.changes(count=2)), 2)
+
+    def test_failed_write(self):
+        wrapper = self.blackboard._memory_wrapper
+        key = next(key for key in ('key{}'.format(index) for index in range(100))
+                   if wrapper._ring.get(key) != parse_node(NODES[0])[1])
+        shard = wrapper._shard(key)
+        pipeline = shard._mem.pipeline
+
+        def failing_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            pipe.execute = Mock(side_effect=redis.ConnectionError)
+            return pipe
+
+        with patch.object(shard._mem, 'pipeline', failing_pipeline):
+            with self.assertRaises(exception.RedisNotConnected):
+                self.blackboard.set(key, 0)
+        # the change is logged in the transaction of the write, on the node of the key
+        self.assertListEqual(self.blackboard.changes(), [])
+        self.blackboard.set(key, 0)
+        self.assertListEqual(self.summary(self.blackboard.changes()), [('set', key)])
+        self.assertEqual(shard._mem.xlen(shard._changes_key), 1)
+
+    def test_remove_node(self):
+        for index in range(10):
+            self.blackboard.set('key{}'.format(index), index)
+        since = self.blackboard.changes()[-1][0]
+        wrapper = self.blackboard._memory_wrapper
+        wrapper.remove_node(NODES[0])
+        self.blackboard.set('new', 0)
+        self.assertListEqual(self.summary(self.blackboard.changes(since=since)), [('set', 'new')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the circuit breaker of `RedisWrapper`."""
+
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+import redis
+
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard import RedisCircuitOpen, RedisNotConnected
+from gblackboard.circuit import CircuitBreaker
+from gblackboard.wrapper import RedisWrapper
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_and_probes(self):
+        answers = [False, True]
+        breaker = CircuitBreaker(lambda: answers.pop(0), threshold=2, probe_interval=0.05)
+        self.addCleanup(breaker.reset)
+        breaker.failure()
+        breaker.success()
+        breaker.failure()
+        self.assertEqual(breaker.state, 'closed')
+        breaker.failure()
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(breaker.allow())
+        # the first probe fails, the second one closes the breaker
+        self.assertTrue(wait_for(lambda: breaker.state == 'closed'))
+        self.assertEqual(answers, [])
+        self.assertTrue(breaker.allow())
+
+    def test_reset(self):
+        breaker = CircuitBreaker(lambda: False, threshold=1, probe_interval=0.05)
+        breaker.failure()
+        self.assertEqual(breaker.state, 'open')
+        breaker.reset()
+        self.assertEqual(breaker.state, 'closed')
+        time.sleep(0.15)
+        self.assertEqual(breaker.state, 'closed')
+
+
+class TestRedisCircuitBreaker(unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.wrapper = RedisWrapper(flush=True, circuit_breaker=3, probe_interval=0.05, stale_cache=2)
+        self.healthy = True
+        self.wrapper._ping = lambda: self.healthy
+
+    def tearDown(self):
+        self.wrapper.close()
+
+    def break_redis(self):
+        self.healthy = False
+        patcher = patch.object(self.wrapper._mem, 'hget', side_effect=redis.TimeoutError)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return patcher
+
+    def test_fail_fast(self):
+        hget = self.break_redis().target.hget
+        for _ in range(3):
+            with self.assertRaises(RedisNotConnected):
+                self.wrapper.get('missing')
+        self.assertEqual(self.wrapper.circuit_state, 'open')
+        self.assertEqual(hget.call_count, 3)
+        with self.assertRaises(RedisCircuitOpen):
+            self.wrapper.get('missing')
+        with self.assertRaises(RedisCircuitOpen):
+            self.wrapper.set('key', 1)
+        self.assertEqual(hget.call_count, 3)
+
+    def test_recovers_after_probe(self):
+        patcher = self.break_redis()
+        for _ in range(3):
+            with self.assertRaises(RedisNotConnected):
+                self.wrapper.get('key')
+        patcher.stop()
+        time.sleep(0.15)
+        # still open while probes fail
+        self.assertEqual(self.wrapper.circuit_state, 'open')
+        self.healthy = True
+        self.assertTrue(wait_for(lambda: self.wrapper.circuit_state == 'closed'))
+        self.assertTrue(self.wrapper.set('key', 1))
+        self.assertEqual(self.wrapper.get('key'), 1)
+
+    def test_stale_cache(self):
+        self.wrapper.set('a', 'A')
+        self.wrapper.set('b', 'B')
+        self.wrapper.set('c', 'C')
+        self.wrapper.get('b')
+        self.wrapper.delete('c')
+        self.break_redis()
+        with patch.object(self.wrapper._mem, 'hexists', side_effect=redis.ConnectionError):
+            for _ in range(3):
+                self.assertEqual(self.wrapper.get('b'), 'B')
+            self.assertEqual(self.wrapper.circuit_state, 'open')
+            self.assertEqual(self.wrapper.get('b'), 'B')
+            self.assertTrue(self.wrapper.has('b'))
+            # only the 2 latest values are kept
+            with self.assertRaises(RedisCircuitOpen):
+                self.wrapper.get('a')
+            with self.assertRaises(RedisCircuitOpen):
+                self.wrapper.has('c')
+
+    def test_disabled(self):
+        with patch('redis.Redis', fakeredis.FakeRedis):
+            wrapper = RedisWrapper(flush=True)
+        self.assertIsNone(wrapper.circuit_state)
+        with patch.object(wrapper._mem, 'hget', side_effect=redis.ConnectionError):
+            for _ in range(5):
+                with self.assertRaises(RedisNotConnected):
+                    wrapper.get('key')
+        wrapper.close()
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_blackboard(self):
+        blackboard = Blackboard(SupportedMemoryType.REDIS, circuit_breaker=1, stale_cache=10)
+        self.addCleanup(blackboard.close)
+        blackboard.set('key', 'value')
+        self.assertEqual(blackboard._memory_wrapper.circuit_state, 'closed')
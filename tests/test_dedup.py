@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for deduplicated values of `gblackboard` package."""
+
+import os
+import shutil
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.wrapper import RedisWrapper, DEDUP_REF
+
+DIR_PATH = './gblackboard-dedup'
+FILE_PATH = os.path.join(DIR_PATH, '.gblackboard.pickle')
+NODES = ['node1:6379', 'node2:6379']
+PAYLOAD = list(range(2000))
+
+
+class DedupTestMixin(object):
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def remove_dir(self):
+        if os.path.exists(DIR_PATH):
+            shutil.rmtree(DIR_PATH)
+
+    def test_shared(self):
+        for index in range(10):
+            self.blackboard.set('copy{}'.format(index), PAYLOAD)
+        self.blackboard.set('small', 1)
+        self.assertEqual(self.contents(), 1)
+        self.assertListEqual(self.blackboard.get('copy3'), PAYLOAD)
+        self.assertListEqual(self.blackboard._memory_wrapper.get_many(['copy0', 'copy9'])['copy9'], PAYLOAD)
+        # logical sizes are unchanged
+        self.assertEqual(self.blackboard.sizeof('copy0'), self.blackboard.sizeof('copy1'))
+        self.blackboard.update('copy0', PAYLOAD[::-1])
+        self.assertEqual(self.contents(), 2)
+        self.assertListEqual(self.blackboard.get('copy0'), PAYLOAD[::-1])
+
+    def test_released(self):
+        for index in range(4):
+            self.blackboard.set('copy{}'.format(index), PAYLOAD, ttl=0.1 if index == 3 else None)
+        self.blackboard.drop('copy0')
+        self.blackboard._memory_wrapper.delete_many(['copy1'])
+        self.assertEqual(self.contents(), 1)
+        self.blackboard.drop('copy2')
+        time.sleep(0.3)
+        self.assertNotIn('copy3', self.blackboard.keys())
+        self.assertEqual(self.contents(), 0)
+        self.blackboard.set('copy', PAYLOAD)
+        self.blackboard.clear()
+        self.assertEqual(self.contents(), 0)
+
+    def test_save_and_load(self):
+        self.addCleanup(self.remove_dir)
+        self.blackboard.set('copy', PAYLOAD)
+        self.blackboard.save(DIR_PATH)
+        single = os.path.getsize(FILE_PATH)
+        for index in range(10):
+            self.blackboard.set('copy{}'.format(index), PAYLOAD)
+        self.blackboard.save(DIR_PATH)
+        # the value is written once
+        self.assertLess(os.path.getsize(FILE_PATH), single * 1.2)
+        self.blackboard.clear()
+        self.blackboard.load(DIR_PATH)
+        self.assertListEqual(self.blackboard.get('copy7'), PAYLOAD)
+        self.assertEqual(self.contents(), 1)
+
+
+class TestDictionaryDedup(DedupTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY, namespace='dedup', dedup=64)
+
+    def contents(self):
+        return len(self.blackboard._memory_wrapper._mem._contents)
+
+    def test_identical_objects(self):
+        self.blackboard.set('a', PAYLOAD)
+        self.blackboard.set('b', PAYLOAD)
+        memory = self.blackboard._memory_wrapper._mem
+        self.assertIs(memory.get('a'), memory.get('b'))
+        copy = self.blackboard.copy('dedup-copy')
+        self.blackboard.drop('a')
+        self.assertEqual(len(copy._memory_wrapper._mem._contents), 1)
+        copy.close()
+
+    def test_bounded(self):
+        blackboard = Blackboard(SupportedMemoryType.DICTIONARY, namespace='dedup-bounded', dedup=64,
+                                max_bytes=20000)
+        self.addCleanup(blackboard.close)
+        size = len(blackboard._memory_wrapper._serialize(PAYLOAD))
+        for index in range(10):
+            blackboard.set('copy{}'.format(index), PAYLOAD)
+        wrapper = blackboard._memory_wrapper
+        # the shared contents are counted once, so nothing is evicted
+        self.assertEqual(wrapper.eviction_stats['used_bytes'], size)
+        self.assertEqual(wrapper.eviction_stats['evictions'], 0)
+        blackboard.update('copy0', PAYLOAD[::-1])
+        self.assertEqual(wrapper.eviction_stats['used_bytes'], size * 2)
+        for index in range(1, 10):
+            blackboard.drop('copy{}'.format(index))
+        self.assertEqual(wrapper.eviction_stats['used_bytes'], size)
+        blackboard.drop('copy0')
+        self.assertEqual(wrapper.eviction_stats['used_bytes'], 0)
+
+
+class TestRedisDedup(DedupTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.REDIS, flush=True, buckets=4, dedup=64)
+
+    def contents(self):
+        redis = self.blackboard._memory_wrapper._mem
+        self.assertEqual(redis.hlen('gblackboard:cas'), redis.hlen('gblackboard:cas:refs'))
+        return redis.hlen('gblackboard:cas')
+
+    def test_references(self):
+        self.blackboard.set('a', PAYLOAD)
+        wrapper = self.blackboard._memory_wrapper
+        redis = wrapper._mem
+        self.assertTrue(redis.hget(wrapper._bucket('a'), 'a').startswith(DEDUP_REF))
+        self.blackboard.set('b', PAYLOAD)
+        self.assertEqual(redis.hget('gblackboard:cas:refs', redis.hget('gblackboard:cas:keys', 'b')), b'2')
+        # a composite header replaces the reference
+        self.blackboard.drop('a')
+        self.blackboard.set('a', {'x': 1}, structured=True)
+        self.blackboard._memory_wrapper.set_raw('b', b'raw')
+        self.assertEqual(self.contents(), 0)
+        self.assertEqual(redis.hlen('gblackboard:cas:keys'), 0)
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_dump_snapshot(self):
+        self.addCleanup(self.remove_dir)
+        blackboard = Blackboard(SupportedMemoryType.REDIS, namespace='dump', snapshot='dump', dedup=64)
+        self.addCleanup(blackboard.close)
+        blackboard.set('a', PAYLOAD)
+        blackboard.set('b', PAYLOAD)
+        blackboard.save(DIR_PATH)
+        blackboard.clear()
+        blackboard.load(DIR_PATH)
+        self.assertListEqual(blackboard.get('b'), PAYLOAD)
+        blackboard.drop('a')
+        blackboard.drop('b')
+        self.assertEqual(blackboard._memory_wrapper._mem.hlen('gblackboard:{dump}:cas'), 0)
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_config(self):
+        with self.assertRaises(exception.RedisWrongConfig):
+            RedisWrapper(dedup=64, write_behind=True)
+
+
+class TestShardedRedisDedup(DedupTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.SHARDED_REDIS, nodes=NODES, flush=True, dedup=64)
+
+    def copies(self):
+        return [shard._mem.hlen('gblackboard:cas') for shard in self.blackboard._memory_wrapper._shards.values()]
+
+    def contents(self):
+        digests = set()
+        for shard in self.blackboard._memory_wrapper._shards.values():
+            digests.update(shard._mem.hkeys('gblackboard:cas'))
+        return len(digests)
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_rebalance(self):
+        # each node keeps its own copy of a value
+        for index in range(10):
+            self.blackboard.set('copy{}'.format(index), PAYLOAD)
+        self.assertListEqual(self.copies(), [1, 1])
+        self.blackboard._memory_wrapper.add_node('node3:6379')
+        self.assertListEqual(self.copies(), [1, 1, 1])
+        self.blackboard._memory_wrapper.remove_node('node1:6379')
+        self.assertListEqual(self.copies(), [1, 1])
+        self.assertListEqual(self.blackboard.get('copy3'), PAYLOAD)
+
+    def test_save_and_load(self):
+        self.addCleanup(self.remove_dir)
+        for index in range(10):
+            self.blackboard.set('copy{}'.format(index), PAYLOAD)
+        self.blackboard.save(DIR_PATH)
+        self.blackboard.clear()
+        self.blackboard.load(DIR_PATH)
+        self.assertListEqual(self.blackboard.get('copy7'), PAYLOAD)
+        self.assertListEqual(self.copies(), [1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
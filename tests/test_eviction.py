@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for memory-bounded `DictionaryWrapper`."""
+
+import os
+import shutil
+import unittest
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.eviction import LRUPolicy, LFUPolicy
+from gblackboard.wrapper import DictionaryWrapper, MemoryWrapper
+
+SPILL_DIR = './.gblackboard-spill'
+VALUE = 'x' * 100
+VALUE_SIZE = len(MemoryWrapper.transform_value_to_pickle(VALUE))
+
+
+class TestEvictionPolicy(unittest.TestCase):
+
+    def test_lru(self):
+        policy = LRUPolicy()
+        for key in 'abc':
+            policy.add(key)
+        policy.touch('a')
+        self.assertListEqual(list(policy.victims()), ['b', 'c', 'a'])
+        policy.remove('c')
+        self.assertListEqual(list(policy.victims()), ['b', 'a'])
+
+    def test_lfu(self):
+        policy = LFUPolicy()
+        for key in 'abc':
+            policy.add(key)
+        policy.touch('a')
+        policy.touch('a')
+        policy.touch('c')
+        self.assertListEqual(list(policy.victims()), ['b', 'c', 'a'])
+        policy.remove('b')
+        self.assertListEqual(list(policy.victims()), ['c', 'a'])
+
+
+class TestBoundedDictionaryWrapper(unittest.TestCase):
+
+    def tearDown(self):
+        self.wrapper.close()
+        if os.path.exists(SPILL_DIR):
+            shutil.rmtree(SPILL_DIR)
+
+    def test_lru_eviction(self):
+        self.wrapper = DictionaryWrapper(max_bytes=VALUE_SIZE * 2)
+        discarded = []
+        self.wrapper.on_discard = discarded.extend
+        self.wrapper.set('a', VALUE)
+        self.wrapper.set('b', VALUE)
+        self.wrapper.get('a')
+        self.wrapper.set('c', VALUE)
+        self.assertListEqual(discarded, ['b'])
+        self.assertFalse(self.wrapper.has('b'))
+        self.assertEqual(self.wrapper.get('a'), VALUE)
+        stats = self.wrapper.eviction_stats
+        self.assertEqual(stats['used_bytes'], VALUE_SIZE * 2)
+        self.assertEqual(stats['evictions'], 1)
+
+    def test_lfu_eviction(self):
+        self.wrapper = DictionaryWrapper(max_bytes=VALUE_SIZE * 2, eviction='lfu')
+        discarded = []
+        self.wrapper.on_discard = discarded.extend
+        self.wrapper.set('a', VALUE)
+        self.wrapper.set('b', VALUE)
+        self.wrapper.get('a')
+        self.wrapper.get('b')
+        self.wrapper.get('b')
+        # newly written key is never its own victim
+        self.wrapper.set('c', VALUE)
+        self.assertListEqual(discarded, ['a'])
+
+    def test_spill(self):
+        self.wrapper = DictionaryWrapper(max_bytes=VALUE_SIZE, spill_dir=SPILL_DIR)
+        self.wrapper.set('a', VALUE)
+        self.wrapper.set('b', VALUE + 'b')
+        self.assertTrue(self.wrapper.has('a'))
+        self.assertEqual(self.wrapper.eviction_stats['spilled_keys'], 1)
+        self.assertIn('a', self.wrapper._get_all())
+        # reloading `a` spills `b`
+        self.assertEqual(self.wrapper.get('a'), VALUE)
+        self.assertEqual(self.wrapper.get('b'), VALUE + 'b')
+        stats = self.wrapper.eviction_stats
+        self.assertEqual(stats['spills'], 3)
+        self.assertEqual(stats['reloads'], 2)
+        self.assertTrue(self.wrapper.delete('a'))
+        self.assertFalse(self.wrapper.has('a'))
+        self.assertEqual(self.wrapper.eviction_stats['spilled_keys'], 0)
+
+    def test_unsupported_policy(self):
+        self.wrapper = DictionaryWrapper()
+        with self.assertRaises(exception.UnsupportedEvictionPolicy):
+            DictionaryWrapper(max_bytes=1, eviction='fifo')
+
+    def test_blackboard_meta_info(self):
+        blackboard = Blackboard(SupportedMemoryType.DICTIONARY, max_bytes=VALUE_SIZE)
+        self.wrapper = blackboard._memory_wrapper
+        blackboard.set('a', VALUE)
+        blackboard.set('b', VALUE)
+        self.assertListEqual(blackboard.keys(in_list=True), ['b'])
+        with self.assertRaises(exception.NonExistingKey):
+            blackboard.get('a')
+
+    def test_discarded_history(self):
+        blackboard = Blackboard(SupportedMemoryType.DICTIONARY, namespace='evicted-history', max_bytes=VALUE_SIZE)
+        self.wrapper = blackboard._memory_wrapper
+        blackboard.set('h', VALUE, history=3)
+        blackboard.update('h', VALUE)
+        blackboard.set('b', VALUE)
+        self.assertNotIn('h', self.wrapper._mem._history)
+        blackboard.drop('b')
+        blackboard.set('h', 1, history=3)
+        self.assertListEqual([(version, value) for version, _, value in blackboard.history('h')], [(1, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for key expiry of `gblackboard` package."""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.timer import TimerWheel
+from gblackboard.wrapper import RedisWrapper
+
+
+class TestTimerWheel(unittest.TestCase):
+
+    def setUp(self):
+        self.wheel = TimerWheel(tick=0.01, slots=8)
+        self.fired = []
+
+    def tearDown(self):
+        self.wheel.stop()
+
+    def test_schedule_cancel(self):
+        self.wheel.schedule(0.02, self.fired.append, 'a')
+        handle = self.wheel.schedule(0.02, self.fired.append, 'b')
+        # longer than a whole round of the wheel
+        self.wheel.schedule(0.15, self.fired.append, 'c')
+        self.assertTrue(self.wheel.cancel(handle))
+        time.sleep(0.08)
+        self.assertListEqual(self.fired, ['a'])
+        time.sleep(0.2)
+        self.assertListEqual(self.fired, ['a', 'c'])
+        self.assertFalse(self.wheel.cancel(handle))
+
+
+class ExpiryTestMixin(object):
+
+    def test_ttl(self):
+        self.blackboard.set('heartbeat', 1, ttl=0.1)
+        self.blackboard.set('config', 2)
+        self.blackboard.register_callback('heartbeat', print)
+        self.assertEqual(self.blackboard.get('heartbeat'), 1)
+        time.sleep(0.3)
+        self.assertListEqual(self.blackboard.keys(in_list=True), ['config'])
+        with self.assertRaises(exception.NonExistingKey):
+            self.blackboard.get('heartbeat')
+        # expired key can be set again
+        self.blackboard.set('heartbeat', 3)
+        self.assertEqual(self.blackboard.get('heartbeat'), 3)
+
+    def test_expire(self):
+        self.blackboard.set('detection', 'person')
+        self.assertTrue(self.blackboard.expire('detection', 0.1))
+        self.blackboard.set('persistent', 'value', ttl=0.1)
+        self.assertTrue(self.blackboard.expire('persistent', None))
+        time.sleep(0.3)
+        self.assertListEqual(self.blackboard.keys(in_list=True), ['persistent'])
+        with self.assertRaises(exception.NonExistingKey):
+            self.blackboard.expire('detection', 1.0)
+
+    def test_update_keeps_ttl(self):
+        self.blackboard.set('heartbeat', 1, ttl=0.1)
+        self.blackboard.update('heartbeat', 2)
+        time.sleep(0.3)
+        self.assertNotIn('heartbeat', self.blackboard.keys())
+
+    def test_drop_before_expiry(self):
+        self.blackboard.set('detection', 'person', ttl=0.1)
+        self.blackboard.drop('detection')
+        self.blackboard.set('detection', 'car')
+        time.sleep(0.3)
+        self.assertEqual(self.blackboard.get('detection'), 'car')
+
+    def test_expiry_while_iterating(self):
+        for index in range(2000):
+            self.blackboard.set('key{}'.format(index), index, ttl=0.05)
+        deadline = time.monotonic() + 10.0
+        while len(self.blackboard.keys()) and time.monotonic() < deadline:
+            # expired keys leave the meta info on this thread only, so the view does not change under the loop
+            for key in self.blackboard.keys():
+                pass
+        self.assertEqual(len(self.blackboard.keys()), 0)
+        self.assertEqual(self.blackboard.count('key'), 0)
+
+
+class TestDictionaryExpiry(ExpiryTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY)
+
+    def tearDown(self):
+        self.blackboard.close()
+
+
+class TestRedisExpiry(ExpiryTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.REDIS, flush=True)
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def test_reap(self):
+        wrapper = self.blackboard._memory_wrapper
+        self.blackboard.set('detection', 'person', ttl=10.0)
+        # pretend that another process set an expired key
+        wrapper._cancel_expiries()
+        wrapper._mem.zadd('gblackboard:expiry', {'detection': time.time() - 1.0})
+        self.assertListEqual(wrapper.reap(), ['detection'])
+        self.assertListEqual(self.blackboard.keys(in_list=True), [])
+        self.assertFalse(wrapper.has('detection'))
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_sweep(self):
+        # a process which set a ttl closes without flushing, so its timers are gone
+        other = Blackboard(SupportedMemoryType.REDIS, flush=False, reap_interval=0)
+        other.set('detection', 'person', ttl=0.1)
+        other.close()
+        wrapper = RedisWrapper(flush=False, reap_interval=0.1)
+        self.addCleanup(wrapper.close)
+        time.sleep(0.5)
+        self.assertFalse(wrapper.has('detection'))
+        self.assertEqual(wrapper._mem.zcard('gblackboard:expiry'), 0)
+
+    def test_reaper_thread(self):
+        wrapper = self.blackboard._memory_wrapper
+        self.blackboard.set('config', 1)
+        # a wrapper which uses no expiry does not sweep
+        self.assertIsNone(wrapper._reaper)
+        threads = []
+        discard_expired = wrapper._discard_expired
+
+        def record(key):
+            threads.append(threading.current_thread().name)
+            return discard_expired(key)
+        with patch.object(wrapper, '_discard_expired', side_effect=record):
+            self.blackboard.set('detection', 'person', ttl=0.1)
+            time.sleep(0.3)
+        self.assertNotIn('detection', self.blackboard.keys())
+        # round trips to Redis never run on the shared timer thread
+        self.assertListEqual(threads, ['gblackboard-reaper'])
+        # closing the blackboard (in tearDown) stops the thread
+        self.addCleanup(lambda: self.assertIsNone(wrapper._reaper))
+
+    def test_reaped_elsewhere(self):
+        self.blackboard.set('detection', 'person', ttl=0.2)
+        wrapper = self.blackboard._memory_wrapper
+        # another process sweeps the key before the timer of this one fires
+        wrapper._mem.hdel(wrapper._bucket('detection'), 'detection')
+        wrapper._mem.zrem('gblackboard:expiry', 'detection')
+        time.sleep(0.4)
+        self.assertListEqual(self.blackboard.keys(in_list=True), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the read-through loader of `gblackboard` package."""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+
+NODES = ['node1:6379', 'node2:6379']
+
+
+class Loader(object):
+
+    def __init__(self, value='loaded', delay=0.0, error=None):
+        self.value = value
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def run_threads(count, target):
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class GetOrLoadTestMixin(object):
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def test_miss_and_hit(self):
+        loader = Loader()
+        self.assertEqual(self.blackboard.get_or_load('key', loader, read_only=True), 'loaded')
+        self.assertEqual(self.blackboard.get_or_load('key', loader), 'loaded')
+        self.assertEqual(loader.calls, 1)
+        with self.assertRaises(exception.NotEditable):
+            self.blackboard.update('key', 'changed')
+        with self.assertRaises(exception.KeyNotString):
+            self.blackboard.get_or_load(1, loader)
+
+    def test_single_flight(self):
+        loader = Loader(delay=0.1)
+        results = run_threads(8, lambda: self.blackboard.get_or_load('key', loader))
+        self.assertEqual(loader.calls, 1)
+        self.assertListEqual(results, ['loaded'] * 8)
+
+    def test_error(self):
+        loader = Loader(delay=0.1, error=RuntimeError('failed'))
+        results = run_threads(4, lambda: self.blackboard.get_or_load('key', loader))
+        self.assertEqual(loader.calls, 1)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertNotIn('key', self.blackboard.keys())
+        # the next miss loads again
+        self.assertEqual(self.blackboard.get_or_load('key', Loader()), 'loaded')
+
+    def test_expiry(self):
+        loader = Loader()
+        self.blackboard.get_or_load('key', loader, ttl=0.1)
+        time.sleep(0.3)
+        self.blackboard.get_or_load('key', loader)
+        self.assertEqual(loader.calls, 2)
+
+
+class TestDictionaryGetOrLoad(GetOrLoadTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY, namespace='get-or-load')
+
+
+class RedisGetOrLoadTestMixin(GetOrLoadTestMixin):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def other(self):
+        # a blackboard of another process on the same memory
+        other = Blackboard(self.memory_type, flush=False, **self.config)
+        self.addCleanup(other.close)
+        return other
+
+    def test_processes(self):
+        loader = Loader(delay=0.1)
+        blackboards = [self.blackboard] + [self.other() for _ in range(3)]
+        blackboards = blackboards * 2
+        results = run_threads(len(blackboards), lambda: blackboards.pop().get_or_load('key', loader))
+        self.assertEqual(loader.calls, 1)
+        self.assertListEqual(results, ['loaded'] * 8)
+
+    def test_held_lease(self):
+        other = self.other()
+        token = other._memory_wrapper.acquire_lease('key', 10.0)
+        self.assertIsNone(self.blackboard._memory_wrapper.acquire_lease('key', 10.0))
+
+        def load_elsewhere():
+            time.sleep(0.1)
+            other.set('key', 'elsewhere')
+            other._memory_wrapper.release_lease('key', token)
+        thread = threading.Thread(target=load_elsewhere)
+        thread.start()
+        loader = Loader()
+        self.assertEqual(self.blackboard.get_or_load('key', loader), 'elsewhere')
+        thread.join()
+        self.assertEqual(loader.calls, 0)
+        self.assertFalse(self.blackboard._memory_wrapper.release_lease('key', token))
+
+    def test_expired_lease(self):
+        # the holder of the lease died without releasing it
+        self.other()._memory_wrapper.acquire_lease('key', 0.1)
+        loader = Loader()
+        started = time.monotonic()
+        self.assertEqual(self.blackboard.get_or_load('key', loader), 'loaded')
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(loader.calls, 1)
+
+
+class TestRedisGetOrLoad(RedisGetOrLoadTestMixin, unittest.TestCase):
+
+    memory_type = SupportedMemoryType.REDIS
+    config = {}
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(self.memory_type, flush=True, **self.config)
+
+
+class TestShardedRedisGetOrLoad(RedisGetOrLoadTestMixin, unittest.TestCase):
+
+    memory_type = SupportedMemoryType.SHARDED_REDIS
+    config = {'nodes': NODES}
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(self.memory_type, flush=True, **self.config)
+
+
+if __name__ == '__main__':
+    unittest.main()
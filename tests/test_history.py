@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for per-key version history of `gblackboard` package."""
+
+import os
+import pickle
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.history import HistoryRing
+
+DIR_PATH = './gblackboard-history'
+NODES = ['node1:6379', 'node2:6379']
+
+
+class TestHistoryRing(unittest.TestCase):
+
+    def test_bounds(self):
+        ring = HistoryRing()
+        for version in range(1, 6):
+            self.assertLessEqual(ring.append((version, 0.0, b'x' * 10), 10, 3), 3)
+        self.assertListEqual([entry[0] for entry in ring.entries()], [3, 4, 5])
+        self.assertListEqual([entry[0] for entry in ring.entries(since=4)], [5])
+        self.assertEqual(ring.append((6, 0.0, b'x' * 25), 25, 3, max_bytes=40), 2)
+        self.assertEqual(ring.bytes, 35)
+        # the latest version is kept even if it is larger than `max_bytes`
+        self.assertEqual(ring.append((7, 0.0, b'x' * 50), 50, 3, max_bytes=40), 1)
+
+
+class HistoryTestMixin(object):
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def test_versions(self):
+        self.blackboard.set('pose', (0, 0), history=3)
+        for step in range(1, 4):
+            self.blackboard.update('pose', (step, step))
+        self.assertEqual(self.blackboard.get('pose'), (3, 3))
+        self.assertEqual(self.blackboard.get('pose', version=3), (2, 2))
+        self.assertListEqual([(version, value) for version, _, value in self.blackboard.history('pose')],
+                             [(2, (1, 1)), (3, (2, 2)), (4, (3, 3))])
+        self.assertListEqual([version for version, _, _ in self.blackboard.history('pose', since=3)], [4])
+        with self.assertRaises(exception.NonExistingVersion):
+            self.blackboard.get('pose', version=1)
+
+    def test_history_bytes(self):
+        self.blackboard.set('log', 'a' * 100, history=10, history_bytes=250)
+        self.blackboard.update('log', 'b' * 100)
+        self.blackboard.update('log', 'c' * 100)
+        self.assertListEqual([value[0] for _, _, value in self.blackboard.history('log')], ['b', 'c'])
+
+    def test_stale_versions(self):
+        # versions left behind by a former `key` of the same name
+        self.blackboard._memory_wrapper.append_history('pose', (5, 0.0, pickle.dumps('stale')), 3, 1000)
+        self.blackboard.set('pose', (0, 0), history=3, history_bytes=1000)
+        self.blackboard.update('pose', (1, 1))
+        self.assertListEqual([(version, value) for version, _, value in self.blackboard.history('pose')],
+                             [(1, (0, 0)), (2, (1, 1))])
+
+    def test_raw_and_structured(self):
+        self.blackboard.set('raw', 0, history=5)
+        self.blackboard.update_raw('raw', memoryview(pickle.dumps(1)))
+        self.assertEqual(self.blackboard.get('raw', version=2), 1)
+        self.blackboard.set('robot', {'battery': 0.9}, structured=True, history=5)
+        self.blackboard.update_fields('robot', {'battery': 0.8})
+        self.assertDictEqual(self.blackboard.get('robot', version=1), {'battery': 0.9})
+        self.assertDictEqual(self.blackboard.get('robot', version=2), {'battery': 0.8})
+
+    def test_no_history(self):
+        self.blackboard.set('key', 0)
+        self.blackboard.update('key', 1)
+        self.assertListEqual(self.blackboard.history('key'), [])
+        with self.assertRaises(exception.NonExistingVersion):
+            self.blackboard.get('key', version=1)
+        with self.assertRaises(exception.NonExistingKey):
+            self.blackboard.history('missing')
+
+    def test_drop_and_expiry(self):
+        self.blackboard.set('key', 0, history=3)
+        self.blackboard.set('temp', 0, history=3, ttl=0.1)
+        self.blackboard.drop('key')
+        self.blackboard.set('key', 'new', history=3)
+        self.assertListEqual([value for _, _, value in self.blackboard.history('key')], ['new'])
+        time.sleep(0.3)
+        self.assertListEqual(self.blackboard._memory_wrapper.get_history('temp'), [])
+
+    def test_save_and_load(self):
+        self.blackboard.set('key', 0, history=3)
+        self.blackboard.update('key', 1)
+        self.blackboard.save(DIR_PATH)
+        self.blackboard.clear()
+        self.assertListEqual(self.blackboard._memory_wrapper.get_history('key'), [])
+        self.blackboard.load(DIR_PATH)
+        self.blackboard.update('key', 2)
+        # versions continue, but only versions written after loading are kept
+        self.assertListEqual([(version, value) for version, _, value in self.blackboard.history('key')], [(3, 2)])
+
+    def remove_dir(self):
+        if os.path.exists(DIR_PATH):
+            for name in os.listdir(DIR_PATH):
+                os.remove(os.path.join(DIR_PATH, name))
+            os.rmdir(DIR_PATH)
+
+
+class TestDictionaryHistory(HistoryTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY)
+        self.addCleanup(self.remove_dir)
+
+
+class TestRedisHistory(HistoryTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.REDIS, flush=True, buckets=4)
+        self.addCleanup(self.remove_dir)
+
+    def test_layout(self):
+        self.blackboard.set('key', 0, history=2)
+        self.blackboard.update('key', 1)
+        self.blackboard.update('key', 2)
+        redis = self.blackboard._memory_wrapper._mem
+        self.assertEqual(redis.llen('gblackboard:history:key'), 2)
+        with patch.object(redis, 'lrange', wraps=redis.lrange) as lrange:
+            self.blackboard.get('key')
+        # reading the current value does not touch the history
+        self.assertEqual(lrange.call_count, 0)
+        self.blackboard.clear()
+        self.assertFalse(redis.exists('gblackboard:history:key', 'gblackboard:histories'))
+
+    def test_versioned_reads(self):
+        self.blackboard.set('key', 0, history=10)
+        for value in range(1, 6):
+            self.blackboard.update('key', value)
+        redis = self.blackboard._memory_wrapper._mem
+        with patch.object(redis, 'lrange', wraps=redis.lrange) as lrange:
+            self.assertEqual(self.blackboard.get('key', version=3), 2)
+            self.assertEqual(self.blackboard.get('key', version=6), 5)
+            with self.assertRaises(exception.NonExistingVersion):
+                self.blackboard.get('key', version=7)
+            self.assertListEqual([value for _, _, value in self.blackboard.history('key', since=4)], [4, 5])
+        # single versions are read by LINDEX and `since` fetches only the newer entries
+        self.assertListEqual([call[0] for call in lrange.call_args_list], [('gblackboard:history:key', -2, -1)])
+
+
+class TestShardedRedisHistory(HistoryTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.SHARDED_REDIS, nodes=NODES, flush=True)
+        self.addCleanup(self.remove_dir)
+
+    def versions(self, key):
+        return [version for version, _, _ in self.blackboard.history(key)]
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_reshard(self):
+        keys = ['pose{}'.format(index) for index in range(20)]
+        for key in keys:
+            self.blackboard.set(key, 'a' * 100, history=3, history_bytes=250)
+            self.blackboard.update(key, 'b' * 100)
+        wrapper = self.blackboard._memory_wrapper
+        self.assertGreater(wrapper.add_node('node3:6379'), 0)
+        self.assertGreater(wrapper.remove_node('node1:6379'), 0)
+        for key in keys:
+            self.assertListEqual(self.versions(key), [1, 2])
+            # the sizes of the versions moved along, so the history is still bounded by bytes
+            self.blackboard.update(key, 'c' * 100)
+            self.assertListEqual(self.versions(key), [2, 3])
+        histories = set()
+        for shard in wrapper._shards.values():
+            histories.update(key.decode('utf-8') for key in shard._mem.smembers('gblackboard:histories'))
+            for key in shard._mem.smembers('gblackboard:histories'):
+                self.assertIs(wrapper._shard(key.decode('utf-8')), shard)
+        self.assertSetEqual(histories, set(keys))
+
+
+if __name__ == '__main__':
+    unittest.main()
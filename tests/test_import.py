@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for lazy imports and the backend registry of `gblackboard` package."""
+
+import os
+import subprocess
+import sys
+import unittest
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import register_backend
+from gblackboard.wrapper import DictionaryWrapper
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+class TestLazyImport(unittest.TestCase):
+
+    def test_heavy_modules_not_imported(self):
+        code = (
+            'import sys; sys.path.insert(0, {!r})\n'
+            'from gblackboard import Blackboard, SupportedMemoryType\n'
+            'Blackboard(SupportedMemoryType.DICTIONARY).close()\n'
+            'print(sorted(m for m in ("redis", "click", "concurrent.futures") if m in sys.modules))'
+        ).format(ROOT_DIR)
+        output = subprocess.check_output([sys.executable, '-c', code], universal_newlines=True)
+        self.assertEqual(output.strip(), '[]')
+
+
+class TestBackendRegistry(unittest.TestCase):
+
+    def test_register_backend(self):
+        register_backend('custom', 'gblackboard.wrapper:DictionaryWrapper')
+        blackboard = Blackboard('custom')
+        self.assertIsInstance(blackboard._memory_wrapper, DictionaryWrapper)
+        blackboard.set('key', 'value')
+        self.assertEqual(blackboard.get('key'), 'value')
+        blackboard.close()
+
+    def test_unsupported_memory_type(self):
+        with self.assertRaises(exception.UnsupportedMemoryType):
+            Blackboard('unknown')
+        with self.assertRaises(exception.UnsupportedMemoryType):
+            Blackboard(['unhashable'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the hierarchical key index of `gblackboard` package."""
+
+import random
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.index import KeyIndex
+
+
+class TestKeyIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = KeyIndex(['b', 'a.x', 'a.y', 'a', 'ab', 'a.y.z'])
+
+    def test_prefix(self):
+        self.assertListEqual(self.index.keys('a.'), ['a.x', 'a.y', 'a.y.z'])
+        self.assertListEqual(self.index.keys('a'), ['a', 'a.x', 'a.y', 'a.y.z', 'ab'])
+        self.assertListEqual(self.index.keys(), ['a', 'a.x', 'a.y', 'a.y.z', 'ab', 'b'])
+        self.assertListEqual(self.index.keys('c'), [])
+        self.assertEqual(self.index.count('a.'), 3)
+        self.assertEqual(self.index.count(), 6)
+
+    def test_pagination(self):
+        pages = []
+        cursor = None
+        while True:
+            page = self.index.keys('a', limit=2, cursor=cursor)
+            if not page:
+                break
+            pages.append(page)
+            cursor = page[-1]
+        self.assertListEqual(pages, [['a', 'a.x'], ['a.y', 'a.y.z'], ['ab']])
+
+    def test_add_and_remove(self):
+        self.index.add('a.w')
+        self.index.add('a.w')
+        self.index.remove('a.x')
+        self.index.remove('missing')
+        self.assertListEqual(self.index.keys('a.'), ['a.w', 'a.y', 'a.y.z'])
+        self.assertIn('a.w', self.index)
+        self.assertNotIn('a.x', self.index)
+        self.assertEqual(len(self.index), 6)
+
+    def test_largest_character(self):
+        index = KeyIndex(['a' + chr(0x10ffff), 'a' + chr(0x10ffff) + 'b', 'b'])
+        self.assertEqual(index.count('a' + chr(0x10ffff)), 2)
+
+    @patch('gblackboard.index.KEY_CHUNK', 4)
+    def test_chunks(self):
+        # small chunks, so that adds and removes split and merge them
+        rand = random.Random(0)
+        index = KeyIndex()
+        expected = set()
+        for _ in range(2000):
+            key = 'k{}.{}'.format(rand.randrange(10), rand.randrange(30))
+            if rand.random() < 0.6:
+                index.add(key)
+                expected.add(key)
+            else:
+                index.remove(key)
+                expected.discard(key)
+            self.assertEqual(len(index), len(expected))
+        self.assertListEqual(index.keys(), sorted(expected))
+        for prefix in ('k3', 'k3.', 'k3.1', 'k', 'x'):
+            matching = sorted(key for key in expected if key.startswith(prefix))
+            self.assertListEqual(index.keys(prefix), matching)
+            self.assertEqual(index.count(prefix), len(matching))
+            self.assertListEqual(index.keys(prefix, limit=5, cursor=matching[0] if matching else None),
+                                 matching[1:6])
+        self.assertTrue(all(len(chunk) <= 8 for chunk in index._chunks))
+        for key in sorted(expected, reverse=True):
+            index.remove(key)
+        self.assertListEqual(index.keys(), [])
+        self.assertEqual(len(index._chunks), 0)
+
+
+class KeyIndexTestMixin(object):
+
+    def setUp(self):
+        for robot in ('robot1', 'robot2'):
+            for field in ('battery', 'pose', 'pose.x'):
+                self.blackboard.set('{}.{}'.format(robot, field), '{}.{}'.format(robot, field))
+        self.blackboard.set('robot10.pose', 'robot10.pose')
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def test_keys(self):
+        self.assertListEqual(self.blackboard.keys(prefix='robot1.'),
+                             ['robot1.battery', 'robot1.pose', 'robot1.pose.x'])
+        self.assertListEqual(self.blackboard.keys(prefix='robot1.', limit=2, cursor='robot1.battery'),
+                             ['robot1.pose', 'robot1.pose.x'])
+        self.assertEqual(len(self.blackboard.keys(in_list=True)), 7)
+        self.assertEqual(self.blackboard.count('robot1'), 4)
+        self.assertEqual(self.blackboard.count(), 7)
+
+    def test_get_many(self):
+        self.assertDictEqual(self.blackboard.get_many(prefix='robot2.pose'),
+                             {'robot2.pose': 'robot2.pose', 'robot2.pose.x': 'robot2.pose.x'})
+        self.assertDictEqual(self.blackboard.get_many(['robot10.pose']), {'robot10.pose': 'robot10.pose'})
+        with self.assertRaises(exception.NonExistingKey):
+            self.blackboard.get_many(['missing'])
+
+    def test_drop_prefix(self):
+        self.assertEqual(self.blackboard.drop_prefix('robot1.'), 3)
+        self.assertEqual(self.blackboard.drop_prefix('robot1.'), 0)
+        self.assertListEqual(self.blackboard.keys(prefix='robot1'), ['robot10.pose'])
+        self.assertFalse(self.blackboard._memory_wrapper.has('robot1.pose'))
+        self.assertEqual(self.blackboard.get('robot2.pose'), 'robot2.pose')
+
+    def test_index_follows_board(self):
+        self.blackboard.set('robot3.pose', 1, ttl=0.1)
+        self.blackboard.drop('robot2.battery')
+        time.sleep(0.3)
+        self.assertListEqual(self.blackboard.keys(prefix='robot3'), [])
+        self.assertListEqual(self.blackboard.keys(prefix='robot2.'), ['robot2.pose', 'robot2.pose.x'])
+        self.blackboard.clear()
+        self.assertEqual(self.blackboard.count(), 0)
+
+
+class TestDictionaryKeyIndex(KeyIndexTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY)
+        super(TestDictionaryKeyIndex, self).setUp()
+
+
+class TestRedisKeyIndex(KeyIndexTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.REDIS, flush=True, buckets=4)
+        super(TestRedisKeyIndex, self).setUp()
+
+    def test_single_round_trip(self):
+        wrapper = self.blackboard._memory_wrapper
+        with patch.object(wrapper._mem, 'pipeline', wraps=wrapper._mem.pipeline) as pipeline:
+            self.blackboard.get_many(prefix='robot')
+            self.blackboard.drop_prefix('robot')
+        self.assertEqual(pipeline.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the meta info table of `gblackboard` package."""
+
+import sys
+import unittest
+
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.gblackboard import MetaInfoTable
+
+
+class TestMetaInfoTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = MetaInfoTable()
+
+    def test_flags(self):
+        self.table.add('a', read_only=True)
+        self.table.add('b', structured=True)
+        self.assertTrue(self.table['a'].read_only)
+        self.assertFalse(self.table['a'].structured)
+        self.assertTrue(self.table['b'].structured)
+        self.assertListEqual(sorted(self.table), ['a', 'b'])
+        self.assertListEqual(self.table.index.keys(), ['a', 'b'])
+        with self.assertRaises(KeyError):
+            self.table['c']
+
+    def test_interned_keys(self):
+        key = ''.join(['robot/', 'pose'])
+        self.table.add(key)
+        self.assertIs(next(iter(self.table)), sys.intern('robot/pose'))
+
+    def test_sparse_columns(self):
+        self.table.add('plain')
+        meta_info = self.table.add('versioned', history=3)
+        meta_info.version += 1
+        self.assertEqual(self.table['versioned'].version, 1)
+        self.assertEqual(self.table['plain'].history, 0)
+        self.assertListEqual(list(self.table._versions), ['versioned'])
+        # only observed keys have a row of callbacks
+        self.table['plain'].add_callback(print)
+        self.assertListEqual(list(self.table._callbacks), ['plain'])
+        self.table['plain'].remove_callback(print)
+        self.assertDictEqual(self.table._callbacks, {})
+
+    def test_remove(self):
+        self.table.add('a', history=3).add_callback(print)
+        self.assertTrue(self.table.remove('a'))
+        self.assertFalse(self.table.remove('a'))
+        self.assertEqual(len(self.table), 0)
+        self.assertDictEqual(self.table._versions, {})
+        self.assertDictEqual(self.table._callbacks, {})
+        self.assertListEqual(self.table.index.keys(), [])
+
+    def test_blackboard(self):
+        blackboard = Blackboard(SupportedMemoryType.DICTIONARY, namespace='meta-info')
+        self.addCleanup(blackboard.close)
+        blackboard.set('a', 1, read_only=True)
+        blackboard.set('b', 2)
+        blackboard.register_callback('b', print)
+        blackboard.drop('b')
+        self.assertListEqual(blackboard.keys(in_list=True), ['a'])
+        self.assertDictEqual(blackboard._meta_info._callbacks, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
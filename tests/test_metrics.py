@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for latency instrumentation of `gblackboard` package."""
+
+import socket
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard import InMemorySink, PrometheusSink, StatsdSink
+from gblackboard.metrics import Histogram
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_observe(self):
+        histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+        for seconds in (0.0005, 0.001, 0.005, 0.05, 1.0):
+            histogram.observe(seconds)
+        self.assertEqual(histogram.count, 5)
+        self.assertListEqual(histogram.counts, [2, 1, 1, 1])
+        self.assertEqual(histogram.quantile(0.5), 0.01)
+        self.assertEqual(histogram.quantile(1.0), float('inf'))
+        self.assertIsNone(Histogram().quantile(0.5))
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def callback(self, data):
+        pass
+
+    def test_dictionary(self):
+        sink = InMemorySink()
+        blackboard = Blackboard(SupportedMemoryType.DICTIONARY, metrics=sink)
+        blackboard.set('key', 'value')
+        blackboard.register_callback('key', self.callback)
+        blackboard.update('key', 'new_value')
+        blackboard.update('key', 'newer_value')
+        blackboard.get('key')
+        blackboard.drop('key')
+        blackboard.close()
+        for operation in ('set', 'get', 'drop'):
+            self.assertEqual(sink.histogram(operation).count, 1)
+        self.assertEqual(sink.histogram('update').count, 2)
+        # phases are recorded under the operation which runs them
+        self.assertEqual(sink.histogram('set', 'serialize').count, 1)
+        self.assertEqual(sink.histogram('update', 'serialize').count, 2)
+        self.assertEqual(sink.histogram('get', 'deserialize').count, 1)
+        self.assertEqual(sink.histogram('update', 'callbacks').count, 2)
+        self.assertIsNone(sink.histogram('get', 'network'))
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_redis(self):
+        sink = PrometheusSink()
+        blackboard = Blackboard(SupportedMemoryType.REDIS, metrics=sink)
+        blackboard.set('key', 'value')
+        blackboard.get('key')
+        blackboard.get_many(['key'])
+        blackboard.close()
+        self.assertEqual(sink.histogram('set', 'network').count, 1)
+        self.assertEqual(sink.histogram('get', 'network').count, 1)
+        self.assertEqual(sink.histogram('get_many', 'network').count, 1)
+        text = sink.render()
+        self.assertIn('# TYPE gblackboard_operation_seconds histogram', text)
+        self.assertIn('gblackboard_operation_seconds_count{operation="get",phase="network"} 1', text)
+        self.assertIn('gblackboard_operation_seconds_bucket{operation="set",phase="total",le="+Inf"} 1', text)
+
+    def test_statsd(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(('127.0.0.1', 0))
+        server.settimeout(1.0)
+        sink = StatsdSink(host='127.0.0.1', port=server.getsockname()[1])
+        blackboard = Blackboard(SupportedMemoryType.DICTIONARY, metrics=sink)
+        blackboard.set('key', 'value')
+        blackboard.close()
+        packets = {server.recv(1024).decode('ascii').split(':')[0] for _ in range(2)}
+        self.assertSetEqual(packets, {'gblackboard.set.serialize', 'gblackboard.set.total'})
+        sink.close()
+        server.close()
+
+    def test_disabled(self):
+        blackboard = Blackboard(SupportedMemoryType.DICTIONARY)
+        blackboard.set('key', 'value')
+        self.assertIsNone(blackboard._memory_wrapper.metrics)
+        blackboard.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
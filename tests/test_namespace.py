@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for namespaced blackboards of `gblackboard` package."""
+
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+
+
+class NamespaceTestMixin(object):
+
+    # whether a copy is independent of later updates of its source
+    independent_copy = True
+
+    def test_isolation(self):
+        self.first.set('key', 'first')
+        self.second.set('key', 'second', read_only=True)
+        self.assertEqual(self.first.get('key'), 'first')
+        self.assertEqual(self.second.get('key'), 'second')
+        self.first.clear()
+        self.assertListEqual(self.first.keys(in_list=True), [])
+        self.assertEqual(self.second.get('key'), 'second')
+        self.assertTrue(self.second._memory_wrapper.has('key'))
+
+    def test_copy(self):
+        self.first.set('key', 'value', read_only=True)
+        self.first.set('other', 'value')
+        copied = self.copy(self.first, 'copied')
+        if self.independent_copy:
+            self.first.update('other', 'new_value')
+        self.assertEqual(copied.get('key'), 'value')
+        self.assertEqual(copied.get('other'), 'value')
+        with self.assertRaises(exception.NotEditable):
+            copied.update('key', 'new_value')
+        copied.close()
+        self.assertEqual(self.first.get('key'), 'value')
+
+    def test_snapshot(self):
+        self.first.set('key', 'value')
+        snapshot = self.copy(self.first, None)
+        if self.independent_copy:
+            self.first.update('key', 'new_value')
+        self.assertEqual(snapshot.get('key'), 'value')
+        self.assertNotEqual(snapshot._memory_wrapper.namespace, self.first._memory_wrapper.namespace)
+        snapshot.close()
+
+    def copy(self, blackboard, namespace):
+        if namespace is None:
+            return blackboard.snapshot()
+        return blackboard.copy(namespace)
+
+
+class TestDictionaryNamespace(NamespaceTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.first = Blackboard(SupportedMemoryType.DICTIONARY, namespace='first')
+        self.second = Blackboard(SupportedMemoryType.DICTIONARY, namespace='second')
+
+    def tearDown(self):
+        self.first.close()
+        self.second.close()
+
+
+class TestRedisNamespace(NamespaceTestMixin, unittest.TestCase):
+
+    # fakeredis implements COPY by sharing the copied hash, unlike Redis
+    independent_copy = False
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.first = Blackboard(SupportedMemoryType.REDIS, namespace='first', flush=True)
+        self.second = Blackboard(SupportedMemoryType.REDIS, namespace='second', flush=True)
+
+    def tearDown(self):
+        self.first.close()
+        self.second.close()
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def copy(self, blackboard, namespace):
+        return super(TestRedisNamespace, self).copy(blackboard, namespace)
+
+    def test_hash_names(self):
+        self.first.set('key', 'value', ttl=10.0)
+        redis = self.first._memory_wrapper._mem
+        self.assertTrue(redis.hexists('gblackboard:{first}', 'key'))
+        self.assertEqual(redis.zcard('gblackboard:{first}:expiry'), 1)
+        self.first.clear()
+        self.assertFalse(redis.exists('gblackboard:{first}', 'gblackboard:{first}:expiry'))
+
+
+def _no_copy(pipe):
+    raise AttributeError('copy')
+
+
+class TestRedisNamespaceWithoutCopy(TestRedisNamespace):
+
+    # clients before redis-py 4.0 have no `copy`; keys are copied by DUMP/RESTORE
+    independent_copy = True
+
+    def copy(self, blackboard, namespace):
+        pipeline = type(blackboard._memory_wrapper._mem.pipeline())
+        with patch.object(pipeline, 'copy', property(_no_copy)):
+            return super(TestRedisNamespaceWithoutCopy, self).copy(blackboard, namespace)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for raw-bytes access of `gblackboard` package."""
+
+import pickle
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+
+NODES = ['node1:6379', 'node2:6379']
+
+
+class RawTestMixin(object):
+
+    def counters(self, blackboard):
+        stats = blackboard._memory_wrapper.stats()
+        return stats['serializations'], stats['deserializations']
+
+    def test_relay(self):
+        self.source.set('pose', (1.0, 2.0))
+        self.source.set('name', 'robot')
+        before = self.counters(self.source), self.counters(self.target)
+        raw = self.source.get_raw('pose')
+        self.assertIsInstance(raw, memoryview)
+        self.assertEqual(pickle.loads(raw), (1.0, 2.0))
+        self.assertTrue(self.target.set_raw('pose', raw, read_only=True))
+        many = self.source.get_raw_many(['pose', 'name'])
+        self.assertEqual(sorted(many), ['name', 'pose'])
+        self.assertTrue(self.target.set_raw_many({'name': many['name']}))
+        # bytes are moved without (de)serialization
+        self.assertEqual((self.counters(self.source), self.counters(self.target)), before)
+        self.assertEqual(self.target.get('pose'), (1.0, 2.0))
+        self.assertEqual(self.target.get('name'), 'robot')
+        with self.assertRaises(exception.NotEditable):
+            self.target.update_raw('pose', raw)
+        with self.assertRaises(exception.ExistingKey):
+            self.target.set_raw('name', raw)
+
+    def test_update_raw(self):
+        received = []
+        self.target.set('key', 0)
+        with patch('gblackboard.gblackboard.load', wraps=pickle.loads) as load:
+            self.assertTrue(self.target.update_raw('key', pickle.dumps(1)))
+            # no callbacks, nothing to deserialize
+            self.assertEqual(load.call_count, 0)
+            self.target.register_callback('key', received.append)
+            self.assertTrue(self.target.update_raw('key', bytearray(pickle.dumps(2))))
+        self.assertEqual(received, [2])
+        self.assertEqual(self.target.get('key'), 2)
+
+    def test_errors(self):
+        self.source.set('fields', {'a': 1}, structured=True)
+        with self.assertRaises(exception.UnsupportedDataType):
+            self.source.get_raw('fields')
+        with self.assertRaises(exception.UnsupportedDataType):
+            self.source.set_raw('text', 'not bytes')
+        with self.assertRaises(exception.NonExistingKey):
+            self.source.get_raw_many(['missing'])
+
+    def test_wrapper_missing_keys(self):
+        wrapper = self.source._memory_wrapper
+        wrapper.set('key', 'value')
+        self.assertIsNone(wrapper.get_raw('missing'))
+        many = wrapper.get_raw_many(['missing', 'key'])
+        self.assertIsNone(many['missing'])
+        self.assertEqual(pickle.loads(many['key']), 'value')
+
+    def test_buffer_is_copied(self):
+        data = bytearray(pickle.dumps('value'))
+        self.target.set_raw('key', data)
+        data[:] = pickle.dumps('other')
+        self.assertEqual(self.target.get('key'), 'value')
+
+
+class TestDictionaryRaw(RawTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.source = Blackboard(SupportedMemoryType.DICTIONARY, namespace='source')
+        self.target = Blackboard(SupportedMemoryType.DICTIONARY, namespace='target')
+
+    def tearDown(self):
+        self.source.close()
+        self.target.close()
+
+    def test_zero_copy(self):
+        self.source.set('key', 'value')
+        stored = self.source._memory_wrapper._mem.get('key')
+        self.assertIs(self.source.get_raw('key').obj, stored)
+
+
+class TestRedisRaw(RawTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.source = Blackboard(SupportedMemoryType.REDIS, namespace='source', buckets=4)
+        self.target = Blackboard(SupportedMemoryType.REDIS, namespace='target', write_behind=True)
+
+    def tearDown(self):
+        self.source.close()
+        self.target.close()
+
+
+class TestShardedRedisRaw(RawTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.source = Blackboard(SupportedMemoryType.SHARDED_REDIS, nodes=NODES, namespace='source')
+        self.target = Blackboard(SupportedMemoryType.SHARDED_REDIS, nodes=NODES, namespace='target')
+
+    def tearDown(self):
+        self.source.close()
+        self.target.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
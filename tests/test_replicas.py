@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for read-replica routing of `RedisWrapper`."""
+
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+import redis
+
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.exception import RedisWrongConfig
+from gblackboard.wrapper import RedisWrapper
+
+REPLICAS = ['replica1:6379', {'host': 'replica2'}]
+
+
+class TestReadReplicas(unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def make_wrapper(self, **kwargs):
+        wrapper = RedisWrapper(flush=True, read_replicas=REPLICAS, **kwargs)
+        self.addCleanup(wrapper.close)
+        # fakeredis keeps one server per host; replication is simulated by writing to it directly.
+        self.replicas = [fakeredis.FakeRedis(host='replica1'), fakeredis.FakeRedis(host='replica2')]
+        for replica in self.replicas:
+            self.addCleanup(replica.flushall)
+        return wrapper
+
+    def plant(self, wrapper, key, values):
+        for replica, value in zip(self.replicas, values):
+            replica.hset(wrapper._bucket(key), key, wrapper._serialize(value))
+
+    def test_reads_from_replicas(self):
+        wrapper = self.make_wrapper()
+        wrapper.set('key', 'primary')
+        # not replicated yet
+        self.assertIsNone(wrapper.get('key'))
+        self.assertFalse(wrapper.has('key'))
+        self.plant(wrapper, 'key', ['replica1', 'replica2'])
+        values = [wrapper.get('key') for _ in range(4)]
+        self.assertEqual(sorted(values), ['replica1', 'replica1', 'replica2', 'replica2'])
+        self.assertNotEqual(values[0], values[1])
+        whole_data = wrapper._get_all()
+        self.assertIn(whole_data[b'key'], [wrapper._serialize('replica1'), wrapper._serialize('replica2')])
+
+    def test_latency_policy(self):
+        wrapper = self.make_wrapper(read_policy='latency')
+        self.plant(wrapper, 'key', ['replica1', 'replica2'])
+        wrapper._latencies = [0.5, 0.001]
+        values = [wrapper.get('key') for _ in range(16)]
+        # every 8th read probes replicas in turn
+        self.assertGreaterEqual(values.count('replica2'), 14)
+        self.assertGreater(wrapper._latencies[1], 0.0)
+
+    def test_read_your_writes(self):
+        wrapper = self.make_wrapper(read_your_writes=True, replica_lag=0.1)
+        self.plant(wrapper, 'key', ['stale', 'stale'])
+        self.plant(wrapper, 'other', ['other', 'other'])
+        wrapper.set('key', 'fresh')
+        self.assertEqual(wrapper.get('key'), 'fresh')
+        self.assertEqual(wrapper.get('other'), 'other')
+        # whole data is read from the primary while any key is in the window
+        self.assertEqual(set(wrapper._get_all()), {b'key'})
+        time.sleep(0.15)
+        self.assertEqual(wrapper.get('key'), 'stale')
+        wrapper.delete('key')
+        self.assertIsNone(wrapper.get('key'))
+        wrapper.flush()
+        self.assertIsNone(wrapper.get('other'))
+
+    def test_read_your_writes_wait(self):
+        wrapper = self.make_wrapper(read_your_writes='wait', timeout=0.5)
+        execute_command = wrapper._mem.execute_command
+        waits = []
+
+        def fake_execute_command(*args, **kwargs):
+            if args[0] == 'WAIT':
+                waits.append(args[1:])
+                return len(REPLICAS)
+            return execute_command(*args, **kwargs)
+
+        # fakeredis does not support WAIT
+        wrapper._mem.execute_command = fake_execute_command
+        wrapper.set('key', 1)
+        wrapper.delete('key')
+        self.assertEqual(waits, [(2, 500), (2, 500)])
+
+    def test_fallback_to_primary(self):
+        wrapper = self.make_wrapper()
+        wrapper.set('key', 'primary')
+        self.plant(wrapper, 'key', ['replica1', 'replica2'])
+        # an unreachable replica and a hung one
+        for reader, error in zip(wrapper._readers, (redis.ConnectionError, redis.TimeoutError)):
+            patcher = patch.object(reader, 'hget', side_effect=error)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.assertEqual(wrapper.get('key'), 'primary')
+        self.assertEqual(wrapper.get('key'), 'primary')
+        self.assertTrue(all(until > time.monotonic() for until in wrapper._down_until))
+        # skipped replicas are not tried again for a while
+        self.assertIsNone(wrapper._reader('key'))
+
+    def test_wrong_policy(self):
+        with self.assertRaises(RedisWrongConfig):
+            self.make_wrapper(read_policy='random')
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_blackboard(self):
+        blackboard = Blackboard(SupportedMemoryType.REDIS, read_replicas=['replica1'], read_your_writes=True)
+        self.addCleanup(blackboard.close)
+        blackboard.set('key', 'value')
+        self.assertEqual(blackboard.get('key'), 'value')
+        self.assertEqual(len(blackboard._memory_wrapper._readers), 1)
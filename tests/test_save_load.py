@@ -244,5 +244,68 @@ class TestSaveLoad(unittest.TestCase):
                 os.rmdir(root)
 
 
+
+class TestRedisDump(unittest.TestCase):
+
+    def tearDown(self):
+        if os.path.exists(FILE_PATH):
+            os.remove(FILE_PATH)
+
+    def make_wrapper(self, **kwargs):
+        wrapper = RedisWrapper(host='localhost', flush=True, **kwargs)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_round_trip(self):
+        wrapper = self.make_wrapper(buckets=4, snapshot='dump')
+        for index in range(50):
+            wrapper.set('key{}'.format(index), index)
+        wrapper.set_fields('robot', {'name': 'robot', 'battery': 0.9})
+        stats = wrapper.stats()
+        robot_size = wrapper.sizeof('robot')
+        with patch.object(wrapper._mem, 'hgetall', wraps=wrapper._mem.hgetall) as hgetall:
+            wrapper.save(FILE_PATH)
+        # no field is read on the client
+        self.assertEqual(hgetall.call_count, 0)
+        wrapper.flush()
+        wrapper.load(FILE_PATH)
+        self.assertEqual(wrapper.get('key42'), 42)
+        self.assertDictEqual(wrapper.get('robot'), {'name': 'robot', 'battery': 0.9})
+        self.assertEqual(wrapper.stats()['bytes'], stats['bytes'])
+        self.assertEqual(wrapper.sizeof('robot'), robot_size)
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_other_layout(self):
+        wrapper = self.make_wrapper(buckets=4, snapshot='dump', namespace='source')
+        for index in range(50):
+            wrapper.set('key{}'.format(index), index)
+        wrapper.save(FILE_PATH)
+        other = self.make_wrapper(namespace='target')
+        other.load(FILE_PATH)
+        self.assertListEqual(sorted(other._keys()), sorted('key{}'.format(index) for index in range(50)))
+        self.assertEqual(other.get('key7'), 7)
+        self.assertFalse(other._mem.keys('*restore*'))
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_formats(self):
+        wrapper = self.make_wrapper()
+        wrapper.set('hello', 'world')
+        wrapper.save(FILE_PATH)
+        # a pickled file is loaded by a wrapper in 'dump' mode, and vice versa
+        dumping = self.make_wrapper(snapshot='dump', namespace='dumping')
+        dumping.load(FILE_PATH)
+        self.assertEqual(dumping.get('hello'), 'world')
+        dumping.save(FILE_PATH)
+        wrapper.flush()
+        wrapper.load(FILE_PATH)
+        self.assertEqual(wrapper.get('hello'), 'world')
+        # but not by a dictionary
+        with self.assertRaises(exception.ReadWrongFile):
+            DictionaryWrapper().load(FILE_PATH)
+        with self.assertRaises(exception.RedisWrongConfig):
+            RedisWrapper(snapshot='rdb')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for secondary indexes of `gblackboard` package."""
+
+import os
+import pickle
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.index import HashIndex, SortedIndex
+
+DIR_PATH = './gblackboard-index'
+NODES = ['node1:6379', 'node2:6379']
+
+
+class User(object):
+
+    def __init__(self, name, email, age):
+        self.name = name
+        self.email = email
+        self.age = age
+
+
+class TestIndexes(unittest.TestCase):
+
+    def test_hash_index(self):
+        index = HashIndex(None)
+        index.add('a', 1)
+        index.add('b', 1)
+        index.add('c', None)
+        self.assertListEqual(index.find(1), ['a', 'b'])
+        index.add('a', 2)
+        self.assertListEqual(index.find(1), ['b'])
+        self.assertEqual(index.remove('b'), 1)
+        self.assertIsNone(index.remove('c'))
+        self.assertSetEqual(index.attributes(), {2})
+
+    def test_sorted_index(self):
+        index = SortedIndex(None)
+        for key, attribute in (('a', 30), ('b', 10), ('c', 20), ('d', 20)):
+            index.add(key, attribute)
+        self.assertListEqual(index.range(15, 30), ['c', 'd', 'a'])
+        self.assertListEqual(index.range(high=20), ['b', 'c', 'd'])
+        self.assertListEqual(index.find(20), ['c', 'd'])
+        index.add('c', 40)
+        index.remove('a')
+        self.assertListEqual(index.range(), ['b', 'd', 'c'])
+
+
+class SecondaryIndexTestMixin(object):
+
+    shared = False
+
+    def setUp(self):
+        self.blackboard.set('user1', User('alice', 'alice@example.com', 30))
+        self.blackboard.set('user2', User('bob', 'bob@example.com', 25))
+        self.blackboard.set('robot', {'name': 'robot'})
+        self.blackboard.create_index('email', lambda user: user.email, shared=self.shared)
+        self.blackboard.create_index('age', lambda user: user.age, kind='sorted', shared=self.shared)
+        self.addCleanup(self.remove_dir)
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def test_find(self):
+        self.assertListEqual(self.blackboard.find('email', 'bob@example.com'), ['user2'])
+        self.assertListEqual(self.blackboard.find('email', 'nobody@example.com'), [])
+        self.assertListEqual(self.blackboard.find('age', 30), ['user1'])
+        self.assertListEqual(self.blackboard.find_range('age', 20, 30), ['user2', 'user1'])
+        self.assertListEqual(self.blackboard.find_range('age', low=26), ['user1'])
+
+    def test_no_deserialization(self):
+        deserializations = self.blackboard.stats()['deserializations']
+        self.blackboard.find('email', 'alice@example.com')
+        self.blackboard.find_range('age', 20)
+        self.assertEqual(self.blackboard.stats()['deserializations'], deserializations)
+
+    def test_maintenance(self):
+        self.blackboard.set('user3', User('carol', 'carol@example.com', 41), ttl=0.1)
+        self.blackboard.update('user1', User('alice', 'alice@example.org', 31))
+        self.blackboard.set_raw('user4', pickle.dumps(User('dave', 'bob@example.com', 25)))
+        self.blackboard.set('user5', {'email': 'eve@example.com'}, structured=True)
+        self.blackboard.drop('user2')
+        self.assertListEqual(self.blackboard.find('email', 'alice@example.com'), [])
+        self.assertListEqual(self.blackboard.find('email', 'alice@example.org'), ['user1'])
+        self.assertListEqual(self.blackboard.find('email', 'bob@example.com'), ['user4'])
+        self.assertListEqual(self.blackboard.find_range('age', 30), ['user1', 'user3'])
+        time.sleep(0.3)
+        self.assertListEqual(self.blackboard.find_range('age', 30), ['user1'])
+        self.blackboard.drop_prefix('user')
+        self.assertListEqual(self.blackboard.find_range('age'), [])
+        self.assertListEqual(self.blackboard.find('email', 'bob@example.com'), [])
+
+    def test_unindexable_values(self):
+        self.blackboard.create_index('mail', lambda value: value['email'], shared=self.shared)
+        calls = []
+        self.blackboard.set('count', 5)
+        self.blackboard.register_callback('count', calls.append)
+        self.blackboard.set('tags', {'email': ['a', 'b']})
+        # not comparable with the ages held by the sorted index
+        self.blackboard.set('odd', User('odd', 'odd@example.com', 'thirty'))
+        self.blackboard.update('count', 6)
+        self.assertListEqual(calls, [6])
+        self.assertEqual(self.blackboard.get('tags'), {'email': ['a', 'b']})
+        self.assertListEqual(self.blackboard.find('email', 'odd@example.com'), ['odd'])
+        self.assertListEqual(self.blackboard.find_range('age'), ['user2', 'user1'])
+        self.blackboard.update('tags', {'email': 'tags@example.com'})
+        self.assertListEqual(self.blackboard.find('mail', 'tags@example.com'), ['tags'])
+
+    def test_clear_and_load(self):
+        self.blackboard.save(DIR_PATH)
+        self.blackboard.clear()
+        self.assertListEqual(self.blackboard.find('email', 'alice@example.com'), [])
+        self.blackboard.load(DIR_PATH)
+        self.assertListEqual(self.blackboard.find('email', 'alice@example.com'), ['user1'])
+        self.assertListEqual(self.blackboard.find_range('age'), ['user2', 'user1'])
+
+    def test_errors(self):
+        with self.assertRaises(exception.ExistingIndex):
+            self.blackboard.create_index('email', lambda user: user.email)
+        with self.assertRaises(exception.UnsupportedIndexKind):
+            self.blackboard.create_index('name', lambda user: user.name, kind='bitmap')
+        with self.assertRaises(exception.NotCallable):
+            self.blackboard.create_index('name', 'name')
+        with self.assertRaises(exception.UnsupportedIndexKind):
+            self.blackboard.find_range('email', 'a')
+        self.assertTrue(self.blackboard.drop_index('email'))
+        with self.assertRaises(exception.NonExistingIndex):
+            self.blackboard.find('email', 'alice@example.com')
+
+    def remove_dir(self):
+        if os.path.exists(DIR_PATH):
+            for name in os.listdir(DIR_PATH):
+                os.remove(os.path.join(DIR_PATH, name))
+            os.rmdir(DIR_PATH)
+
+
+class TestDictionarySecondaryIndex(SecondaryIndexTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY)
+        super(TestDictionarySecondaryIndex, self).setUp()
+
+    def test_not_shared(self):
+        with self.assertRaises(exception.UnsupportedMemoryType):
+            self.blackboard.create_index('name', lambda user: user.name, shared=True)
+
+
+class TestRedisSecondaryIndex(SecondaryIndexTestMixin, unittest.TestCase):
+
+    shared = True
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.REDIS, flush=True, buckets=4)
+        super(TestRedisSecondaryIndex, self).setUp()
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_other_process(self):
+        other = Blackboard(SupportedMemoryType.REDIS, flush=False)
+        other._memory_wrapper._mem = self.blackboard._memory_wrapper._mem
+        self.assertListEqual(other._memory_wrapper.index_find('email', 'alice@example.com'), ['user1'])
+        self.assertListEqual(other._memory_wrapper.index_range('age', 26), ['user1'])
+        other.close()
+
+    def test_layout(self):
+        redis = self.blackboard._memory_wrapper._mem
+        self.assertEqual(redis.hget('gblackboard:index:email', 'user1'), b"'alice@example.com'")
+        self.assertEqual(redis.zscore('gblackboard:index:age', 'user2'), 25)
+        self.blackboard.drop_index('email')
+        self.assertFalse(redis.exists('gblackboard:index:email', "gblackboard:index:email:'alice@example.com'"))
+        self.blackboard.clear()
+        self.assertFalse(redis.exists('gblackboard:index:age', 'gblackboard:indexes'))
+
+
+class TestShardedRedisSecondaryIndex(SecondaryIndexTestMixin, unittest.TestCase):
+
+    shared = True
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.SHARDED_REDIS, nodes=NODES, flush=True)
+        super(TestShardedRedisSecondaryIndex, self).setUp()
+
+
+if __name__ == '__main__':
+    unittest.main()
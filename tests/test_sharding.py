@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for sharded Redis memory of `gblackboard` package."""
+
+import os
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.sharding import HashRing, ShardedRedisWrapper
+from gblackboard.wrapper import DictionaryWrapper
+
+FILE_PATH = './gblackboard-sharded.pickle'
+NODES = ['node1:6379', 'node2:6379', {'host': 'node3', 'port': 6379, 'db_num': 0}]
+
+
+class TestHashRing(unittest.TestCase):
+
+    def test_distribution_and_remap(self):
+        ring = HashRing(replicas=64)
+        for node in ('a', 'b', 'c'):
+            ring.add(node)
+        keys = ['key{}'.format(i) for i in range(3000)]
+        before = {key: ring.get(key) for key in keys}
+        counts = [list(before.values()).count(node) for node in ('a', 'b', 'c')]
+        self.assertTrue(all(count > 600 for count in counts), counts)
+        ring.add('d')
+        after = {key: ring.get(key) for key in keys}
+        moved = [key for key in keys if before[key] != after[key]]
+        # only keys of the new node move
+        self.assertTrue(all(after[key] == 'd' for key in moved))
+        self.assertLess(len(moved), len(keys) / 2)
+        ring.remove('d')
+        self.assertDictEqual({key: ring.get(key) for key in keys}, before)
+
+
+class TestShardedRedisWrapper(unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.wrapper = ShardedRedisWrapper(NODES, flush=True)
+        self.data = {'key{}'.format(i): i for i in range(300)}
+        for key, value in self.data.items():
+            self.wrapper.set(key, value)
+
+    def tearDown(self):
+        self.wrapper.close()
+        if os.path.exists(FILE_PATH):
+            os.remove(FILE_PATH)
+
+    def test_spread(self):
+        self.assertListEqual(self.wrapper.nodes, ['node1:6379/0', 'node2:6379/0', 'node3:6379/0'])
+        for shard in self.wrapper._shards.values():
+            self.assertGreater(len(shard._keys()), 30)
+        self.assertEqual(self.wrapper.get('key7'), 7)
+        self.assertTrue(self.wrapper.delete('key7'))
+        self.assertFalse(self.wrapper.has('key7'))
+        self.assertEqual(len(self.wrapper._get_all()), 299)
+        stats = self.wrapper.stats()
+        self.assertEqual(stats['keys'], 299)
+        self.assertEqual(sum(size for sizes in stats['buckets'].values() for size in sizes.values()), 299)
+        self.assertListEqual(sorted(stats['buckets']), self.wrapper.nodes)
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_add_remove_node(self):
+        moved = self.wrapper.add_node('node4:6379')
+        self.assertGreater(moved, 0)
+        self.assertLess(moved, len(self.data) / 2)
+        self.assertEqual(len(self.wrapper._shards['node4:6379/0']._keys()), moved)
+        for key, value in self.data.items():
+            self.assertEqual(self.wrapper.get(key), value)
+        self.assertEqual(self.wrapper.remove_node('node4:6379'), moved)
+        for key, value in self.data.items():
+            self.assertEqual(self.wrapper.get(key), value)
+
+    def test_save_load(self):
+        self.wrapper.save(FILE_PATH)
+        self.wrapper.flush()
+        self.assertDictEqual(self.wrapper._get_all(), {})
+        self.wrapper.load(FILE_PATH)
+        for key, value in self.data.items():
+            self.assertEqual(self.wrapper.get(key), value)
+        wrapper = DictionaryWrapper()
+        wrapper.load(FILE_PATH)
+        self.assertEqual(wrapper.get('key42'), 42)
+        wrapper.close()
+
+
+class TestShardedBlackboard(unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_blackboard(self):
+        blackboard = Blackboard(SupportedMemoryType.SHARDED_REDIS, nodes=NODES, flush=True)
+        blackboard.set('key', 'value', ttl=10.0)
+        blackboard.set('other', 'value')
+        self.assertEqual(blackboard.get('key'), 'value')
+        blackboard.clear()
+        self.assertListEqual(blackboard.keys(in_list=True), [])
+        self.assertDictEqual(blackboard._memory_wrapper._get_all(), {})
+        blackboard.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for memory and size accounting of `gblackboard` package."""
+
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard.wrapper import MemoryWrapper
+
+
+def pickled_size(value):
+    return len(MemoryWrapper.transform_value_to_pickle(value))
+
+
+class StatsTestMixin(object):
+
+    def test_sizeof(self):
+        self.blackboard.set('small', 1)
+        self.blackboard.set('large', 'x' * 1000)
+        self.assertEqual(self.blackboard.sizeof('small'), pickled_size(1))
+        self.assertEqual(self.blackboard.sizeof('large'), pickled_size('x' * 1000))
+        self.blackboard.update('large', 'x')
+        self.assertEqual(self.blackboard.sizeof('large'), pickled_size('x'))
+        with self.assertRaises(exception.NonExistingKey):
+            self.blackboard.sizeof('unknown')
+
+    def test_stats(self):
+        for size in (10, 1000, 100):
+            self.blackboard.set('key{}'.format(size), 'x' * size)
+        self.blackboard.get('key10')
+        stats = self.blackboard.stats(top=2)
+        self.assertEqual(stats['keys'], 3)
+        self.assertEqual(stats['bytes'], sum(pickled_size('x' * size) for size in (10, 1000, 100)))
+        self.assertListEqual([key for key, _ in stats['largest']], ['key1000', 'key100'])
+        self.assertEqual(stats['serializations'], 3)
+        self.assertEqual(stats['deserializations'], 1)
+        self.blackboard.drop('key1000')
+        stats = self.blackboard.stats()
+        self.assertEqual(stats['keys'], 2)
+        self.assertEqual(stats['bytes'], sum(pickled_size('x' * size) for size in (10, 100)))
+
+
+class TestDictionaryStats(StatsTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY)
+
+    def tearDown(self):
+        self.blackboard.close()
+
+
+class TestRedisStats(StatsTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.REDIS, flush=True)
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def test_sizeof_foreign_key(self):
+        self.blackboard.set('key', 'value')
+        self.blackboard._memory_wrapper._reset_accounting()
+        self.assertEqual(self.blackboard.sizeof('key'), pickled_size('value'))
+
+    def test_memory_usage(self):
+        self.blackboard.set('key', 'value')
+        # fakeredis does not support `MEMORY USAGE`
+        self.assertIsNone(self.blackboard.stats(memory_usage=True)['memory_usage'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for structured (field by field) data of `gblackboard` package."""
+
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+
+from gblackboard import exception
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+
+DIR_PATH = './gblackboard-structured'
+NODES = ['node1:6379', 'node2:6379']
+
+ROBOT = {'name': 'robot', 'pose': (1.0, 2.0, 0.5), 'battery': 0.9, 'log': 'x' * 10000}
+
+
+class StructuredTestMixin(object):
+
+    def test_set_and_get(self):
+        self.blackboard.set('robot', ROBOT, structured=True)
+        self.assertDictEqual(self.blackboard.get('robot'), ROBOT)
+        self.assertDictEqual(self.blackboard.get_fields('robot', ['pose', 'missing']), {'pose': (1.0, 2.0, 0.5)})
+        self.assertDictEqual(self.blackboard.get_fields('robot'), ROBOT)
+        self.assertGreater(self.blackboard.sizeof('robot'), 10000)
+
+    def test_update_fields(self):
+        received = []
+        self.blackboard.set('robot', ROBOT, structured=True)
+        self.blackboard.register_callback('robot', received.append)
+        serializations = self.blackboard._memory_wrapper.stats()['serializations']
+        self.assertTrue(self.blackboard.update_fields('robot', {'battery': 0.8, 'mode': 'idle'}))
+        # only the changed fields are serialized
+        self.assertEqual(self.blackboard._memory_wrapper.stats()['serializations'] - serializations, 2)
+        self.assertEqual(received, [{'battery': 0.8, 'mode': 'idle'}])
+        self.assertDictEqual(self.blackboard.get('robot'), dict(ROBOT, battery=0.8, mode='idle'))
+        # `update` replaces the whole value
+        self.blackboard.update('robot', {'name': 'robot'})
+        self.assertDictEqual(self.blackboard.get('robot'), {'name': 'robot'})
+        self.assertEqual(received[-1], {'name': 'robot'})
+
+    def test_errors(self):
+        self.blackboard.set('plain', {'a': 1})
+        self.blackboard.set('const', {'a': 1}, read_only=True, structured=True)
+        with self.assertRaises(exception.NotStructured):
+            self.blackboard.update_fields('plain', {'a': 2})
+        with self.assertRaises(exception.NotStructured):
+            self.blackboard.get_fields('plain')
+        with self.assertRaises(exception.NotEditable):
+            self.blackboard.update_fields('const', {'a': 2})
+        with self.assertRaises(exception.NonExistingKey):
+            self.blackboard.get_fields('missing')
+        with self.assertRaises(exception.UnsupportedDataType):
+            self.blackboard.set('list', [1, 2], structured=True)
+        with self.assertRaises(exception.KeyNotString):
+            self.blackboard.set('ints', {1: 2}, structured=True)
+
+    def test_drop_and_clear(self):
+        self.blackboard.set('robot', ROBOT, structured=True)
+        self.blackboard.set('other', {'a': 1}, structured=True)
+        self.blackboard.drop('robot')
+        self.assertEqual(list(self.blackboard._memory_wrapper._get_all_parts()), ['other'])
+        self.blackboard.clear()
+        self.assertDictEqual(self.blackboard._memory_wrapper._get_all_parts(), {})
+
+    def test_expiry(self):
+        self.blackboard.set('robot', ROBOT, structured=True, ttl=0.1)
+        time.sleep(0.3)
+        self.assertNotIn('robot', self.blackboard.keys(in_list=True))
+        self.assertDictEqual(self.blackboard._memory_wrapper._get_all_parts(), {})
+
+    def test_save_and_load(self):
+        self.blackboard.set('robot', ROBOT, structured=True)
+        self.blackboard.set('plain', 'value', read_only=True)
+        self.blackboard.save(DIR_PATH)
+        self.blackboard.clear()
+        self.blackboard.load(DIR_PATH)
+        self.assertDictEqual(self.blackboard.get('robot'), ROBOT)
+        self.assertEqual(self.blackboard.get('plain'), 'value')
+        self.blackboard.update_fields('robot', {'battery': 0.1})
+        self.assertEqual(self.blackboard.get_fields('robot', ['battery']), {'battery': 0.1})
+        with self.assertRaises(exception.NotEditable):
+            self.blackboard.update('plain', 'new_value')
+
+    def remove_dir(self):
+        if os.path.exists(DIR_PATH):
+            for name in os.listdir(DIR_PATH):
+                os.remove(os.path.join(DIR_PATH, name))
+            os.rmdir(DIR_PATH)
+
+
+class TestDictionaryStructured(StructuredTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.DICTIONARY)
+        self.addCleanup(self.remove_dir)
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def test_copy(self):
+        self.blackboard.set('robot', ROBOT, structured=True)
+        copied = self.blackboard.copy('structured-copy')
+        self.blackboard.update_fields('robot', {'battery': 0.1})
+        self.assertDictEqual(copied.get('robot'), ROBOT)
+        self.assertDictEqual(copied.get_fields('robot', ['battery']), {'battery': 0.9})
+        copied.close()
+
+    def test_not_evicted(self):
+        blackboard = Blackboard(SupportedMemoryType.DICTIONARY, namespace='bounded', max_bytes=5000)
+        self.addCleanup(blackboard.close)
+        blackboard.set('robot', ROBOT, structured=True)
+        blackboard.set('small', 'value')
+        self.assertIn('robot', blackboard.keys(in_list=True))
+        self.assertDictEqual(blackboard.get('robot'), ROBOT)
+
+
+class TestRedisStructured(StructuredTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.REDIS, flush=True, buckets=4)
+        self.addCleanup(self.remove_dir)
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    def test_layout(self):
+        self.blackboard.set('robot', ROBOT, structured=True)
+        redis = self.blackboard._memory_wrapper._mem
+        self.assertEqual(redis.hlen('gblackboard:parts:robot'), len(ROBOT))
+        self.assertEqual(redis.smembers('gblackboard:parts'), {b'robot'})
+        self.blackboard.clear()
+        self.assertFalse(redis.exists('gblackboard:parts:robot', 'gblackboard:parts'))
+
+
+class TestShardedRedisStructured(StructuredTestMixin, unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.blackboard = Blackboard(SupportedMemoryType.SHARDED_REDIS, nodes=NODES, flush=True)
+        self.addCleanup(self.remove_dir)
+
+    def tearDown(self):
+        self.blackboard.close()
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_rebalance(self):
+        for index in range(20):
+            self.blackboard.set('robot{}'.format(index), dict(ROBOT, index=index), structured=True)
+        wrapper = self.blackboard._memory_wrapper
+        self.assertGreater(wrapper.add_node('node3:6379'), 0)
+        wrapper.remove_node('node1:6379')
+        for index in range(20):
+            self.assertDictEqual(self.blackboard.get('robot{}'.format(index)), dict(ROBOT, index=index))
+        self.assertEqual(len(wrapper._get_all_parts()), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for write-behind buffering of `RedisWrapper`."""
+
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+import redis
+
+from gblackboard import Blackboard
+from gblackboard import SupportedMemoryType
+from gblackboard import RedisNotConnected
+from gblackboard.wrapper import RedisWrapper
+
+FILE_PATH = './gblackboard-write-behind'
+
+
+class TestWriteBehind(unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def setUp(self):
+        self.wrapper = RedisWrapper(flush=True, write_behind=True, write_batch=10, write_delay=0.05)
+        self.redis = self.wrapper._mem
+
+    def tearDown(self):
+        self.wrapper.close()
+
+    def stored(self, key):
+        data = self.redis.hget('gblackboard', key)
+        return None if data is None else self.wrapper._deserialize(data)
+
+    def test_collapse_and_read_buffered(self):
+        with patch.object(self.wrapper, '_drain', return_value=0):
+            for value in range(100):
+                self.assertTrue(self.wrapper.set('key', value))
+            self.assertEqual(self.wrapper._pending['key'][0], self.wrapper._serialize(99))
+            self.assertEqual(len(self.wrapper._pending), 1)
+            self.assertIsNone(self.stored('key'))
+            self.assertEqual(self.wrapper.get('key'), 99)
+            self.assertTrue(self.wrapper.has('key'))
+        self.assertEqual(self.wrapper.sync(), 1)
+        self.assertEqual(self.stored('key'), 99)
+        self.assertEqual(self.wrapper.sync(), 0)
+
+    def test_flush_by_time(self):
+        self.wrapper.set('key', 1)
+        deadline = time.monotonic() + 2.0
+        while self.stored('key') is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.stored('key'), 1)
+        self.assertEqual(self.wrapper._pending, {})
+
+    def test_flush_by_size(self):
+        with patch.object(self.wrapper, '_write_delay', 60.0):
+            for index in range(10):
+                self.wrapper.set('key{}'.format(index), index)
+            deadline = time.monotonic() + 2.0
+            while self.redis.hlen('gblackboard') < 10 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(self.redis.hlen('gblackboard'), 10)
+
+    def test_barriers(self):
+        with patch.object(self.wrapper, '_write_delay', 60.0):
+            self.wrapper.set('key', 1, ttl=60)
+            # other operations write the buffer through first
+            self.assertTrue(self.wrapper.expire('key', 30))
+            self.assertEqual(self.stored('key'), 1)
+            self.wrapper.set('key', 2)
+            self.assertEqual(self.wrapper._get_all(), {b'key': self.wrapper._serialize(2)})
+            self.wrapper.set('key', 3)
+            self.assertTrue(self.wrapper.delete('key'))
+            self.assertIsNone(self.wrapper.get('key'))
+            self.assertIsNone(self.stored('key'))
+
+    def test_flush_discards_buffer(self):
+        with patch.object(self.wrapper, '_write_delay', 60.0):
+            self.wrapper.set('key', 1)
+            self.wrapper.flush()
+            self.assertIsNone(self.wrapper.get('key'))
+            self.assertEqual(self.wrapper.sync(), 0)
+
+    def test_failed_write_is_kept(self):
+        with patch.object(self.wrapper, '_write_delay', 60.0):
+            self.wrapper.set('key', 1)
+            with patch.object(self.wrapper._mem, 'pipeline', side_effect=redis.ConnectionError):
+                with self.assertRaises(RedisNotConnected):
+                    self.wrapper.sync()
+            self.assertEqual(self.wrapper.get('key'), 1)
+            self.assertEqual(self.wrapper.sync(), 1)
+        self.assertEqual(self.stored('key'), 1)
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_close_writes_through(self):
+        wrapper = RedisWrapper(flush=False, namespace='wb', write_behind=True, write_delay=60.0)
+        self.addCleanup(wrapper._mem.unlink, 'gblackboard:{wb}')
+        wrapper.set('key', 1)
+        wrapper.close()
+        self.assertIsNotNone(wrapper._mem.hget('gblackboard:{wb}', 'key'))
+
+
+class TestBlackboardWriteBehind(unittest.TestCase):
+
+    @patch('redis.Redis', fakeredis.FakeRedis)
+    def test_callbacks_fire_immediately(self):
+        blackboard = Blackboard(SupportedMemoryType.REDIS, write_behind=True, write_delay=60.0)
+        self.addCleanup(blackboard.close)
+        received = []
+        blackboard.set('key', 0)
+        blackboard.register_callback('key', received.append)
+        for value in range(1, 6):
+            blackboard.update('key', value)
+        self.assertEqual(received, [1, 2, 3, 4, 5])
+        self.assertEqual(blackboard.get('key'), 5)
+        self.assertEqual(blackboard.sync(), 1)
+        blackboard.save(FILE_PATH)
+        self.addCleanup(self.remove_files)
+        blackboard.clear()
+        blackboard.load(FILE_PATH)
+        self.assertEqual(blackboard.get('key'), 5)
+
+    def remove_files(self):
+        for name in os.listdir(FILE_PATH):
+            os.remove(os.path.join(FILE_PATH, name))
+        os.rmdir(FILE_PATH)